@@ -0,0 +1,195 @@
+"""
+チャート・スライド生成のベンチマーク
+chart_* / slide_* 関数ごとの所要時間と、負荷ケース（1万行テーブル・500枚デッキ・60ヶ月系列）を計測し、
+JSON で出力する。ベースライン JSON と比較して閾値を超えて遅くなった項目を回帰として報告する
+"""
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10   # median slower than baseline by more than 10% ...
+MIN_DELTA = 0.002          # ... and by more than 2ms (timer noise on tiny cases)
+
+
+def time_call(func, repeat=DEFAULT_REPEAT, setup=None, warmup=1):
+    """Seconds per call of func(): min / median / mean over repeat runs.
+
+    setup() runs before every call (warm-up included) and is not timed.
+    """
+    times = []
+    for i in range(warmup + repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            times.append(elapsed)
+    return {'min': min(times), 'median': statistics.median(times),
+            'mean': statistics.fmean(times), 'runs': repeat}
+
+
+# ========== Cases ==========
+def series_60m():
+    """Synthetic 60-month series for the time-series charts (axis limits auto)."""
+    months = [f'{2021 + (m + 3) // 12}/{(m + 3) % 12 + 1}' for m in range(60)]
+    mrr = [round(20 + m * 0.6 + (m % 12) * 0.3, 1) for m in range(60)]
+    option = [round(15 + m * 0.9, 1) for m in range(60)]
+    churn = [round(3.6 - m * 0.04, 2) for m in range(60)]
+    return {
+        'revenue_trend': {'title': '売上推移（60ヶ月）', 'years': months,
+                          'revenue': [round(a + b, 1) for a, b in zip(mrr, option)],
+                          'mrr': mrr, 'option_svc': option, 'yoy': None, 'yoy_alert': [],
+                          'ylim': None},
+        'mrr_arpa': {'years': months, 'mrr_annual': mrr,
+                     'arpa': [100 + m * 2 for m in range(60)], 'ylim': None, 'ylim2': None},
+        'churn': {'years': months, 'churn': churn,
+                  'colors': ['ACCENT_RED' if c > 2 else 'BLUE' for c in churn], 'ylim': None},
+        'accounts': {'years': months, 'long_term': [150 + m for m in range(60)],
+                     'new_per_year': [3 + m % 5 for m in range(60)], 'ylim': None, 'ylim2': None},
+    }
+
+
+def table_rows(n):
+    return ([f'A{i:05d}', f'アカウント{i}', ['Enterprise', 'Mid', 'SMB'][i % 3],
+             f'{(i * 37) % 100}', f'¥{(i * 7919) % 500_000:,}', '継続' if i % 7 else '要フォロー']
+            for i in range(n))
+
+
+def chart_cases(gc, out_dir):
+    gc.setup_matplotlib()
+    gc.OUT_DIR = out_dir
+    data = gc.default_data()
+    cases = {f'chart.{name}': (lambda f=func, d=data[name], o=out: f(d, o))
+             for name, (func, out) in gc.CHARTS.items()}
+    for name, d in series_60m().items():
+        func, out = gc.CHARTS[name]
+        cases[f'stress.series_60m.{name}'] = lambda f=func, d=d, o=out: f(d, 'stress_' + o)
+    for name in gc.POOLED:
+        func, out = gc.CHARTS[name]
+        cases[f'pool.{name}'] = lambda f=func, d=data[name], o=out: pooled(gc, f, d, o)
+        cases[f'blit.{name}'] = lambda f=func, d=data[name], o=out: pooled(gc, f, d, o, True)
+    return cases
+
+
+def pooled(gc, func, data, out, blit=False):
+    """func(data, out) with the figure pool (and partial redraw) on; the first
+    calls (warm-up) build the pooled figure and background."""
+    gc.POOL, gc.BLIT = True, blit
+    try:
+        func(data, out)
+    finally:
+        gc.POOL = gc.BLIT = False
+
+
+def sim_cases():
+    import monte_carlo as mc
+    base = mc.plan_inputs()
+    return {'sim.monte_carlo_200k': lambda: mc.bands(mc.simulate(base, 200_000))}
+
+
+def slide_cases(gp):
+    def fresh():
+        gp.prs = gp.new_presentation()
+
+    cases = {}
+    for func, _ in gp.SLIDES:
+        cases[f'slide.{func.__name__}'] = (func, fresh)
+
+    header = ['ID', 'アカウント名', 'プラン', 'ヘルススコア', 'MRR', 'ステータス']
+    widths = [gp.Inches(12.7) // len(header)] * len(header)
+
+    def table_10k():
+        gp.add_paginated_table('Stress：1万行テーブル', header, table_rows(10_000), widths)
+        gp.prs.save(io.BytesIO())
+
+    def deck_500():
+        for i in range(500):
+            gp.SLIDES[i % len(gp.SLIDES)][0]()
+        gp.prs.save(io.BytesIO())
+
+    cases['stress.table_10k'] = (table_10k, fresh)
+    cases['stress.deck_500'] = (deck_500, fresh)
+    return cases
+
+
+def run(select=None, repeat=DEFAULT_REPEAT, stress=True, verbose=True):
+    """Time every case whose name contains one of select (all if empty).
+
+    Stress cases run once per repeat as well, but with repeat capped at 2.
+    """
+    import generate_charts as gc
+    import generate_pptx as gp
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = gc.OUT_DIR
+        try:
+            cases = {k: (v, None) for k, v in chart_cases(gc, tmp).items()}
+            cases.update(slide_cases(gp))
+            cases.update({k: (v, None) for k, v in sim_cases().items()})
+            for name, (func, setup) in cases.items():
+                if select and not any(s in name for s in select):
+                    continue
+                if name.startswith('stress.') and not stress:
+                    continue
+                n = min(repeat, 2) if name.startswith('stress.') else repeat
+                results[name] = time_call(func, n, setup)
+                if verbose:
+                    print(f'  {name:<40} {results[name]["median"] * 1000:9.1f}ms', file=sys.stderr)
+        finally:
+            gc.OUT_DIR = out_dir
+    return {'meta': meta(repeat), 'results': results}
+
+
+def meta(repeat):
+    from importlib.metadata import version
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'matplotlib': version('matplotlib'),
+        'python-pptx': version('python-pptx'),
+        'repeat': repeat,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD, min_delta=MIN_DELTA):
+    """Per-case median ratio against a baseline report.
+
+    Returns rows {'name', 'baseline', 'current', 'ratio', 'regression'} for the
+    cases present in both; a regression is slower by more than threshold (as a
+    fraction) and by more than min_delta seconds.
+    """
+    rows = []
+    for name, cur in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        b, c = base['median'], cur['median']
+        rows.append({'name': name, 'baseline': b, 'current': c,
+                     'ratio': c / b if b else float('inf'),
+                     'regression': c > b * (1 + threshold) and c - b > min_delta})
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f'{"case":<40} {"baseline":>10} {"current":>10} {"ratio":>7}', file=sys.stderr)
+    for r in rows:
+        flag = '  REGRESSION' if r['regression'] else ''
+        print(f'{r["name"]:<40} {r["baseline"] * 1000:8.1f}ms {r["current"] * 1000:8.1f}ms '
+              f'{r["ratio"]:6.2f}x{flag}', file=sys.stderr)
+    n = sum(r['regression'] for r in rows)
+    print(f'{n} regression(s) over {threshold:.0%} of {len(rows)} compared cases', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    import nexpro
+    sys.exit(nexpro.main(['bench'] + sys.argv[1:]))
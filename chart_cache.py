@@ -0,0 +1,116 @@
+"""
+チャート画像のコンテンツアドレス型キャッシュ
+入力データ・スタイル・描画パラメータのハッシュをキーに PNG を保存し、再描画を省く
+（generate_pptx の差分ビルドもシリアライズ済みスライドの保存に使う）
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'NEXPRO_CHART_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'nexpro', 'charts'))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024   # 512MB
+DEFAULT_MAX_AGE = 30 * 24 * 3600        # 30 days
+
+
+def make_key(*parts):
+    """Stable SHA-256 over JSON-serialisable parts (dict order does not matter)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChartCache:
+    """On-disk cache: <root>/<key[:2]>/<key><ext>. mtime doubles as last-used time."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age=DEFAULT_MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def path_for(self, key, ext='.png'):
+        return os.path.join(self.root, key[:2], key + ext)
+
+    def fetch(self, key, dest, ext='.png'):
+        """Copy the cached file to dest. Returns True on a hit."""
+        src = self.path_for(key, ext)
+        try:
+            shutil.copyfile(src, dest)
+        except FileNotFoundError:
+            return False
+        os.utime(src)  # mark as recently used for LRU eviction
+        return True
+
+    def store(self, key, src, ext='.png'):
+        """Add src to the cache under key (atomic rename, safe across workers)."""
+        dst = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f'{dst}.{os.getpid()}.tmp'
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+
+    def get_bytes(self, key, ext):
+        """Cached bytes for key, or None."""
+        path = self.path_for(key, ext)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def put_bytes(self, key, data, ext):
+        dst = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f'{dst}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, dst)
+
+    def prune(self):
+        """Evict entries older than max_age, then least-recently-used until under max_bytes.
+
+        Returns the number of files removed.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        now = time.time()
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for fn in filenames:
+                path = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        removed = 0
+        total = 0
+        keep = []
+        for mtime, size, path in entries:
+            if self.max_age is not None and now - mtime > self.max_age:
+                removed += _unlink(path)
+            else:
+                keep.append((mtime, size, path))
+                total += size
+
+        if self.max_bytes is not None:
+            keep.sort()  # oldest first
+            for mtime, size, path in keep:
+                if total <= self.max_bytes:
+                    break
+                removed += _unlink(path)
+                total -= size
+        return removed
+
+
+def _unlink(path):
+    try:
+        os.remove(path)
+        return 1
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,106 @@
+"""
+チャート用日本語フォント解決の永続キャッシュ
+候補フォントの findfont 結果（ファミリー名・パス）をフォントディレクトリの mtime と紐づけて保存し、
+起動ごと・ワーカーごとの探索（初回は matplotlib のフォントキャッシュ再構築）を省く
+"""
+import hashlib
+import json
+import os
+import sys
+
+from chart_cache import DEFAULT_CACHE_DIR
+
+FONT_CACHE_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), 'fonts.json')
+
+# where fonts get installed (matplotlib's own search list plus its bundled fonts)
+FONT_DIRS = [
+    '/usr/share/fonts', '/usr/local/share/fonts', '/usr/X11R6/lib/X11/fonts/TTF',
+    '/usr/X11/lib/X11/fonts', '/usr/lib/openoffice/share/fonts/truetype',
+    '~/.fonts', '~/.local/share/fonts',
+    '/Library/Fonts', '/Network/Library/Fonts', '/System/Library/Fonts', '~/Library/Fonts',
+    os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts'),
+]
+
+
+def font_dirs_stamp():
+    """Hash of every font directory's mtime (subdirectories included) and the
+    matplotlib version; changes whenever a font is installed or removed."""
+    from importlib.metadata import version
+    from importlib.util import find_spec
+    dirs = [os.path.expanduser(d) for d in FONT_DIRS]
+    spec = find_spec('matplotlib')
+    if spec and spec.submodule_search_locations:
+        dirs.append(os.path.join(spec.submodule_search_locations[0], 'mpl-data', 'fonts'))
+    stamps = []
+    for top in dirs:
+        for dirpath, _, _ in os.walk(top):
+            try:
+                stamps.append((dirpath, os.stat(dirpath).st_mtime_ns))
+            except OSError:
+                continue
+    h = hashlib.sha256(json.dumps([version('matplotlib'), stamps]).encode('utf-8'))
+    return h.hexdigest()
+
+
+def jp_chars(*texts):
+    """Sorted Japanese characters (kana, kanji, full-width forms) in texts."""
+    return ''.join(sorted({ch for t in texts for ch in t if ord(ch) >= 0x3000}))
+
+
+def resolve_font(candidates, glyphs='', cache_path=FONT_CACHE_PATH):
+    """(family, path) of the first candidate that is installed and covers glyphs.
+
+    If no candidate covers every glyph, the first installed one is used (with a
+    warning); (None, None) if none is installed. The result is stored in
+    cache_path under a key of the candidates, glyphs and font_dirs_stamp(), so
+    later processes skip findfont entirely until fonts change.
+    """
+    key = hashlib.sha256(json.dumps([candidates, glyphs, font_dirs_stamp()],
+                                    ensure_ascii=False).encode('utf-8')).hexdigest()
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            entry = json.load(f)
+        if entry.get('key') == key:
+            return entry['family'], entry['path']
+    except (OSError, ValueError):
+        pass
+
+    family, path = _probe(candidates, glyphs)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'family': family, 'path': path}, f, ensure_ascii=False)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass  # read-only home: resolve again next time
+    return family, path
+
+
+def _probe(candidates, glyphs):
+    import matplotlib.font_manager as fm
+    from matplotlib.ft2font import FT2Font
+
+    first = None
+    for candidate in candidates:
+        try:
+            path = fm.findfont(fm.FontProperties(family=candidate), fallback_to_default=False)
+        except ValueError:
+            continue  # not installed
+        if 'last' in path.lower():
+            continue
+        try:
+            charmap = FT2Font(path).get_charmap()
+        except Exception:
+            continue
+        missing = [ch for ch in glyphs if ord(ch) not in charmap]
+        if not missing:
+            return candidate, path
+        if first is None:
+            first = (candidate, path, len(missing))
+    if first is None:
+        return None, None
+    candidate, path, n_missing = first
+    print(f'warning: {candidate} ({path}) lacks {n_missing}/{len(glyphs)} '
+          f'Japanese glyphs used in the charts', file=sys.stderr)
+    return candidate, path
@@ -1,33 +1,64 @@
 """
 ネクプロ戦略プレゼンテーション用チャート画像生成
 """
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-import numpy as np
+import io
+import json
 import os
+import sys
+import time
+import traceback
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from chart_cache import ChartCache, DEFAULT_CACHE_DIR, make_key
+from fonts import jp_chars, resolve_font
+from profiling import stage
+from scenario_store import PLAN, fill_chart_data, open_store, rederive
+
+# matplotlib / numpy are imported by setup_matplotlib() on first render, so
+# --help, spec building and cache hits do not pay for them.
+matplotlib = plt = fm = np = None
 
 # --- Font setup ---
+FONT_CANDIDATES = ['WenQuanYi Zen Hei', 'Noto Sans CJK JP', 'IPAGothic', 'unifont_jp']
 JP_FONT = None
-for candidate in ['WenQuanYi Zen Hei', 'Noto Sans CJK JP', 'IPAGothic', 'unifont_jp']:
-    try:
-        fp = fm.findfont(fm.FontProperties(family=candidate))
-        if fp and 'last' not in fp.lower():
-            JP_FONT = candidate
-            break
-    except Exception:
-        continue
-
-if JP_FONT:
-    plt.rcParams['font.family'] = JP_FONT
-else:
-    plt.rcParams['font.family'] = 'sans-serif'
+JP_FONT_PATH = None
+_font_resolved = False
+
+
+def setup_matplotlib():
+    """Import matplotlib (Agg) and numpy and apply the font rcParams. Idempotent."""
+    global matplotlib, plt, fm, np
+    if plt is not None:
+        return
+    import matplotlib as _matplotlib
+    _matplotlib.use('Agg')
+    import matplotlib.pyplot as _plt
+    import matplotlib.font_manager as _fm
+    import numpy as _np
+    matplotlib, plt, fm, np = _matplotlib, _plt, _fm, _np
+    plt.rcParams['font.family'] = jp_font() or 'sans-serif'
+    plt.rcParams['axes.unicode_minus'] = False
+
+
+def jp_font():
+    """First installed family of FONT_CANDIDATES that covers the chart text, or None.
+
+    Resolved once per process; the result is kept in a persistent cache (see
+    fonts.resolve_font) so neither later runs nor pool workers probe fonts.
+    """
+    global JP_FONT, JP_FONT_PATH, _font_resolved
+    if not _font_resolved:
+        with open(__file__, encoding='utf-8') as f:
+            source = f.read()
+        with open(DATA_PATH, encoding='utf-8') as f:
+            data = f.read()
+        JP_FONT, JP_FONT_PATH = resolve_font(FONT_CANDIDATES, jp_chars(source, data))
+        _font_resolved = True
+    return JP_FONT
 
-plt.rcParams['axes.unicode_minus'] = False
 
 OUT_DIR = '/home/user/nexpro/chart_images'
-os.makedirs(OUT_DIR, exist_ok=True)
 
 # Color palette - clean corporate (navy, blue, grey, accent)
 NAVY = '#1B2A4A'
@@ -40,107 +71,502 @@ LIGHT_GREY = '#D9D9D9'
 WHITE = '#FFFFFF'
 BG_COLOR = '#FAFAFA'
 
+DPI = 200
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chart_data.json')
+_default_data = {}  # (scenario, fan) -> chart data, filled from _default_stamp
+_default_stamp = None  # (store digest, chart_data.json mtime)
+
+
+def default_data(scenario=PLAN, fan=None):
+    """Chart data from chart_data.json with the series of scenario (and the fan
+    bands with prefix fan) filled in from the scenario store (loaded once per
+    process, scenario and fan, until the store or chart_data.json changes)."""
+    global _default_stamp
+    store = open_store()
+    stamp = (store.digest, os.stat(DATA_PATH).st_mtime_ns)
+    if stamp != _default_stamp:
+        _default_data.clear()
+        _default_stamp = stamp
+    if (scenario, fan) not in _default_data:
+        _default_data[scenario, fan] = fill_chart_data(load_data(DATA_PATH), store,
+                                                       scenario, fan)
+    return _default_data[scenario, fan]
+
+
+def load_data(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def palette_color(c):
+    """Resolve a palette name ('NAVY') from a data file; other values pass through."""
+    return globals().get(c, c) if isinstance(c, str) and c.isupper() else c
+
+
+# Vector output: with VECTOR, save() also writes <name>.svg. Text is stored as
+# glyph outlines, each glyph used in the chart defined once (svg.fonttype
+# 'path'), i.e. a per-chart subset of the JP font that needs no installed font
+# to display. The PNG becomes a low-resolution fallback for viewers without SVG.
+VECTOR = False
+SVG_FALLBACK_DPI = 72  # 0 = blank PNG of the right size (only the SVG is meant to show)
+
+
+def svg_path(path):
+    return os.path.splitext(path)[0] + '.svg'
+
+
 def save(fig, name):
-    fig.savefig(f'{OUT_DIR}/{name}', dpi=200, bbox_inches='tight',
-                facecolor=fig.get_facecolor(), edgecolor='none')
+    path = os.path.join(OUT_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with stage('save') as st:
+        if VECTOR:
+            _save_vector(fig, path)
+        elif BLIT and fig in _layers and _save_blit(fig, path):
+            st.counts['blit'] = 1
+        else:
+            fig.savefig(path, dpi=DPI, bbox_inches='tight',
+                        facecolor=fig.get_facecolor(), edgecolor='none')
+        if st:
+            st.counts['artists'] = sum(len(ax.get_children()) for ax in fig.axes)
     plt.close(fig)
     print(f'  Saved: {name}')
 
 
+def _save_vector(fig, path):
+    # the tight bbox is computed once and shared by the SVG and its fallback
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(
+        plt.rcParams['savefig.pad_inches'])
+    kwargs = {'bbox_inches': bbox, 'facecolor': fig.get_facecolor(), 'edgecolor': 'none'}
+    with plt.rc_context({'svg.fonttype': 'path', 'svg.hashsalt': 'nexpro'}):
+        fig.savefig(svg_path(path), format='svg', metadata={'Date': None}, **kwargs)
+    if SVG_FALLBACK_DPI:
+        fig.savefig(path, dpi=SVG_FALLBACK_DPI, **kwargs)
+    else:
+        from PIL import Image
+        Image.new('RGB', (max(1, round(bbox.width * 10)), max(1, round(bbox.height * 10))),
+                  BG_COLOR).save(path)
+
+
+# ========== Figure pool ==========
+# The time-series charts are drawn in two steps: layout(n) builds the figure
+# and the artists for n periods, fill(artists, d) sets everything that
+# depends on the data (bar heights, line data, labels, limits). With POOL the
+# figure is kept per process and chart shape, so rendering the same chart for
+# another tenant or scenario only re-runs fill(). Output is identical.
+POOL = False
+POOL_SIZE = 16  # figures kept per process; the least recently used is dropped
+_pool = {}
+
+
+def pooled_figure(chart, d):
+    """Figure of a POOLED chart type drawn with d (reused from the pool with POOL)."""
+    layout, fill, _ = POOLED[chart]
+    key = (chart, len(d['years']))
+    entry = _pool.pop(key, None) if POOL else None
+    if entry is None:
+        entry = layout(len(d['years']))
+        if POOL:
+            # owned by the pool, not pyplot: a persistent Agg canvas keeps its
+            # renderer, and matplotlib's text layout cache keyed on it, across saves
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            plt.close(entry[0])
+            FigureCanvasAgg(entry[0])
+    fig, artists = entry
+    try:
+        fill(artists, d)
+    except Exception:
+        plt.close(fig)  # possibly half-filled: not returned to the pool
+        raise
+    _layers[fig] = (chart, d, artists['data'])
+    if POOL:
+        _pool[key] = entry
+        while len(_pool) > POOL_SIZE:
+            _pool.pop(next(iter(_pool)))
+    return fig
+
+
+# ========== Partial redraw ==========
+# With BLIT, a pooled chart is saved in two layers: the background (axes,
+# ticks, grid, reference lines: everything that does not depend on the data)
+# is rasterized once per look, and only the data layer (bars, lines, value
+# labels, plus the cheap artists painted over them such as title and legend)
+# is drawn onto it per variant. A variant whose data would reach into an
+# artist painted after it, or past the cropped area, is rendered in full, so
+# output is identical either way.
+BLIT = False
+BLIT_SIZE = 8  # backgrounds kept per process (~6MB each at DPI 200)
+_backgrounds = {}
+_layers = weakref.WeakKeyDictionary()  # figure -> (chart, data, data-layer artists)
+_seen = set()  # background keys rendered in full once (cleared past SEEN_MAX)
+SEEN_MAX = 4096
+_measurer = None
+
+
+def _save_blit(fig, path):
+    """Save a pooled figure as cached background + data layer. Returns False
+    (nothing written) when the figure has to be rendered in full."""
+    chart, d, data = _layers[fig]
+    static = {k: v for k, v in d.items() if k not in POOLED[chart][2]}
+    key = make_key(chart, static, [ax.get_xlim() + ax.get_ylim() for ax in fig.axes])
+    bg = _backgrounds.pop(key, None)
+    if bg is None:
+        if key not in _seen:
+            # limits computed from the data make every variant a new look:
+            # only pay for a background once a look repeats
+            if len(_seen) >= SEEN_MAX:
+                _seen.clear()
+            _seen.add(key)
+            return False
+        bg = _render_background(fig, data)
+    _backgrounds[key] = bg
+    while len(_backgrounds) > BLIT_SIZE:
+        _backgrounds.pop(next(iter(_backgrounds)))
+
+    if not _data_layer_fits(fig, data, bg):
+        return False
+    shown = set(data) | set(bg['overlay'])
+    hidden = [a for a in _draw_order(fig) if a not in shown and a.get_visible()]
+    background = fig.add_artist(_image_artist(bg['image']))
+    try:
+        for a in hidden:
+            a.set_visible(False)
+        fig.savefig(path, dpi=DPI, bbox_inches=bg['bbox'],
+                    facecolor=fig.get_facecolor(), edgecolor='none')
+    finally:
+        for a in hidden:
+            a.set_visible(True)
+        background.remove()
+    return True
+
+
+def _draw_order(fig):
+    """Artists of fig's axes in the order Figure.draw paints them."""
+    order = []
+    for ax in sorted(fig.axes, key=lambda ax: ax.zorder):
+        order.append(ax.patch)
+        order.extend(sorted((a for a in ax.get_children() if a is not ax.patch),
+                            key=lambda a: a.zorder))
+    return order
+
+
+def _render_background(fig, data):
+    """Rasterize fig without its data layer at DPI.
+
+    Artists painted after the first data artist are redrawn with the data
+    layer ('overlay'), except the axes' tick/label decorations, which are
+    expensive and only kept in the background if the data stays clear of them
+    ('late': their extents, checked per variant).
+    """
+    order = _draw_order(fig)
+    data = set(data)
+    first = min(i for i, a in enumerate(order) if a in data)
+    late = [a for a in order[first:] if a not in data and a.get_visible()]
+    overlay = [a for a in late if not isinstance(a, matplotlib.axis.Axis)]
+    hidden = [a for a in data if a.get_visible()]
+    dpi = fig.dpi
+    try:
+        for a in hidden:
+            a.set_visible(False)
+        fig.dpi = DPI
+        fig.draw_without_rendering()
+        renderer = _measure_renderer()
+        inner = fig.get_tightbbox(renderer)  # inches, overlay included
+        late_extents = [a.get_tightbbox(renderer) for a in late if a not in overlay]
+        bbox = inner.padded(plt.rcParams['savefig.pad_inches'])
+        fig.dpi = dpi
+        hidden += [a for a in overlay if a.get_visible()]
+        for a in hidden:
+            a.set_visible(False)
+        buf = io.BytesIO()
+        fig.savefig(buf, format='rgba', dpi=DPI, bbox_inches=bbox,
+                    facecolor=fig.get_facecolor(), edgecolor='none')
+    finally:
+        fig.dpi = dpi
+        for a in hidden:
+            a.set_visible(True)
+    # the canvas is int(size * DPI) pixels, as in FigureCanvasAgg.get_renderer;
+    # Agg's draw_image takes rows bottom-up
+    image = np.frombuffer(buf.getvalue(), np.uint8).reshape(-1, int(bbox.width * DPI), 4)
+    image = image[::-1].copy()
+    return {'image': image, 'bbox': bbox, 'inner': inner, 'overlay': overlay,
+            'late': [e for e in late_extents if e is not None]}
+
+
+def _data_layer_fits(fig, data, bg, margin=3):
+    """True if every data artist lies inside the background's crop and clear of
+    the decorations drawn after it (display pixels at DPI, margin for AA)."""
+    dpi = fig.dpi
+    try:
+        fig.dpi = DPI
+        renderer = _measure_renderer()
+        inner = bg['inner'].transformed(fig.dpi_scale_trans)
+        for a in data:
+            if not a.get_visible():
+                continue
+            e = a.get_tightbbox(renderer)
+            if e is None:
+                continue
+            e = e.padded(margin)
+            if not (inner.x0 <= e.x0 and e.x1 <= inner.x1 and inner.y0 <= e.y0 and e.y1 <= inner.y1):
+                return False
+            if any(e.overlaps(late) for late in bg['late']):
+                return False
+    finally:
+        fig.dpi = dpi
+    return True
+
+
+def _measure_renderer():
+    """Renderer for text and artist extents at DPI, kept so text layouts
+    measured once are cached."""
+    global _measurer
+    if _measurer is None:
+        from matplotlib.backends.backend_agg import RendererAgg
+        _measurer = RendererAgg(1, 1, DPI)
+    return _measurer
+
+
+def _image_artist(image):
+    """Artist painting an RGBA array (rows bottom-up) at the renderer's origin."""
+    class Background(matplotlib.artist.Artist):
+        def draw(self, renderer):
+            gc = renderer.new_gc()
+            renderer.draw_image(gc, 0, 0, image)
+            gc.restore()
+
+    artist = Background()
+    artist.set_zorder(-1)  # below every axes
+    return artist
+
+
+def _set_bars(bars, heights):
+    for bar, h in zip(bars, heights):
+        bar.set_height(h)
+
+
+def _set_labels(labels, xs, ys, texts, colors=None):
+    """Move value annotations to (x, y) and set their text; '' or None hides one."""
+    for i, (ann, x, y, text) in enumerate(zip(labels, xs, ys, texts)):
+        ann.xy = (x, y)
+        ann.set_text(text or '')
+        ann.set_visible(bool(text))
+        if colors:
+            ann.set_color(colors[i])
+
+
+# Fan charts: Monte Carlo percentile bands (monte_carlo.py) drawn over a series,
+# d['fan'] = {series: {'p5': [...], 'p25': ..., 'p75': ..., 'p95': ...}} in the
+# series' units, None for years without a band (actuals).
+# outer, inner band: (low, high, band alpha, whisker width)
+FAN_BANDS = (('p5', 'p95', 0.12, 1.5), ('p25', 'p75', 0.25, 5))
+
+
+def _layout_fan(ax, color, zorder, whiskers=False):
+    """Empty, hidden outer / inner bands of one fanned series (filled by
+    _set_fan): polygons around a line, or range whiskers on bars."""
+    bands = []
+    for _, _, alpha, width in FAN_BANDS:
+        if whiskers:
+            band = matplotlib.collections.LineCollection([], colors=color, linewidths=width,
+                                                         capstyle='butt')
+        else:
+            band = matplotlib.collections.PolyCollection([], facecolor=color, alpha=alpha,
+                                                         linewidth=0)
+        band.set(zorder=zorder, visible=False)
+        ax.add_collection(band, autolim=False)
+        bands.append(band)
+    return bands
+
+
+def _set_fan(bands, xs, fan):
+    for band, (low, high, _, _) in zip(bands, FAN_BANDS):
+        pts = [(x, lo, hi) for x, lo, hi in zip(xs, fan[low], fan[high])
+               if lo is not None and hi is not None] if fan else []
+        if isinstance(band, matplotlib.collections.LineCollection):
+            band.set_segments([[(x, lo), (x, hi)] for x, lo, hi in pts])
+        else:
+            band.set_verts([[(x, lo) for x, lo, _ in pts] + [(x, hi) for x, _, hi in pts[::-1]]]
+                           if pts else [])
+        band.set_visible(len(pts) > 1)
+
+
+def _fan_ylim(fan, lim):
+    """Axis limits lim, widened (plus a 5% margin) where the outer band of fan
+    would be cut off, e.g. a fixed ylim of chart_data.json sized for the plan."""
+    lo, hi = lim
+    if not fan:
+        return lo, hi
+    low, high = FAN_BANDS[0][:2]
+    lows = [v for v in fan[low] if v is not None]
+    highs = [v for v in fan[high] if v is not None]
+    pad = (hi - lo) * 0.05
+    if highs and max(highs) > hi:
+        hi = max(highs) + pad
+    if lows and min(lows) < lo:
+        lo = min(lows) - pad
+    return lo, hi
+
+
+def _set_fan_legend(art, ax, fans):
+    """Legend of the layout plus one entry per shown fan [(bands, label)]. Rebuilt
+    only when the fans shown change; the legend is a data-layer artist."""
+    labels = [label for _, label in fans]
+    if labels == art['fan_labels']:
+        return
+    handles, base_labels, kwargs = art['legend_args']
+    legend = ax.legend(handles + [bands[-1] for bands, _ in fans], base_labels + labels, **kwargs)
+    art['data'][art['data'].index(art['legend'])] = legend
+    art['legend'], art['fan_labels'] = legend, labels
+
+
 # ========== Chart 1: Revenue Trend ==========
-def chart_revenue_trend():
+def chart_revenue_trend(data=None, out='revenue_trend.png'):
+    d = data or default_data()['revenue_trend']
+    save(pooled_figure('revenue_trend', d), out)
+
+
+def _layout_revenue_trend(n):
     fig, ax = plt.subplots(figsize=(10, 5.5), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
-    years = ['FY22', 'FY23', 'FY24', 'FY25\n(計画)', 'FY26\n(計画)', 'FY27\n(計画)']
-    revenue = [418, 497, 513, 650, 912, 1383]
-    mrr = [226, 253, 288, 330, 417, 527]
-    option_svc = [192, 245, 227, 320, 495, 856]
-
-    x = np.arange(len(years))
+    x = np.arange(n)
     w = 0.35
+    zeros = np.zeros(n)
 
-    bars1 = ax.bar(x - w/2, mrr, w, label='MRR（システム利用料）', color=NAVY, zorder=3)
-    bars2 = ax.bar(x + w/2, option_svc, w, label='オプション+新規事業', color=LIGHT_BLUE, zorder=3)
+    art = {'ax': ax, 'x': x}
+    art['mrr'] = ax.bar(x - w/2, zeros, w, label='MRR（システム利用料）', color=NAVY, zorder=3)
+    art['option_svc'] = ax.bar(x + w/2, zeros, w, label='オプション+新規事業', color=LIGHT_BLUE, zorder=3)
 
-    ax.plot(x, revenue, color=ACCENT, marker='o', markersize=8, linewidth=2.5,
-            label='売上総合計', zorder=4)
+    art['revenue'], = ax.plot(x, zeros, color=ACCENT, marker='o', markersize=8, linewidth=2.5,
+                            label='売上総合計', zorder=4)
 
-    for i, v in enumerate(revenue):
-        ax.annotate(f'¥{v:,}M', (x[i], v), textcoords="offset points",
-                    xytext=(0, 12), ha='center', fontsize=10, fontweight='bold',
-                    color=ACCENT)
+    art['revenue_labels'] = [
+        ax.annotate('', (i, 0), textcoords="offset points", xytext=(0, 12), ha='center',
+                    fontsize=10, fontweight='bold', color=ACCENT) for i in x]
+    art['yoy_labels'] = [
+        ax.annotate('', (i, 0), textcoords="offset points", xytext=(0, 26), ha='center',
+                    fontsize=8) for i in x]
 
-    # YoY labels
-    yoy = [None, '+19.0%', '+3.1%', '+26.7%', '+40.3%', '+51.6%']
-    for i, y in enumerate(yoy):
-        if y:
-            color = ACCENT_RED if y == '+3.1%' else NAVY
-            ax.annotate(y, (x[i], revenue[i]), textcoords="offset points",
-                        xytext=(0, 26), ha='center', fontsize=8, color=color)
+    art['fan'] = _layout_fan(ax, ACCENT, zorder=3.5)
 
     ax.set_xticks(x)
-    ax.set_xticklabels(years, fontsize=10)
     ax.set_ylabel('百万円 (M)', fontsize=10, color=GREY)
-    ax.set_title('売上推移と構成（FY22-FY27）', fontsize=14, fontweight='bold',
-                 color=NAVY, pad=20)
-    ax.legend(loc='upper left', fontsize=9, framealpha=0.9)
+    legend_kw = {'loc': 'upper left', 'fontsize': 9, 'framealpha': 0.9}
+    art['legend'] = ax.legend(**legend_kw)
+    art['legend_args'] = (*ax.get_legend_handles_labels(), legend_kw)
+    art['fan_labels'] = []
     ax.grid(axis='y', alpha=0.3, zorder=0)
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
-    ax.set_ylim(0, 1600)
+    art['data'] = [*art['mrr'], *art['option_svc'], *art['fan'], art['revenue'],
+                   *art['revenue_labels'], *art['yoy_labels'], art['legend']]
+    return fig, art
+
+
+def _fill_revenue_trend(art, d):
+    ax, x = art['ax'], art['x']
+    revenue = d['revenue']
 
-    save(fig, 'revenue_trend.png')
+    _set_bars(art['mrr'], d['mrr'])
+    _set_bars(art['option_svc'], d['option_svc'])
+    art['revenue'].set_ydata(revenue)
+    _set_labels(art['revenue_labels'], x, revenue, [f'¥{v:,}M' for v in revenue])
+
+    # YoY labels (computed from revenue unless the data file pins them)
+    yoy = d.get('yoy') or [None] + [f'{(b / a - 1) * 100:+.1f}%'
+                                   for a, b in zip(revenue, revenue[1:])]
+    alert = d.get('yoy_alert', [])
+    _set_labels(art['yoy_labels'], x, revenue, yoy,
+                [ACCENT_RED if y in alert else NAVY for y in yoy])
+
+    fan = (d.get('fan') or {}).get('revenue')
+    _set_fan(art['fan'], x, fan)
+    _set_fan_legend(art, ax, [(art['fan'], '売上 予測レンジ（25-75% / 5-95%）')] if fan else [])
+
+    ax.set_xticklabels(d['years'], fontsize=10)
+    ax.set_title(d.get('title', '売上推移と構成'), fontsize=14, fontweight='bold',
+                 color=NAVY, pad=20)
+    ax.set_ylim(*_fan_ylim(fan, d.get('ylim') or (0, max(revenue) * 1.16)))
 
 
 # ========== Chart 2: MRR + ARPA Dual Axis ==========
-def chart_mrr_arpa():
+def chart_mrr_arpa(data=None, out='mrr_arpa.png'):
+    d = data or default_data()['mrr_arpa']
+    save(pooled_figure('mrr_arpa', d), out)
+
+
+def _layout_mrr_arpa(n):
     fig, ax1 = plt.subplots(figsize=(10, 5), facecolor=BG_COLOR)
     ax1.set_facecolor(BG_COLOR)
 
-    years = ['FY22', 'FY23', 'FY24', 'FY25(計画)', 'FY26(計画)', 'FY27(計画)']
-    mrr_annual = [226, 253, 288, 330, 417, 527]
-    arpa = [105, 138, 148, 169, 186, 204]
-
-    x = np.arange(len(years))
+    x = np.arange(n)
+    zeros = np.zeros(n)
 
-    bars = ax1.bar(x, mrr_annual, 0.5, color=NAVY, alpha=0.85, label='MRR年間合計(M)', zorder=3)
+    art = {'ax1': ax1, 'x': x}
+    art['mrr_annual'] = ax1.bar(x, zeros, 0.5, color=NAVY, alpha=0.85, label='MRR年間合計(M)',
+                              zorder=3)
     ax1.set_ylabel('MRR年間合計（百万円）', color=NAVY, fontsize=10)
-    ax1.set_ylim(0, 650)
 
-    ax2 = ax1.twinx()
-    ax2.plot(x, arpa, color=ACCENT, marker='s', markersize=8, linewidth=2.5,
-             label='ARPA長期PF(千円/月)', zorder=4)
+    art['ax2'] = ax2 = ax1.twinx()
+    art['arpa'], = ax2.plot(x, zeros, color=ACCENT, marker='s', markersize=8, linewidth=2.5,
+                          label='ARPA長期PF(千円/月)', zorder=4)
     ax2.set_ylabel('ARPA（千円/月）', color=ACCENT, fontsize=10)
-    ax2.set_ylim(50, 250)
 
-    for i, v in enumerate(arpa):
-        ax2.annotate(f'¥{v}K', (x[i], v), textcoords="offset points",
-                     xytext=(0, 10), ha='center', fontsize=9, fontweight='bold',
-                     color=ACCENT)
+    art['arpa_labels'] = [
+        ax2.annotate('', (i, 0), textcoords="offset points", xytext=(0, 10), ha='center',
+                     fontsize=9, fontweight='bold', color=ACCENT) for i in x]
+    art['mrr_fan'] = _layout_fan(ax1, LIGHT_BLUE, zorder=3.5, whiskers=True)
+    art['arpa_fan'] = _layout_fan(ax2, ACCENT, zorder=3.5)
 
     ax1.set_xticks(x)
-    ax1.set_xticklabels(years, fontsize=9)
     ax1.set_title('MRR成長とARPA推移', fontsize=14, fontweight='bold', color=NAVY, pad=15)
 
     lines1, labels1 = ax1.get_legend_handles_labels()
     lines2, labels2 = ax2.get_legend_handles_labels()
-    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', fontsize=9)
+    legend_kw = {'loc': 'upper left', 'fontsize': 9}
+    art['legend'] = ax1.legend(lines1 + lines2, labels1 + labels2, **legend_kw)
+    art['legend_args'] = (lines1 + lines2, labels1 + labels2, legend_kw)
+    art['fan_labels'] = []
 
     ax1.grid(axis='y', alpha=0.3, zorder=0)
     ax1.spines['top'].set_visible(False)
+    art['data'] = [*art['mrr_annual'], *art['mrr_fan'], art['legend'], *art['arpa_fan'],
+                   art['arpa'], *art['arpa_labels']]
+    return fig, art
+
 
-    save(fig, 'mrr_arpa.png')
+def _fill_mrr_arpa(art, d):
+    mrr_annual = d['mrr_annual']
+    arpa = d['arpa']
+
+    fan = d.get('fan') or {}
+
+    _set_bars(art['mrr_annual'], mrr_annual)
+    art['ax1'].set_ylim(*_fan_ylim(fan.get('mrr_annual'),
+                                   d.get('ylim') or (0, max(mrr_annual) * 1.23)))
+    art['arpa'].set_ydata(arpa)
+    art['ax2'].set_ylim(*_fan_ylim(fan.get('arpa'),
+                                   d.get('ylim2') or (min(arpa) * 0.5, max(arpa) * 1.23)))
+    _set_labels(art['arpa_labels'], art['x'], arpa, [f'¥{v}K' for v in arpa])
+    art['ax1'].set_xticklabels(d['years'], fontsize=9)
+
+    _set_fan(art['mrr_fan'], art['x'], fan.get('mrr_annual'))
+    _set_fan(art['arpa_fan'], art['x'], fan.get('arpa'))
+    _set_fan_legend(art, art['ax1'],
+                    [(art['mrr_fan'], 'MRR 予測レンジ')] * bool(fan.get('mrr_annual'))
+                    + [(art['arpa_fan'], 'ARPA 予測レンジ')] * bool(fan.get('arpa')))
 
 
 # ========== Chart 3: New Revenue Streams ==========
-def chart_new_revenue():
+def chart_new_revenue(data=None, out='new_revenue.png'):
+    d = data or default_data()['new_revenue']
     fig, ax = plt.subplots(figsize=(10, 5), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
-    years = ['FY25(計画)', 'FY26(計画)', 'FY27(計画)']
-    compound = [3.2, 17, 51]
-    sales_dx = [33.5, 121.8, 327]
+    years = d['years']
+    compound = d['compound']
+    sales_dx = d['sales_dx']
     x = np.arange(len(years))
     w = 0.35
 
@@ -157,7 +583,7 @@ def chart_new_revenue():
     # Total labels
     for i in range(len(years)):
         total = compound[i] + sales_dx[i]
-        pct_of_total = [5.6, 15.2, 27.3][i]
+        pct_of_total = d['pct_of_total'][i]
         ax.annotate(f'合計 ¥{total:.0f}M\n(全体の{pct_of_total}%)',
                     (x[i], max(compound[i], sales_dx[i])),
                     textcoords="offset points", xytext=(0, 20), ha='center',
@@ -172,71 +598,85 @@ def chart_new_revenue():
     ax.grid(axis='y', alpha=0.3, zorder=0)
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
-    ax.set_ylim(0, 420)
+    ax.set_ylim(*(d.get('ylim') or (0, max(compound + sales_dx) * 1.28)))
 
-    save(fig, 'new_revenue.png')
+    save(fig, out)
 
 
 # ========== Chart 4: Churn Rate Trend ==========
-def chart_churn():
+def chart_churn(data=None, out='churn_rate.png'):
+    d = data or default_data()['churn']
+    save(pooled_figure('churn', d), out)
+
+
+def _layout_churn(n):
     fig, ax = plt.subplots(figsize=(10, 4.5), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
-    years = ['FY22', 'FY23', 'FY24', 'FY25(目標)', 'FY26(目標)', 'FY27(目標)']
-    churn = [3.6, 2.3, 1.7, 1.0, 1.0, 1.0]
-    colors = [ACCENT_RED, ACCENT, ACCENT, BLUE, BLUE, BLUE]
+    x = np.arange(n)
+    art = {'ax': ax, 'x': x}
+    art['churn'] = ax.bar(x, np.zeros(n), 0.5, zorder=3, alpha=0.85)
 
-    bars = ax.bar(years, churn, 0.5, color=colors, zorder=3, alpha=0.85)
+    art['churn_labels'] = [
+        ax.annotate('', (i, 0), textcoords="offset points", xytext=(0, 8), ha='center',
+                    fontsize=12, fontweight='bold', color=NAVY) for i in x]
 
-    for bar, v in zip(bars, churn):
-        ax.annotate(f'{v}%', (bar.get_x() + bar.get_width()/2, v),
-                    textcoords="offset points", xytext=(0, 8), ha='center',
-                    fontsize=12, fontweight='bold', color=NAVY)
-
-    ax.axhline(y=1.0, color=BLUE, linestyle='--', alpha=0.5, linewidth=1.5, label='目標: 1.0%')
-    ax.axhline(y=0.42, color='green', linestyle=':', alpha=0.5, linewidth=1.5, label='SaaS優良水準: ~0.4%/月(年5%)')
+    art['target'] = ax.axhline(y=0, color=BLUE, linestyle='--', alpha=0.5, linewidth=1.5,
+                               label='目標')
+    art['benchmark'] = ax.axhline(y=0, color='green', linestyle=':', alpha=0.5, linewidth=1.5,
+                                  label='SaaS優良水準: ~0.4%/月(年5%)')
 
+    ax.set_xticks(x)
     ax.set_title('月次解約率（長期PF）推移と目標', fontsize=14, fontweight='bold', color=NAVY, pad=15)
     ax.set_ylabel('月次解約率 (%)', fontsize=10, color=GREY)
-    ax.legend(fontsize=9, loc='upper right')
+    art['legend'] = ax.legend(fontsize=9, loc='upper right')
     ax.grid(axis='y', alpha=0.3, zorder=0)
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
-    ax.set_ylim(0, 5)
+    art['data'] = [*art['churn'], *art['churn_labels']]
+    return fig, art
+
+
+def _fill_churn(art, d):
+    churn = d['churn']
 
-    save(fig, 'churn_rate.png')
+    _set_bars(art['churn'], churn)
+    for bar, c in zip(art['churn'], d['colors']):
+        bar.set_facecolor(palette_color(c))
+    _set_labels(art['churn_labels'], art['x'], churn, [f'{v}%' for v in churn])
+
+    target = d.get('target', 1.0)
+    art['target'].set_ydata([target, target])
+    art['legend'].texts[0].set_text(f'目標: {target}%')
+    benchmark = d.get('benchmark', 0.42)
+    art['benchmark'].set_ydata([benchmark, benchmark])
+
+    art['ax'].set_xticklabels(d['years'])
+    art['ax'].set_ylim(*(d.get('ylim') or (0, max(churn) * 1.4)))
 
 
 # ========== Chart 5: Positioning Map 1 ==========
-def chart_positioning_map1():
+def chart_positioning_map1(data=None, out='positioning_map1.png'):
+    d = data or default_data()['positioning_map1']
     fig, ax = plt.subplots(figsize=(9, 7), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
-    companies = {
-        'Zoom Webinars': (7.5, 3.0, GREY),
-        'ON24': (8.5, 3.5, GREY),
-        'EventHub': (4.5, 7.5, LIGHT_BLUE),
-        'bizibl': (3.5, 7.0, LIGHT_BLUE),
-        'FanGrowth': (3.0, 8.0, LIGHT_BLUE),
-        'ネクプロ\n(現在)': (6.0, 7.5, BLUE),
-        'ネクプロ\n(目標)': (8.5, 9.0, ACCENT),
-    }
-
-    for name, (x, y, color) in companies.items():
+    for name, x, y, c in d['companies']:
+        c = palette_color(c)
         size = 220 if 'ネクプロ' in name else 150
-        marker = '★' if 'ネクプロ' in name else 'o'
         if 'ネクプロ' in name:
-            ax.scatter(x, y, s=size, c=color, zorder=5, marker='*' if '目標' in name else 'o',
+            ax.scatter(x, y, s=size, c=c, zorder=5, marker='*' if '目標' in name else 'o',
                        edgecolors='black', linewidths=0.5)
         else:
-            ax.scatter(x, y, s=size, c=color, zorder=5, edgecolors='black', linewidths=0.5)
+            ax.scatter(x, y, s=size, c=c, zorder=5, edgecolors='black', linewidths=0.5)
         offset_y = 15 if '目標' not in name else -20
         ax.annotate(name, (x, y), textcoords="offset points", xytext=(12, offset_y),
                     fontsize=10, fontweight='bold' if 'ネクプロ' in name else 'normal',
-                    color=color)
+                    color=c)
 
     # Arrow from current to target
-    ax.annotate('', xy=(8.3, 8.8), xytext=(6.2, 7.7),
+    (x0, y0), (x1, y1) = d['arrow']
+    ax.annotate('', xy=(x1, y1), xytext=(x0, y0),
                 arrowprops=dict(arrowstyle='->', color=ACCENT, lw=2.5, linestyle='--'))
 
     ax.set_xlabel('機能深度（配信 + 分析 + 実行）→', fontsize=11, color=NAVY, fontweight='bold')
@@ -258,44 +698,38 @@ def chart_positioning_map1():
     ax.text(3, 1.5, '汎用ツール\n(低適合・低機能)', fontsize=8, color=GREY, ha='center', style='italic')
     ax.text(9, 1.5, 'グローバル専業\n(低適合・高機能)', fontsize=8, color=GREY, ha='center', style='italic')
 
-    save(fig, 'positioning_map1.png')
+    save(fig, out)
 
 
 # ========== Chart 6: Positioning Map 2 ==========
-def chart_positioning_map2():
+def chart_positioning_map2(data=None, out='positioning_map2.png'):
+    d = data or default_data()['positioning_map2']
     fig, ax = plt.subplots(figsize=(9, 7), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
-    companies = {
-        'Zoom Webinars': (3.0, 3.5, GREY),
-        'ON24': (8.5, 7.5, GREY),
-        'EventHub': (3.5, 4.5, LIGHT_BLUE),
-        'bizibl': (2.5, 3.0, LIGHT_BLUE),
-        'FanGrowth': (2.0, 2.5, LIGHT_BLUE),
-        'ネクプロ\n(現在)': (5.0, 5.0, BLUE),
-        'ネクプロ\n(目標)': (8.0, 3.5, ACCENT),
-    }
-
-    for name, (x, y, color) in companies.items():
+    for name, x, y, c in d['companies']:
+        c = palette_color(c)
         size = 220 if 'ネクプロ' in name else 150
         if 'ネクプロ' in name:
-            ax.scatter(x, y, s=size, c=color, zorder=5, marker='*' if '目標' in name else 'o',
+            ax.scatter(x, y, s=size, c=c, zorder=5, marker='*' if '目標' in name else 'o',
                        edgecolors='black', linewidths=0.5)
         else:
-            ax.scatter(x, y, s=size, c=color, zorder=5, edgecolors='black', linewidths=0.5)
+            ax.scatter(x, y, s=size, c=c, zorder=5, edgecolors='black', linewidths=0.5)
         offset_y = 15 if '目標' not in name else -20
         ax.annotate(name, (x, y), textcoords="offset points", xytext=(12, offset_y),
                     fontsize=10, fontweight='bold' if 'ネクプロ' in name else 'normal',
-                    color=color)
+                    color=c)
 
-    ax.annotate('', xy=(7.8, 3.7), xytext=(5.2, 4.8),
+    (x0, y0), (x1, y1) = d['arrow']
+    ax.annotate('', xy=(x1, y1), xytext=(x0, y0),
                 arrowprops=dict(arrowstyle='->', color=ACCENT, lw=2.5, linestyle='--'))
 
     # Sweet spot highlight
     from matplotlib.patches import Ellipse
-    ellipse = Ellipse((8.0, 3.5), 3.0, 2.5, alpha=0.08, color=ACCENT, zorder=1)
+    sx, sy = d['sweet_spot']
+    ellipse = Ellipse((sx, sy), 3.0, 2.5, alpha=0.08, color=ACCENT, zorder=1)
     ax.add_patch(ellipse)
-    ax.text(8.0, 2.0, 'Sweet Spot', fontsize=9, color=ACCENT, ha='center', fontweight='bold')
+    ax.text(sx, sy - 1.5, 'Sweet Spot', fontsize=9, color=ACCENT, ha='center', fontweight='bold')
 
     ax.set_xlabel('データ活用高度性（記録 → 示唆 → 自動実行）→', fontsize=11, color=NAVY, fontweight='bold')
     ax.set_ylabel('← 導入ハードル（低い方が良い）', fontsize=11, color=NAVY, fontweight='bold')
@@ -311,29 +745,24 @@ def chart_positioning_map2():
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
 
-    save(fig, 'positioning_map2.png')
+    save(fig, out)
 
 
 # ========== Chart 7: SaaS 3-Layer Structure ==========
-def chart_saas_layers():
+def chart_saas_layers(data=None, out='saas_layers.png'):
+    d = data or default_data()['saas_layers']
     fig, ax = plt.subplots(figsize=(10, 5.5), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
-    layers = [
-        ('AIエージェント層（実行）', 3.0, BLUE, WHITE, '価値増大 — 業務を自律実行'),
-        ('SaaS UIレイヤー（中間層）', 2.0, ACCENT_RED, WHITE, '圧縮対象 — ダッシュボード・ワークフロー'),
-        ('System of Record（データ層）', 1.0, NAVY, WHITE, '価値増大 — CRM・ERP・独自データ'),
-    ]
-
-    for label, y, color, text_color, desc in layers:
+    for label, y, c, text_color, desc in d['layers']:
         width = 6
-        rect = plt.Rectangle((2, y - 0.35), width, 0.7, facecolor=color, edgecolor='white',
+        rect = plt.Rectangle((2, y - 0.35), width, 0.7, facecolor=palette_color(c), edgecolor='white',
                               linewidth=2, zorder=3, alpha=0.9)
         ax.add_patch(rect)
         ax.text(5, y + 0.05, label, ha='center', va='center', fontsize=12,
-                fontweight='bold', color=text_color, zorder=4)
+                fontweight='bold', color=palette_color(text_color), zorder=4)
         ax.text(5, y - 0.2, desc, ha='center', va='center', fontsize=8,
-                color=text_color, alpha=0.85, zorder=4)
+                color=palette_color(text_color), alpha=0.85, zorder=4)
 
     # Squeeze arrows
     ax.annotate('', xy=(8.5, 2.35), xytext=(8.5, 2.7),
@@ -354,46 +783,17 @@ def chart_saas_layers():
     ax.set_title('AIエージェント時代のSaaS価値構造', fontsize=14, fontweight='bold', color=NAVY, pad=10)
     ax.axis('off')
 
-    save(fig, 'saas_layers.png')
+    save(fig, out)
 
 
 # ========== Chart 8: Roadmap Timeline ==========
-def chart_roadmap():
+def chart_roadmap(data=None, out='roadmap.png'):
+    d = data or default_data()['roadmap']
     fig, ax = plt.subplots(figsize=(12, 6), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
-    phases = [
-        ('短期 0-6M\n止血・改善', 0, 6, ACCENT_RED),
-        ('中期 6-18M\n転換・仕込み', 6, 12, ACCENT),
-        ('長期 18-36M\n成長・回収', 18, 18, BLUE),
-    ]
-
-    tracks = {
-        'プロダクト': [
-            ('エンゲージメントスコアMVP', 0, 6, NAVY),
-            ('AI コンテンツ生成', 4, 8, NAVY),
-            ('API-first移行', 6, 12, NAVY),
-            ('HubSpot/Marketo連携', 18, 8, NAVY),
-        ],
-        'GTM': [
-            ('業種別パッケージ', 0, 4, BLUE),
-            ('価格体系再設計', 6, 6, BLUE),
-            ('営業DX加速', 0, 18, BLUE),
-            ('ブランド・リポジショニング', 18, 12, BLUE),
-        ],
-        'CS': [
-            ('オンボーディング標準化', 0, 3, LIGHT_BLUE),
-            ('ヘルススコア導入', 2, 4, LIGHT_BLUE),
-            ('CS Profit Center化', 6, 8, LIGHT_BLUE),
-            ('戦略アカウント制', 0, 6, LIGHT_BLUE),
-        ],
-        '組織': [
-            ('PMM兼務設置', 0, 3, GREY),
-            ('RevOps設置', 3, 6, GREY),
-            ('戦略採用 3-5名', 6, 8, GREY),
-            ('KPIオーナー制度', 0, 1, GREY),
-        ],
-    }
+    phases = d['phases']
+    tracks = dict(d['tracks'])
 
     track_names = list(tracks.keys())
     y_positions = {name: i * 2.5 for i, name in enumerate(reversed(track_names))}
@@ -401,28 +801,28 @@ def chart_roadmap():
     # Phase backgrounds
     phase_y_min = -0.8
     phase_y_max = max(y_positions.values()) + 1.8
-    for label, start, duration, color in phases:
-        ax.axvspan(start, start + duration, alpha=0.06, color=color, zorder=0)
+    for label, start, duration, c in phases:
+        ax.axvspan(start, start + duration, alpha=0.06, color=palette_color(c), zorder=0)
         ax.text(start + duration/2, phase_y_max + 0.3, label,
-                ha='center', va='bottom', fontsize=9, fontweight='bold', color=color)
+                ha='center', va='bottom', fontsize=9, fontweight='bold', color=palette_color(c))
 
     # Track items
     for track_name, items in tracks.items():
         y = y_positions[track_name]
         ax.text(-1.5, y + 0.3, track_name, ha='right', va='center',
                 fontsize=11, fontweight='bold', color=NAVY)
-        for i, (item_label, start, duration, color) in enumerate(items):
+        for i, (item_label, start, duration, c) in enumerate(items):
             bar_y = y + (i % 2) * 0.6
-            ax.barh(bar_y, duration, left=start, height=0.45, color=color, alpha=0.7,
+            ax.barh(bar_y, duration, left=start, height=0.45, color=palette_color(c), alpha=0.7,
                     edgecolor='white', linewidth=1, zorder=3)
             text_x = start + duration / 2
             ax.text(text_x, bar_y, item_label, ha='center', va='center',
                     fontsize=7, color=WHITE, fontweight='bold', zorder=4)
 
     # Gate Review markers
-    for month, label in [(6, 'Gate\nReview'), (12, 'Gate\nReview'), (18, 'Gate\nReview')]:
+    for month in d['gates']:
         ax.axvline(x=month, color=ACCENT_RED, linestyle='--', alpha=0.4, zorder=1)
-        ax.text(month, phase_y_max - 0.3, label, ha='center', fontsize=7,
+        ax.text(month, phase_y_max - 0.3, 'Gate\nReview', ha='center', fontsize=7,
                 color=ACCENT_RED, fontweight='bold')
 
     ax.set_xlim(-2, 37)
@@ -436,11 +836,12 @@ def chart_roadmap():
     ax.spines['right'].set_visible(False)
     ax.spines['left'].set_visible(False)
 
-    save(fig, 'roadmap.png')
+    save(fig, out)
 
 
 # ========== Chart 9: KPI Tree ==========
-def chart_kpi_tree():
+def chart_kpi_tree(data=None, out='kpi_tree.png'):
+    d = data or default_data()['kpi_tree']
     fig, ax = plt.subplots(figsize=(11, 6.5), facecolor=BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
@@ -455,43 +856,20 @@ def chart_kpi_tree():
         ax.plot([x1, x2], [y1, y2], color=LIGHT_GREY, linewidth=1.5, zorder=2)
 
     # North Star
-    draw_box(5, 5.5, 'North Star\n顧客あたりエンゲージメント成果価値', ACCENT, w=4, h=0.7, fontsize=9)
+    draw_box(5, 5.5, d['north_star'], ACCENT, w=4, h=0.7, fontsize=9)
 
     # Level 2 - Business KPIs
-    biz_kpis = [
-        (1.5, 4.0, 'ARR成長率\n+27%→+40%→+52%'),
-        (4.2, 4.0, 'NRR\n100%→110%(仮説)'),
-        (6.8, 4.0, '粗利率'),
-        (9.5, 4.0, '顧客基盤\n167→210社'),
-    ]
-    for x, y, text in biz_kpis:
+    for x, y, text in d['biz_kpis']:
         draw_box(x, y, text, NAVY)
         draw_line(5, 5.15, x, 4.28)
 
-    # Level 3 - Leading KPIs
-    leading = [
-        (0.3, 2.5, 'MRR\n¥330M→¥527M'),
-        (2.3, 2.5, '新規MRR\n(長期PF)'),
-        (4.2, 2.5, 'Expansion\nMRR'),
-        (6.0, 2.5, 'Churn MRR\n解約率1.0%'),
-        (7.8, 2.5, 'ARPA\n¥169K→¥204K'),
-        (9.8, 2.5, '成約率\n12%→15%'),
-    ]
-    connections = [(0, 1.5), (1, 1.5), (2, 4.2), (3, 4.2), (4, 6.8), (5, 9.5)]
-    for i, (x, y, text) in enumerate(leading):
+    # Level 3 - Leading KPIs (last field: x of the parent business KPI)
+    for x, y, text, parent_x in d['leading']:
         draw_box(x, y, text, BLUE, w=1.7, h=0.55, fontsize=7)
-        parent_x = connections[i][1]
         draw_line(parent_x, 3.72, x, 2.78)
 
     # Level 4 - New Revenue
-    new_rev = [
-        (1.5, 1.2, '営業DX\n¥33M→¥327M'),
-        (4.0, 1.2, 'コンパウンド\n¥3M→¥51M'),
-        (7.0, 1.2, 'エンゲージメント\nスコア導入数'),
-        (9.5, 1.2, 'オンボード\n完了率90%'),
-    ]
-    new_connections = [(0, 1.5), (1, 1.5), (2, 9.5), (3, 9.5)]
-    for i, (x, y, text) in enumerate(new_rev):
+    for x, y, text in d['new_rev']:
         draw_box(x, y, text, LIGHT_BLUE, w=1.9, h=0.55, fontsize=7)
 
     ax.set_xlim(-1, 11)
@@ -499,40 +877,40 @@ def chart_kpi_tree():
     ax.set_title('KPIツリー構造', fontsize=14, fontweight='bold', color=NAVY, pad=10)
     ax.axis('off')
 
-    save(fig, 'kpi_tree.png')
+    save(fig, out)
 
 
 # ========== Chart 10: Account Trend ==========
-def chart_accounts():
-    fig, ax = plt.subplots(figsize=(10, 5), facecolor=BG_COLOR)
-    ax.set_facecolor(BG_COLOR)
+def chart_accounts(data=None, out='accounts.png'):
+    d = data or default_data()['accounts']
+    save(pooled_figure('accounts', d), out)
 
-    years = ['FY22', 'FY23', 'FY24', 'FY25(計画)', 'FY26(計画)', 'FY27(計画)']
-    long_term = [160, 151, 167, 179, 195, 210]
-    new_per_year = [60, 27, 50, 38, 38, 38]
 
-    x = np.arange(len(years))
+def _layout_accounts(n):
+    fig, ax = plt.subplots(figsize=(10, 5), facecolor=BG_COLOR)
+    ax.set_facecolor(BG_COLOR)
 
-    ax.bar(x, long_term, 0.5, color=NAVY, alpha=0.85, label='累計長期PFアカウント数', zorder=3)
+    x = np.arange(n)
+    zeros = np.zeros(n)
 
-    ax2 = ax.twinx()
-    ax2.plot(x, new_per_year, color=ACCENT, marker='D', markersize=7, linewidth=2,
-             label='年間新規獲得数', zorder=4)
+    art = {'ax': ax, 'x': x}
+    art['long_term'] = ax.bar(x, zeros, 0.5, color=NAVY, alpha=0.85, label='累計長期PFアカウント数',
+                              zorder=3)
 
-    for i, v in enumerate(long_term):
-        ax.annotate(f'{v}社', (x[i], v), textcoords="offset points",
-                    xytext=(0, 8), ha='center', fontsize=10, fontweight='bold', color=NAVY)
+    art['ax2'] = ax2 = ax.twinx()
+    art['new_per_year'], = ax2.plot(x, zeros, color=ACCENT, marker='D', markersize=7,
+                                    linewidth=2, label='年間新規獲得数', zorder=4)
 
-    for i, v in enumerate(new_per_year):
-        ax2.annotate(f'{v}社', (x[i], v), textcoords="offset points",
-                     xytext=(0, 10), ha='center', fontsize=9, color=ACCENT, fontweight='bold')
+    art['long_term_labels'] = [
+        ax.annotate('', (i, 0), textcoords="offset points", xytext=(0, 8), ha='center',
+                    fontsize=10, fontweight='bold', color=NAVY) for i in x]
+    art['new_labels'] = [
+        ax2.annotate('', (i, 0), textcoords="offset points", xytext=(0, 10), ha='center',
+                     fontsize=9, color=ACCENT, fontweight='bold') for i in x]
 
     ax.set_xticks(x)
-    ax.set_xticklabels(years, fontsize=9)
     ax.set_ylabel('累計アカウント数', color=NAVY, fontsize=10)
     ax2.set_ylabel('年間新規獲得数', color=ACCENT, fontsize=10)
-    ax.set_ylim(0, 260)
-    ax2.set_ylim(0, 80)
 
     ax.set_title('長期PFアカウント数推移', fontsize=14, fontweight='bold', color=NAVY, pad=15)
 
@@ -542,21 +920,220 @@ def chart_accounts():
 
     ax.grid(axis='y', alpha=0.3, zorder=0)
     ax.spines['top'].set_visible(False)
-
-    save(fig, 'accounts.png')
+    art['data'] = [*art['long_term'], art['new_per_year'], *art['long_term_labels'],
+                   *art['new_labels']]
+    return fig, art
+
+
+def _fill_accounts(art, d):
+    long_term = d['long_term']
+    new_per_year = d['new_per_year']
+
+    _set_bars(art['long_term'], long_term)
+    art['new_per_year'].set_ydata(new_per_year)
+    _set_labels(art['long_term_labels'], art['x'], long_term, [f'{v}社' for v in long_term])
+    _set_labels(art['new_labels'], art['x'], new_per_year, [f'{v}社' for v in new_per_year])
+
+    art['ax'].set_xticklabels(d['years'], fontsize=9)
+    art['ax'].set_ylim(*(d.get('ylim') or (0, max(long_term) * 1.24)))
+    art['ax2'].set_ylim(*(d.get('ylim2') or (0, max(new_per_year) * 1.33)))
+
+
+# ========== Chart Specs ==========
+# chart type -> (render function, default output file)
+CHARTS = {
+    'revenue_trend': (chart_revenue_trend, 'revenue_trend.png'),
+    'mrr_arpa': (chart_mrr_arpa, 'mrr_arpa.png'),
+    'new_revenue': (chart_new_revenue, 'new_revenue.png'),
+    'churn': (chart_churn, 'churn_rate.png'),
+    'positioning_map1': (chart_positioning_map1, 'positioning_map1.png'),
+    'positioning_map2': (chart_positioning_map2, 'positioning_map2.png'),
+    'saas_layers': (chart_saas_layers, 'saas_layers.png'),
+    'roadmap': (chart_roadmap, 'roadmap.png'),
+    'kpi_tree': (chart_kpi_tree, 'kpi_tree.png'),
+    'accounts': (chart_accounts, 'accounts.png'),
+}
+
+# chart type -> (layout, fill, data keys) for the charts drawn through
+# pooled_figure(); the data keys feed only the data layer (see BLIT), the other
+# keys of a chart's data are part of its background
+POOLED = {
+    'revenue_trend': (_layout_revenue_trend, _fill_revenue_trend,
+                      ('revenue', 'mrr', 'option_svc', 'yoy', 'yoy_alert', 'fan')),
+    'mrr_arpa': (_layout_mrr_arpa, _fill_mrr_arpa, ('mrr_annual', 'arpa', 'fan')),
+    'churn': (_layout_churn, _fill_churn, ('churn', 'colors')),
+    'accounts': (_layout_accounts, _fill_accounts, ('long_term', 'new_per_year')),
+}
+
+STYLE = {
+    'palette': [NAVY, BLUE, LIGHT_BLUE, ACCENT, ACCENT_RED, GREY, LIGHT_GREY, WHITE, BG_COLOR],
+    'dpi': DPI,
+}
+
+
+def make_specs(data=None, charts=None, prefix='', fmt='png', scenario=PLAN, fan=None):
+    """Build one spec per chart type.
+
+    A spec is a plain dict {'chart': type, 'out': file under OUT_DIR, 'data': {...},
+    'format': 'png' | 'svg'}, so batches can be stored as JSON or sent to worker
+    processes as-is.
+    data: {chart type: data} overriding chart_data.json per chart (shallow merge;
+        fields derived from an overridden series are recomputed, see
+        scenario_store.rederive)
+    prefix: sub-directory of OUT_DIR for this batch (e.g. a scenario name)
+    fmt: 'svg' also writes a vector copy next to each PNG (see VECTOR)
+    scenario: scenario store scenario the default series are read from
+    fan: Monte Carlo band prefix (e.g. 'mc') for fan overlays on the time-series charts
+    """
+    base = default_data(scenario, fan)
+    data = data or {}
+    specs = []
+    for chart in charts or CHARTS:
+        if chart not in CHARTS:
+            raise ValueError(f'unknown chart type: {chart}')
+        merged = rederive(chart, dict(base[chart], **data.get(chart, {})),
+                          data.get(chart, {}), open_store(), scenario)
+        specs.append({'chart': chart, 'out': os.path.join(prefix, CHARTS[chart][1]),
+                      'data': merged, 'format': fmt})
+    return specs
+
+
+def load_specs(path, charts=None, fmt='png', scenario=PLAN, fan=None):
+    """Specs from a data file.
+
+    The file is either {chart type: data} for a single deck, or
+    {'scenarios': [{'name': ..., 'charts': {chart type: data}}, ...]} where each
+    scenario renders into OUT_DIR/<name>/. A scenario's optional 'scenario'
+    names the scenario store series it starts from, 'fan' the Monte Carlo
+    bands drawn over it (default: the scenario and fan arguments).
+    """
+    doc = load_data(path)
+    if 'scenarios' not in doc:
+        return make_specs(doc, charts, fmt=fmt, scenario=scenario, fan=fan)
+    specs = []
+    for sc in doc['scenarios']:
+        specs.extend(make_specs(sc.get('charts'), charts, prefix=sc['name'], fmt=fmt,
+                                scenario=sc.get('scenario', scenario), fan=sc.get('fan', fan)))
+    return specs
+
+
+def spec_key(spec):
+    """Cache key: chart type and data, render code, style and render params."""
+    fmt = spec.get('format', 'png')
+    font = jp_font()
+    return make_key(spec['chart'], spec['data'], _source_fingerprint(), STYLE, font,
+                    JP_FONT_PATH, _matplotlib_version(), fmt,
+                    SVG_FALLBACK_DPI if fmt == 'svg' else DPI)
+
+
+_source_key = None
+
+
+def _source_fingerprint():
+    """Hash of this whole module: besides the chart functions, the shared helpers
+    (labels, fans, save paths), palette and rcParams shape every chart.
+    Computed once per process."""
+    global _source_key
+    if _source_key is None:
+        with open(__file__, encoding='utf-8') as f:
+            _source_key = make_key(f.read())
+    return _source_key
+
+
+def _matplotlib_version():
+    # package metadata, so computing a cache key does not import matplotlib
+    from importlib.metadata import version
+    return version('matplotlib')
 
 
 # ========== Generate All ==========
+def _init_worker():
+    """Per-worker warm-up: import matplotlib and load the JP font glyphs once."""
+    setup_matplotlib()
+    fig = plt.figure(figsize=(1, 1))
+    fig.text(0, 0, 'ネクプロ 売上推移 ¥0M')
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _run_spec(spec, cache_dir=None):
+    """Render one spec. Returns a result dict instead of raising.
+
+    With cache_dir set, a cache hit copies the stored PNG (and SVG) into OUT_DIR
+    and skips building the figure entirely; a miss renders and then stores the result.
+    """
+    global VECTOR
+    start = time.perf_counter()
+    cached = False
+    out = spec['out']
+    VECTOR = spec.get('format', 'png') == 'svg'
+    try:
+        func = CHARTS[spec['chart']][0]
+        with stage(f'chart:{spec["chart"]}') as st:
+            if cache_dir:
+                cache = ChartCache(cache_dir)
+                key = spec_key(spec)
+                dest = os.path.join(OUT_DIR, out)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                files = [(dest, '.png')]
+                if VECTOR:
+                    files.append((svg_path(dest), '.svg'))
+                cached = all(cache.fetch(key, d, ext) for d, ext in files)
+                if cached:
+                    print(f'  Cached: {out}')
+                else:
+                    setup_matplotlib()
+                    func(spec['data'], out)
+                    for d, ext in files:
+                        cache.store(key, d, ext)
+            else:
+                setup_matplotlib()
+                func(spec['data'], out)
+            st.counts['cached'] = int(cached)
+        return {'chart': spec['chart'], 'out': out, 'ok': True, 'cached': cached,
+                'seconds': time.perf_counter() - start, 'error': None}
+    except Exception:
+        if plt is not None:
+            plt.close('all')
+        return {'chart': spec['chart'], 'out': out, 'ok': False, 'cached': cached,
+                'seconds': time.perf_counter() - start, 'error': traceback.format_exc()}
+
+
+def render_specs(specs, workers=1, cache_dir=None):
+    """Render a batch of specs, in a process pool when workers > 1.
+
+    workers: pool size; 0 or None means os.cpu_count()
+    cache_dir: chart cache root (None disables the cache)
+    Returns per-spec result dicts in input order.
+    """
+    if not workers:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(specs))
+
+    if workers <= 1:
+        return [_run_spec(spec, cache_dir) for spec in specs]
+
+    jp_font()  # resolve (and persist) once here rather than in every worker
+    results = [None] * len(specs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_run_spec, spec, cache_dir): i for i, spec in enumerate(specs)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception:
+                # worker died (e.g. BrokenProcessPool) — record and keep going
+                results[i] = {'chart': specs[i]['chart'], 'out': specs[i]['out'], 'ok': False,
+                              'cached': False, 'seconds': 0.0, 'error': traceback.format_exc()}
+    return results
+
+
+def render_all(charts=None, workers=1, cache_dir=None, fmt='png'):
+    """Render the default deck charts (chart_data.json)."""
+    return render_specs(make_specs(charts=charts, fmt=fmt), workers=workers,
+                        cache_dir=cache_dir)
+
+
 if __name__ == '__main__':
-    print('Generating charts...')
-    chart_revenue_trend()
-    chart_mrr_arpa()
-    chart_new_revenue()
-    chart_churn()
-    chart_positioning_map1()
-    chart_positioning_map2()
-    chart_saas_layers()
-    chart_roadmap()
-    chart_kpi_tree()
-    chart_accounts()
-    print(f'All charts saved to {OUT_DIR}/')
+    import nexpro
+    sys.exit(nexpro.main(['charts'] + sys.argv[1:]))
@@ -2,18 +2,50 @@
 ネクプロ全社戦略プレゼンテーション pptx生成スクリプト
 株主総会・経営会議品質 — 白ベース×紺/グレー、游ゴシック指定
 """
+import pptx
 from pptx import Presentation
 from pptx.util import Inches, Pt, Emu
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
-from pptx.enum.chart import XL_CHART_TYPE
+from pptx.enum.chart import XL_CHART_TYPE, XL_LABEL_POSITION, XL_LEGEND_POSITION, XL_MARKER_STYLE
+from pptx.enum.dml import MSO_LINE_DASH_STYLE
+from pptx.chart.axis import ValueAxis
+from pptx.chart.data import CategoryChartData
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part
+from pptx.parts.image import ImagePart
+from lxml import etree
+import copy
+import csv
+import hashlib
+import inspect
+import io
+import json
+import math
 import os
+import pickle
+import re
+import sys
+import time
+import unicodedata
+import weakref
+from xml.sax.saxutils import escape as xml_escape
+
+from chart_cache import ChartCache, DEFAULT_CACHE_DIR, make_key
+from image_opt import optimize_image
+from media_store import MediaStore
+from profiling import stage
+from pptx_stream import StreamingDeckWriter
+from scenario_store import ACTUAL, PLAN, fill_chart_data, open_store, rederive
 
 # ==================================================================
 # Constants
 # ==================================================================
-CHART_DIR = '/home/user/nexpro/chart_images'
+DEFAULT_CHART_DIR = '/home/user/nexpro/chart_images'
+CHART_DIR = DEFAULT_CHART_DIR
 OUT_PATH = '/home/user/nexpro/nexpro_strategy_presentation.pptx'
 
 FONT_JP = '游ゴシック'
@@ -35,23 +67,82 @@ TABLE_ROW_ALT = RGBColor(0xF0, 0xF4, 0xF8)
 SLIDE_W = Inches(13.333)
 SLIDE_H = Inches(7.5)
 
-prs = Presentation()
-prs.slide_width = SLIDE_W
-prs.slide_height = SLIDE_H
+_template_cache = {}
+
+
+def new_presentation(template=None):
+    """Fresh 16:9 Presentation. The template file is read and kept in memory once
+    per process, so batch builds only pay for parsing the package."""
+    if template not in _template_cache:
+        # None = python-pptx's bundled default template
+        template_path = template or os.path.join(os.path.dirname(pptx.__file__),
+                                                 'templates', 'default.pptx')
+        with open(template_path, 'rb') as f:
+            _template_cache[template] = f.read()
+    p = Presentation(io.BytesIO(_template_cache[template]))
+    p.slide_width = SLIDE_W
+    p.slide_height = SLIDE_H
+    return p
+
+
+prs = None  # the deck being built; set by build_deck
+
+# Streaming output: finished slides are written to the output file and
+# released while the deck is built (see pptx_stream), so memory stays flat.
+STREAM = False
+_writer = None
+
+
+def flush_slides():
+    """Write the slides finished so far when streaming; no-op otherwise."""
+    if _writer is not None:
+        _writer.flush()
+
+# Chrome cloning: shared shapes (background, header bar, bottom bar, slide
+# number, title) are built once with the python-pptx API, kept as XML
+# prototypes and deep-copied onto later slides. Output is identical.
+CLONE_CHROME = False
+_chrome = {}
+
+
+def _stamp(slide, key, build, text=None):
+    """Add a chrome shape to slide, cloning the prototype cached under key.
+
+    build(slide) creates the shape the first time; text replaces the first
+    run's text of the clone (for titles and slide numbers).
+    """
+    if not CLONE_CHROME:
+        return build(slide)
+    proto = _chrome.get(key)
+    if proto is None:
+        shape = build(slide)
+        _chrome[key] = copy.deepcopy(shape._element)
+        return shape
+    el = copy.deepcopy(proto)
+    shape_id = slide.shapes._next_shape_id
+    c_nv_pr = el.xpath('./*[1]/p:cNvPr')[0]
+    c_nv_pr.set('id', str(shape_id))
+    c_nv_pr.set('name', f'{c_nv_pr.get("name").rsplit(" ", 1)[0]} {shape_id - 1}')
+    if text is not None:
+        el.xpath('.//a:t')[0].text = text
+    slide.shapes._spTree.append(el)
+    return el
 
 
-# ==================================================================
-# Helper Functions
-# ==================================================================
 def add_slide():
     """Add a blank slide."""
     layout = prs.slide_layouts[6]  # blank
     slide = prs.slides.add_slide(layout)
     # White background
+    if CLONE_CHROME and 'bg' in _chrome:
+        slide._element.cSld.insert(0, copy.deepcopy(_chrome['bg']))
+        return slide
     bg = slide.background
     fill = bg.fill
     fill.solid()
     fill.fore_color.rgb = WHITE
+    if CLONE_CHROME:
+        _chrome['bg'] = copy.deepcopy(slide._element.cSld.bg)
     return slide
 
 
@@ -106,45 +197,54 @@ def add_multiline_textbox(slide, left, top, width, height, lines,
 
 
 def add_accent_bar(slide, left, top, width=Inches(0.08), height=Inches(0.6), color=ACCENT):
-    shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
-    shape.fill.solid()
-    shape.fill.fore_color.rgb = color
-    shape.line.fill.background()
-    return shape
+    def build(slide):
+        shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
+        shape.fill.solid()
+        shape.fill.fore_color.rgb = color
+        shape.line.fill.background()
+        return shape
+    return _stamp(slide, ('accent_bar', left, top, width, height, str(color)), build)
 
 
 def add_bottom_bar(slide):
     """Add bottom navy bar with copyright."""
-    bar = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE,
-                                  Inches(0), Inches(7.0), SLIDE_W, Inches(0.5))
-    bar.fill.solid()
-    bar.fill.fore_color.rgb = NAVY
-    bar.line.fill.background()
-    tf = bar.text_frame
-    tf.word_wrap = False
-    p = tf.paragraphs[0]
-    p.alignment = PP_ALIGN.RIGHT
-    run = p.add_run()
-    run.text = 'CONFIDENTIAL  |  NexPro Inc.  |  2026'
-    set_font(run, size=8, color=WHITE)
+    def build(slide):
+        bar = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE,
+                                      Inches(0), Inches(7.0), SLIDE_W, Inches(0.5))
+        bar.fill.solid()
+        bar.fill.fore_color.rgb = NAVY
+        bar.line.fill.background()
+        tf = bar.text_frame
+        tf.word_wrap = False
+        p = tf.paragraphs[0]
+        p.alignment = PP_ALIGN.RIGHT
+        run = p.add_run()
+        run.text = 'CONFIDENTIAL  |  NexPro Inc.  |  2026'
+        set_font(run, size=8, color=WHITE)
+        return bar
+    return _stamp(slide, 'bottom_bar', build)
 
 
 def add_slide_number(slide, num, total=20):
-    add_textbox(slide, Inches(12.5), Inches(7.05), Inches(0.7), Inches(0.35),
-                f'{num}/{total}', size=8, color=WHITE, alignment=PP_ALIGN.RIGHT)
+    text = f'{num}/{total}'
+    return _stamp(slide, 'slide_number', lambda slide: add_textbox(
+        slide, Inches(12.5), Inches(7.05), Inches(0.7), Inches(0.35),
+        text, size=8, color=WHITE, alignment=PP_ALIGN.RIGHT), text=text)
 
 
-def add_header(slide, title, subtitle=None, slide_num=None):
+def add_header(slide, title, subtitle=None, slide_num=None, total=20):
     """Standard slide header with accent bar."""
     add_accent_bar(slide, Inches(0.6), Inches(0.4), Inches(0.07), Inches(0.55))
-    add_textbox(slide, Inches(0.8), Inches(0.35), Inches(10), Inches(0.6),
-                title, size=24, bold=True, color=NAVY)
+    _stamp(slide, 'header_title', lambda slide: add_textbox(
+        slide, Inches(0.8), Inches(0.35), Inches(10), Inches(0.6),
+        title, size=24, bold=True, color=NAVY), text=title)
     if subtitle:
-        add_textbox(slide, Inches(0.85), Inches(0.95), Inches(10), Inches(0.4),
-                    subtitle, size=13, bold=False, color=GREY, italic=True)
+        _stamp(slide, 'header_subtitle', lambda slide: add_textbox(
+            slide, Inches(0.85), Inches(0.95), Inches(10), Inches(0.4),
+            subtitle, size=13, bold=False, color=GREY, italic=True), text=subtitle)
     add_bottom_bar(slide)
     if slide_num:
-        add_slide_number(slide, slide_num)
+        add_slide_number(slide, slide_num, total)
 
 
 def add_key_message_box(slide, text, left=Inches(0.8), top=Inches(1.4),
@@ -167,6 +267,10 @@ def add_key_message_box(slide, text, left=Inches(0.8), top=Inches(1.4),
 
 
 def add_image(slide, img_name, left, top, width=None, height=None):
+    if CHART_BACKEND == 'native' and img_name in NATIVE_CHARTS:
+        build, aspect, _ = NATIVE_CHARTS[img_name]
+        width = width or Emu(int(height / aspect))
+        return build(slide, left, top, width, height or Emu(int(width * aspect)))
     path = os.path.join(CHART_DIR, img_name)
     if os.path.exists(path):
         kwargs = {'left': left, 'top': top}
@@ -174,51 +278,538 @@ def add_image(slide, img_name, left, top, width=None, height=None):
             kwargs['width'] = width
         if height:
             kwargs['height'] = height
-        slide.shapes.add_picture(path, **kwargs)
+        if IMAGE_DPI:
+            # resample to the placed size and reduce colours (see image_opt)
+            path, _ = optimize_image(path, width, height, dpi=IMAGE_DPI,
+                                     source_key=MEDIA_STORE and MEDIA_STORE.sha1(path))
+        elif MEDIA_STORE is not None:
+            path = MEDIA_STORE.open(path)
+        pic = slide.shapes.add_picture(path, **kwargs)
+        svg = os.path.splitext(os.path.join(CHART_DIR, img_name))[0] + '.svg'
+        if SVG_CHARTS and os.path.exists(svg):
+            if MEDIA_STORE is not None:
+                blob = MEDIA_STORE.read(svg)
+            else:
+                with open(svg, 'rb') as f:
+                    blob = f.read()
+            _attach_svg(pic, _add_svg_part(slide, blob))
+        return pic
 
 
-def make_table(slide, left, top, width, height, rows, cols, data,
-               col_widths=None, header_color=TABLE_HEADER_BG, font_size=9):
-    """Create a styled table. data is list of lists."""
-    table_shape = slide.shapes.add_table(rows, cols, left, top, width, height)
-    table = table_shape.table
+def _add_svg_part(slide, blob):
+    """Relate slide to the SVG media part holding blob; returns the rId.
 
-    if col_widths:
-        for i, w in enumerate(col_widths):
-            table.columns[i].width = w
+    Like python-pptx's image parts, each distinct SVG is one part per package
+    (keyed by SHA-1), however many slides place it.
+    """
+    package = slide.part.package
+    parts = _svg_parts.setdefault(package, {})
+    sha1 = hashlib.sha1(blob).hexdigest()
+    part = parts.get(sha1)
+    if part is None:
+        part = parts[sha1] = Part(package.next_partname('/ppt/media/image%d.svg'),
+                                  'image/svg+xml', package, blob)
+    return slide.part.relate_to(part, RT.IMAGE)
+
+
+def _attach_svg(pic, r_id):
+    """Point pic's blip at the SVG part r_id (Office 2016+ svgBlip extension)."""
+    pic._element.blipFill.blip.append(parse_xml(
+        f'<a:extLst {nsdecls("a")}><a:ext uri="{SVG_BLIP_EXT}">'
+        f'<asvg:svgBlip xmlns:asvg="{SVG_NS}" {nsdecls("r")} r:embed="{r_id}"/>'
+        '</a:ext></a:extLst>'))
+
+
+def _xml_text(value):
+    """Escape text for <a:t> the way python-pptx's run.text does."""
+    return re.sub(r'([\x00-\x08\x0B-\x1F])', lambda m: '_x%04X_' % ord(m.group(1)),
+                  xml_escape(value))
 
+
+def _cell_style(size, bold, color, fill):
+    """(rPr, tcPr) XML fragments shared by every cell of one row class."""
+    rpr = (f'<a:rPr sz="{int(size * 100)}" b="{int(bold)}" i="0"><a:solidFill>'
+           f'<a:srgbClr val="{color}"/></a:solidFill><a:latin typeface="{FONT_JP}"/></a:rPr>')
+    tcpr = (f'<a:tcPr anchor="ctr" marL="{Pt(4)}" marR="{Pt(4)}" marT="{Pt(2)}" marB="{Pt(2)}">'
+            f'<a:solidFill><a:srgbClr val="{fill}"/></a:solidFill></a:tcPr>')
+    return rpr, tcpr
+
+
+def make_table(slide, left, top, width, height, rows, cols, data,
+               col_widths=None, header_color=TABLE_HEADER_BG, font_size=9,
+               row_heights=None):
+    """Create a styled table. data is list of lists.
+    row_heights: per-row heights (EMU); default splits height evenly.
+
+    The <a:tbl> body is written as one XML string from per-row-class style
+    fragments (header / even / odd) and parsed once, instead of styling each
+    cell through python-pptx. Output matches the cell-by-cell API exactly.
+    """
+    table_shape = slide.shapes.add_table(1, cols, left, top, width, height)
+
+    widths = [width // cols] * (cols - 1) + [width - (cols - 1) * (width // cols)]
+    for i, w in enumerate((col_widths or [])[:cols]):
+        widths[i] = w
+    if row_heights:
+        heights = list(row_heights)
+    else:
+        row_h = height // rows
+        heights = [row_h] * (rows - 1) + [height - (rows - 1) * row_h]
+
+    styles = {
+        'header': _cell_style(font_size, True, WHITE, header_color),
+        'even': _cell_style(font_size, False, DARK_GREY, TABLE_ROW_ALT),
+        'odd': _cell_style(font_size, False, DARK_GREY, WHITE),
+    }
+    ppr = ('<a:pPr algn="l"/>',) + ('<a:pPr algn="ctr"/>',) * (cols - 1)
+
+    parts = [f'<a:tbl {nsdecls("a")}><a:tblPr firstRow="1" bandRow="1">'
+             f'<a:tableStyleId>{{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}}</a:tableStyleId>'
+             f'</a:tblPr><a:tblGrid>']
+    parts.extend(f'<a:gridCol w="{w}"/>' for w in widths)
+    parts.append('</a:tblGrid>')
     for r in range(rows):
+        rpr, tcpr = styles['header' if r == 0 else 'even' if r % 2 == 0 else 'odd']
+        row = data[r] if r < len(data) else ()
+        parts.append(f'<a:tr h="{heights[r]}">')
         for c in range(cols):
-            cell = table.cell(r, c)
-            cell.text = ''
-            p = cell.text_frame.paragraphs[0]
-            p.alignment = PP_ALIGN.CENTER if c > 0 else PP_ALIGN.LEFT
-            run = p.add_run()
-            run.text = str(data[r][c]) if r < len(data) and c < len(data[r]) else ''
+            text = _xml_text(str(row[c])) if c < len(row) else ''
+            parts.append(f'<a:tc><a:txBody><a:bodyPr/><a:lstStyle/><a:p>{ppr[c]}<a:r>{rpr}'
+                         f'<a:t>{text}</a:t></a:r></a:p></a:txBody>{tcpr}</a:tc>')
+        parts.append('</a:tr>')
+    parts.append('</a:tbl>')
+
+    old_tbl = table_shape._element.graphic.graphicData.tbl
+    old_tbl.getparent().replace(old_tbl, parse_xml(''.join(parts)))
+    if col_widths:
+        table_shape.width = Emu(sum(widths))
+    return table_shape
 
-            if r == 0:  # header
-                cell.fill.solid()
-                cell.fill.fore_color.rgb = header_color
-                set_font(run, size=font_size, bold=True, color=WHITE)
-            else:
-                if r % 2 == 0:
-                    cell.fill.solid()
-                    cell.fill.fore_color.rgb = TABLE_ROW_ALT
-                else:
-                    cell.fill.solid()
-                    cell.fill.fore_color.rgb = WHITE
-                set_font(run, size=font_size, bold=False, color=DARK_GREY)
 
-            # vertical alignment
-            cell.vertical_anchor = MSO_ANCHOR.MIDDLE
+def _text_em(text):
+    """Rendered width of text in em: full-width (CJK) chars 1.0, others ~0.55."""
+    return sum(1.0 if unicodedata.east_asian_width(ch) in 'WFA' else 0.55 for ch in text)
+
+
+def estimate_row_height(cells, col_widths, font_size):
+    """Estimated height (EMU) of a table row once PowerPoint wraps its text.
+
+    Uses the make_table cell margins (4pt left/right, 2pt top/bottom) and
+    1.2 line spacing.
+    """
+    lines = 1
+    for text, w in zip(cells, col_widths):
+        usable_pt = max(w / 12700 - 8, font_size)
+        n = sum(max(1, math.ceil(_text_em(seg) * font_size / usable_pt))
+                for seg in str(text).split('\n'))
+        lines = max(lines, n)
+    return Pt(lines * font_size * 1.2 + 4)
+
+
+def paginate_rows(rows, col_widths, font_size, max_height, header):
+    """Split an iterable of rows into pages that fit max_height under the header.
+
+    Yields (page_rows, row_heights) one page at a time, so rows can come from
+    a stream (e.g. a CSV reader) and only one page is held in memory. A row
+    taller than a whole page gets a page of its own.
+    """
+    header_h = estimate_row_height(header, col_widths, font_size)
+    budget = max_height - header_h
+    page, heights, used = [], [], 0
+    for row in rows:
+        h = estimate_row_height(row, col_widths, font_size)
+        if page and used + h > budget:
+            yield page, heights
+            page, heights, used = [], [], 0
+        page.append(row)
+        heights.append(h)
+        used += h
+    if page:
+        yield page, heights
+
+
+def add_paginated_table(title, header, rows, col_widths, font_size=8,
+                        left=Inches(0.3), top=Inches(1.5), max_height=Inches(5.3),
+                        subtitle=None, slide_num=None, total=20):
+    """Table over as many slides as needed, repeating the header row.
+
+    rows may be any iterable (consumed lazily). Each page gets its own slide
+    with the standard header; title gets a （続き） suffix after the first page.
+    slide_num numbers the first page; later pages continue from it.
+    Returns the number of slides added.
+    """
+    col_widths = list(col_widths)
+    header_h = estimate_row_height(header, col_widths, font_size)
+    pages = 0
+    for page_rows, heights in paginate_rows(rows, col_widths, font_size, max_height, header):
+        slide = add_slide()
+        add_header(slide, title if pages == 0 else f'{title}（続き）', subtitle,
+                   slide_num + pages if slide_num else None, total)
+        make_table(slide, left, top, Emu(sum(col_widths)), Emu(header_h + sum(heights)),
+                   len(page_rows) + 1, len(header), [header] + page_rows,
+                   col_widths=col_widths, font_size=font_size,
+                   row_heights=[header_h] + heights)
+        pages += 1
+        flush_slides()
+    return pages
+
+
+def slide_appendix_table(path, title='Appendix：アカウント一覧', font_size=8):
+    """Paginated appendix slides from a CSV (first row = header), streamed."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        usable = Inches(12.7)
+        col_widths = [usable // len(header)] * len(header)
+        return add_paginated_table(title, header, reader, col_widths, font_size=font_size)
 
-            # margins
-            cell.margin_left = Pt(4)
-            cell.margin_right = Pt(4)
-            cell.margin_top = Pt(2)
-            cell.margin_bottom = Pt(2)
 
-    return table_shape
+# ==================================================================
+# Native Charts
+# ==================================================================
+# CHART_BACKEND = 'native' replaces the PNG charts below with editable
+# PowerPoint charts built from the same chart_data.json as generate_charts.py.
+CHART_BACKEND = 'png'
+IMAGE_DPI = None  # e.g. 150: resample PNG charts to their placed size at this DPI
+MEDIA_STORE = None  # MediaStore shared by the decks of a batch (see build_batch)
+# SVG_CHARTS: where generate_charts wrote <chart>.svg (charts --svg), embed it
+# as the picture's vector image; the PNG stays as the fallback for viewers
+# without SVG support (PowerPoint 2016 and older, LibreOffice < 7.x).
+SVG_CHARTS = False
+SVG_BLIP_EXT = '{96DAC541-7B7A-43D3-8B79-37D633B846F1}'
+SVG_NS = 'http://schemas.microsoft.com/office/drawing/2016/SVG/main'
+_svg_parts = weakref.WeakKeyDictionary()  # package -> {sha1: SVG part} (see _add_svg_part)
+CHART_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chart_data.json')
+CHART_DATA = {}   # per-deck overrides: {chart type: data}, shallow-merged over the file
+SCENARIO = PLAN   # scenario store scenario the slide figures and native charts read
+_chart_data_file = {}  # scenario -> chart_data.json filled from the scenario store
+_chart_data_stamp = None  # (store digest, chart_data.json mtime) of _chart_data_file
+
+
+def chart_data(chart):
+    global _chart_data_stamp
+    store = open_store()
+    stamp = (store.digest, os.stat(CHART_DATA_PATH).st_mtime_ns)
+    if stamp != _chart_data_stamp:
+        _chart_data_file.clear()
+        _chart_data_stamp = stamp
+    if SCENARIO not in _chart_data_file:
+        with open(CHART_DATA_PATH, encoding='utf-8') as f:
+            _chart_data_file[SCENARIO] = fill_chart_data(json.load(f), store, SCENARIO)
+    override = CHART_DATA.get(chart, {})
+    return rederive(chart, dict(_chart_data_file[SCENARIO][chart], **override), override,
+                    store, SCENARIO)
+
+
+def plan_values(metric, *periods):
+    """Scenario store values of metric for periods (see scenario_store.METRICS for units)."""
+    return open_store().require(metric, SCENARIO, list(periods))
+
+
+def actual_values(metric, *periods):
+    """Actuals of metric for periods where the store has them (kpi_engine /
+    ingest_actuals series loaded with `nexpro.py store`), plan_values elsewhere."""
+    actual = open_store().series(metric, ACTUAL, list(periods)).tolist()
+    missing = [p for p, v in zip(periods, actual) if math.isnan(v)]
+    plan = dict(zip(missing, plan_values(metric, *missing))) if missing else {}
+    return [plan[p] if math.isnan(v) else v for p, v in zip(periods, actual)]
+
+
+def yen_m(thousands):
+    """千円 -> '¥1,382M', truncated like the plan documents."""
+    return f'¥{int(thousands // 1000):,}M'
+
+
+def pct_change(a, b):
+    return f'{(b / a - 1) * 100:+.0f}%'
+
+
+def _combo_chart(slide, left, top, width, height, categories, bars, lines,
+                 secondary=False, title=None):
+    """Clustered column chart with line series overlaid.
+
+    bars / lines: list of (name, values, color). All series go into one chart
+    workbook; the line series are then moved into a c:lineChart, on a
+    secondary value axis (right side) when secondary is True.
+    """
+    cd = CategoryChartData()
+    cd.categories = categories
+    for name, values, _ in bars + lines:
+        cd.add_series(name, values)
+    chart = slide.shapes.add_chart(XL_CHART_TYPE.COLUMN_CLUSTERED,
+                                   left, top, width, height, cd).chart
+
+    plot_area = chart._chartSpace.chart.plotArea
+    bar_chart = plot_area.find(qn('c:barChart'))
+    bar_ax = [el.get('val') for el in bar_chart.findall(qn('c:axId'))]
+    if lines:
+        sers = bar_chart.findall(qn('c:ser'))[len(bars):]
+        ax_ids = ('60001', '60002') if secondary else bar_ax
+        line_chart = parse_xml(
+            f'<c:lineChart {nsdecls("c")}><c:grouping val="standard"/>'
+            f'<c:varyColors val="0"/><c:marker val="1"/>'
+            f'<c:axId val="{ax_ids[0]}"/><c:axId val="{ax_ids[1]}"/></c:lineChart>')
+        for i, ser in enumerate(sers):
+            inv = ser.find(qn('c:invertIfNegative'))
+            if inv is not None:
+                ser.remove(inv)
+            line_chart.insert(2 + i, ser)
+        bar_chart.addnext(line_chart)
+        if secondary:
+            last_ax = plot_area.findall(qn('c:valAx'))[-1]
+            last_ax.addnext(parse_xml(
+                f'<c:valAx {nsdecls("c")}><c:axId val="60002"/><c:scaling>'
+                f'<c:orientation val="minMax"/></c:scaling><c:delete val="0"/>'
+                f'<c:axPos val="r"/><c:numFmt formatCode="General" sourceLinked="1"/>'
+                f'<c:majorTickMark val="out"/><c:minorTickMark val="none"/>'
+                f'<c:tickLblPos val="nextTo"/><c:crossAx val="60001"/>'
+                f'<c:crosses val="max"/><c:crossBetween val="between"/></c:valAx>'))
+            last_ax.addnext(parse_xml(
+                f'<c:catAx {nsdecls("c")}><c:axId val="60001"/><c:scaling>'
+                f'<c:orientation val="minMax"/></c:scaling><c:delete val="1"/>'
+                f'<c:axPos val="b"/><c:majorTickMark val="none"/><c:minorTickMark val="none"/>'
+                f'<c:tickLblPos val="nextTo"/><c:crossAx val="60002"/>'
+                f'<c:crosses val="autoZero"/><c:auto val="1"/><c:lblAlgn val="ctr"/>'
+                f'<c:lblOffset val="100"/><c:noMultiLvlLbl val="0"/></c:catAx>'))
+
+    chart.font.size = Pt(9)
+    chart.font.name = FONT_JP
+    chart.font.color.rgb = DARK_GREY
+    if title:
+        chart.has_title = True
+        tf = chart.chart_title.text_frame
+        tf.text = title
+        set_font(tf.paragraphs[0].runs[0], size=14, bold=True, color=NAVY)
+    chart.has_legend = True
+    chart.legend.position = XL_LEGEND_POSITION.TOP
+    chart.legend.include_in_layout = False
+
+    bar_plot = chart.plots[0]
+    bar_plot.gap_width = 60
+    bar_plot.overlap = 0
+    for ser, (_, _, color) in zip(bar_plot.series, bars):
+        ser.format.fill.solid()
+        ser.format.fill.fore_color.rgb = color
+    if lines:
+        for ser, (_, _, color) in zip(chart.plots[1].series, lines):
+            ser.smooth = False
+            ser.format.line.color.rgb = color
+            ser.format.line.width = Pt(2.5)
+            ser.marker.style = XL_MARKER_STYLE.CIRCLE
+            ser.marker.size = 8
+            ser.marker.format.fill.solid()
+            ser.marker.format.fill.fore_color.rgb = color
+            ser.marker.format.line.color.rgb = color
+
+    va = chart.value_axis
+    va.has_major_gridlines = True
+    va.major_gridlines.format.line.color.rgb = LIGHT_GREY
+    va.format.line.fill.background()
+    return chart
+
+
+def _value_labels(series, fmt, color, size=9, bold=True, position=XL_LABEL_POSITION.OUTSIDE_END):
+    dl = series.data_labels
+    dl.number_format = fmt
+    dl.number_format_is_linked = False
+    dl.show_value = True
+    dl.position = position
+    dl.font.size = Pt(size)
+    dl.font.bold = bold
+    dl.font.color.rgb = color
+
+
+def _axis_range(axis, lim):
+    if lim:
+        axis.minimum_scale, axis.maximum_scale = lim
+
+
+def native_revenue_trend(slide, left, top, width, height):
+    d = chart_data('revenue_trend')
+    chart = _combo_chart(slide, left, top, width, height, d['years'],
+                         [('MRR（システム利用料）', d['mrr'], NAVY),
+                          ('オプション+新規事業', d['option_svc'], LIGHT_BLUE)],
+                         [('売上総合計', d['revenue'], ACCENT)],
+                         title=d.get('title', '売上推移と構成'))
+    _axis_range(chart.value_axis, d.get('ylim'))
+    line = chart.plots[1].series[0]
+    _value_labels(line, '"¥"#,##0"M"', ACCENT, size=10, position=XL_LABEL_POSITION.ABOVE)
+    yoy = d.get('yoy') or [None] + [f'{(b / a - 1) * 100:+.1f}%'
+                                   for a, b in zip(d['revenue'], d['revenue'][1:])]
+    for i, (v, y) in enumerate(zip(d['revenue'], yoy)):
+        if y:
+            # keep the YoY figure under the value, as in the PNG chart
+            tf = line.points[i].data_label.text_frame
+            tf.text = f'{y}\n¥{v:,}M'
+            set_font(tf.paragraphs[0].runs[0], size=8,
+                     color=ACCENT_RED if y in d.get('yoy_alert', []) else NAVY)
+            set_font(tf.paragraphs[1].runs[0], size=10, bold=True, color=ACCENT)
+            line.points[i].data_label.position = XL_LABEL_POSITION.ABOVE
+    return chart
+
+
+def native_mrr_arpa(slide, left, top, width, height):
+    d = chart_data('mrr_arpa')
+    chart = _combo_chart(slide, left, top, width, height, d['years'],
+                         [('MRR年間合計(M)', d['mrr_annual'], NAVY)],
+                         [('ARPA長期PF(千円/月)', d['arpa'], ACCENT)],
+                         secondary=True, title='MRR成長とARPA推移')
+    _axis_range(chart.value_axis, d.get('ylim'))
+    _axis_range(ValueAxis(chart._chartSpace.chart.plotArea.findall(qn('c:valAx'))[-1]),
+                d.get('ylim2'))
+    _value_labels(chart.plots[1].series[0], '"¥"0"K"', ACCENT, position=XL_LABEL_POSITION.ABOVE)
+    return chart
+
+
+def native_churn(slide, left, top, width, height):
+    d = chart_data('churn')
+    target = d.get('target', 1.0)
+    n = len(d['years'])
+    chart = _combo_chart(slide, left, top, width, height, d['years'],
+                         [('月次解約率', d['churn'], BLUE)],
+                         [(f'目標: {target}%', [target] * n, BLUE),
+                          ('SaaS優良水準: ~0.4%/月(年5%)', [d.get('benchmark', 0.42)] * n,
+                           RGBColor(0x00, 0x80, 0x00))],
+                         title='月次解約率（長期PF）推移と目標')
+    _axis_range(chart.value_axis, d.get('ylim'))
+    bars = chart.plots[0].series[0]
+    for i, c in enumerate(d['colors']):
+        fill = bars.points[i].format.fill
+        fill.solid()
+        fill.fore_color.rgb = globals().get(c, BLUE)
+    _value_labels(bars, '0.0"%"', NAVY, size=12)
+    for ser, dash in zip(chart.plots[1].series, (MSO_LINE_DASH_STYLE.DASH,
+                                                 MSO_LINE_DASH_STYLE.ROUND_DOT)):
+        ser.format.line.dash_style = dash
+        ser.format.line.width = Pt(1.5)
+        ser.marker.style = XL_MARKER_STYLE.NONE
+    return chart
+
+
+def native_accounts(slide, left, top, width, height):
+    d = chart_data('accounts')
+    chart = _combo_chart(slide, left, top, width, height, d['years'],
+                         [('累計長期PFアカウント数', d['long_term'], NAVY)],
+                         [('年間新規獲得数', d['new_per_year'], ACCENT)],
+                         secondary=True, title='長期PFアカウント数推移')
+    _axis_range(chart.value_axis, d.get('ylim'))
+    _axis_range(ValueAxis(chart._chartSpace.chart.plotArea.findall(qn('c:valAx'))[-1]),
+                d.get('ylim2'))
+    _value_labels(chart.plots[0].series[0], '0"社"', NAVY, size=10)
+    line = chart.plots[1].series[0]
+    line.marker.style = XL_MARKER_STYLE.DIAMOND
+    _value_labels(line, '0"社"', ACCENT, position=XL_LABEL_POSITION.ABOVE)
+    return chart
+
+
+# image name -> (builder, height / width of the matplotlib figure, chart type)
+NATIVE_CHARTS = {
+    'revenue_trend.png': (native_revenue_trend, 5.5 / 10, 'revenue_trend'),
+    'mrr_arpa.png': (native_mrr_arpa, 5 / 10, 'mrr_arpa'),
+    'churn_rate.png': (native_churn, 4.5 / 10, 'churn'),
+    'accounts.png': (native_accounts, 5 / 10, 'accounts'),
+}
+
+
+# ==================================================================
+# Incremental Build
+# ==================================================================
+# With INCREMENTAL, each slide_* function is fingerprinted (its source, the
+# helper code and constants, and the content of the chart images it declares)
+# and its serialized XML + image blobs are cached. Unchanged slides are
+# restored from the cache instead of being rebuilt.
+INCREMENTAL = False
+SLIDE_CACHE_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), 'slides')
+_helpers_key = None
+
+
+def slide_inputs(images=(), metrics=()):
+    """Declare the chart images and scenario store metrics a slide_* function
+    reads (for the incremental build)."""
+    def wrap(func):
+        func.inputs = {'images': list(images), 'metrics': list(metrics)}
+        return func
+    return wrap
+
+
+def _helpers_fingerprint():
+    """Hash of every non-slide function and the UPPER_CASE constants (colours,
+    fonts, backend flags). Computed once per process."""
+    global _helpers_key
+    if _helpers_key is None:
+        g = globals()
+        sources = [inspect.getsource(v) for k, v in sorted(g.items())
+                   if inspect.isfunction(v) and v.__module__ == __name__
+                   and not k.startswith('slide_')]
+        consts = {k: str(v) for k, v in sorted(g.items())
+                  if k.isupper() and isinstance(v, (str, int, float, bool, RGBColor, type(None)))}
+        _helpers_key = make_key(sources, consts, pptx.__version__)
+    return _helpers_key
+
+
+def slide_key(slide_func):
+    images = getattr(slide_func, 'inputs', {}).get('images', [])
+    image_keys = []
+    for name in images:
+        path = os.path.join(CHART_DIR, name)
+        if not os.path.exists(path):
+            image_keys.append((name, None))
+        elif MEDIA_STORE is not None:
+            image_keys.append((name, MEDIA_STORE.sha1(path)))
+        else:
+            with open(path, 'rb') as f:
+                image_keys.append((name, hashlib.sha1(f.read()).hexdigest()))
+        svg = os.path.splitext(path)[0] + '.svg'
+        if SVG_CHARTS and os.path.exists(svg):
+            if MEDIA_STORE is not None:
+                image_keys.append((svg, MEDIA_STORE.sha1(svg)))
+            else:
+                with open(svg, 'rb') as f:
+                    image_keys.append((svg, hashlib.sha1(f.read()).hexdigest()))
+    data = {k: chart_data(NATIVE_CHARTS[k][2]) for k in images
+            if CHART_BACKEND == 'native' and k in NATIVE_CHARTS}
+    metrics = {m: (open_store().series(m, SCENARIO).tolist(),
+                   open_store().series(m, ACTUAL).tolist())
+               for m in getattr(slide_func, 'inputs', {}).get('metrics', [])}
+    return make_key(slide_func.__name__, inspect.getsource(slide_func),
+                    _helpers_fingerprint(), image_keys, data, metrics, CLONE_CHROME,
+                    CHART_BACKEND, IMAGE_DPI, SVG_CHARTS, SCENARIO)
+
+
+def _capture_slide(slide):
+    """Serialize a finished slide, or None if it relates to anything but its
+    layout, images and SVGs (e.g. native charts with embedded workbooks)."""
+    images = []
+    for r_id, rel in slide.part.rels.items():
+        if rel.reltype == RT.SLIDE_LAYOUT:
+            continue
+        if rel.reltype != RT.IMAGE:
+            return None
+        svg = rel.target_part.content_type == 'image/svg+xml'
+        if not (svg or isinstance(rel.target_part, ImagePart)):
+            return None
+        images.append((r_id, rel.target_part.blob, svg))
+    return pickle.dumps({'xml': etree.tostring(slide._element.cSld), 'images': images})
+
+
+def _restore_slide(data):
+    """Add a slide rebuilt from _capture_slide output to prs."""
+    entry = pickle.loads(data)
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    xml = entry['xml'].decode('utf-8')
+    new_ids = {}
+    for old_id, blob, svg in entry['images']:
+        if svg:
+            new_ids[old_id] = _add_svg_part(slide, blob)
+        else:
+            _, new_ids[old_id] = slide.part.get_or_add_image_part(io.BytesIO(blob))
+    if new_ids:
+        # one pass, so renumbered ids cannot collide with not-yet-mapped ones
+        xml = re.sub(r'r:embed="(rId\d+)"',
+                     lambda m: f'r:embed="{new_ids.get(m.group(1), m.group(1))}"', xml)
+    old = slide._element.cSld
+    old.getparent().replace(old, parse_xml(xml))
+    return slide
 
 
 # ==================================================================
@@ -280,6 +871,8 @@ def slide_01_title():
 # ==================================================================
 # SLIDE 2: Executive Summary
 # ==================================================================
+@slide_inputs(metrics=['revenue', 'mrr_annual', 'arpa', 'churn', 'accounts', 'compound',
+                      'sales_dx'])
 def slide_02_exec_summary():
     slide = add_slide()
     add_header(slide, 'エグゼクティブサマリー',
@@ -288,16 +881,22 @@ def slide_02_exec_summary():
     add_key_message_box(slide,
         'ネクプロは「ウェビナーツール」→「B2Bエンゲージメント・インテリジェンス基盤」への転換を今すぐ決断すべき')
 
-    # Summary table
+    # Summary table: FY24 actuals vs FY27 plan
+    revenue, mrr, arpa, churn, accounts = (
+        actual_values(m, 'FY24') + plan_values(m, 'FY27')
+        for m in ('revenue', 'mrr_annual', 'arpa', 'churn', 'accounts'))
+    sales_dx = plan_values('sales_dx', 'FY27')[0]
+    new_revenue = plan_values('compound', 'FY27')[0] + sales_dx
     data = [
         ['項目', '現状（FY24実績）', '目標（FY27計画）', '変化率'],
         ['事業定義', 'ウェビナー配信ツール', 'エンゲージメント基盤', '—'],
-        ['売上', '¥512M', '¥1,382M', '+170%'],
-        ['MRR（年間）', '¥287M', '¥526M', '+83%'],
-        ['ARPA（長期PF）', '¥148K/月', '¥204K/月', '+38%'],
-        ['月次解約率', '1.7%', '1.0%（目標）', '−0.7pt'],
-        ['長期PFアカウント数', '167社', '210社', '+26%'],
-        ['新収益柱', 'なし', '¥378M（全体27%）', '—'],
+        ['売上', yen_m(revenue[0]), yen_m(revenue[1]), pct_change(*revenue)],
+        ['MRR（年間）', yen_m(mrr[0]), yen_m(mrr[1]), pct_change(*mrr)],
+        ['ARPA（長期PF）', f'¥{arpa[0]:.0f}K/月', f'¥{arpa[1]:.0f}K/月', pct_change(*arpa)],
+        ['月次解約率', f'{churn[0]:.1f}%', f'{churn[1]:.1f}%（目標）',
+         f'{churn[1] - churn[0]:+.1f}pt'.replace('-', '−')],
+        ['長期PFアカウント数', f'{accounts[0]:.0f}社', f'{accounts[1]:.0f}社', pct_change(*accounts)],
+        ['新収益柱', 'なし', f'{yen_m(new_revenue)}（全体{new_revenue / revenue[1] * 100:.0f}%）', '—'],
     ]
     make_table(slide, Inches(0.8), Inches(2.2), Inches(11.5), Inches(3.2),
                8, 4, data, font_size=10,
@@ -310,13 +909,14 @@ def slide_02_exec_summary():
     ])
     add_multiline_textbox(slide, Inches(0.8), Inches(6.1), Inches(11.5), Inches(0.8), [
         ('反証リスク: ', 11, True, ACCENT_RED),
-        ('30名体制での転換実行力 / 新収益柱（営業DX ¥327M）は未実証の仮説値', 10, False, DARK_GREY),
+        (f'30名体制での転換実行力 / 新収益柱（営業DX {yen_m(sales_dx)}）は未実証の仮説値', 10, False, DARK_GREY),
     ])
 
 
 # ==================================================================
 # SLIDE 3: External Environment
 # ==================================================================
+@slide_inputs(images=['saas_layers.png'])
 def slide_03_external():
     slide = add_slide()
     add_header(slide, '外部環境：AIエージェント時代の産業変化',
@@ -349,32 +949,43 @@ def slide_03_external():
 # ==================================================================
 # SLIDE 4: Current Status - Revenue
 # ==================================================================
+@slide_inputs(images=['revenue_trend.png'],
+              metrics=['revenue', 'mrr_annual', 'option_svc', 'sales_dx', 'compound'])
 def slide_04_current_revenue():
     slide = add_slide()
     add_header(slide, '自社現状①：売上推移と構成',
                'MRRは安定するも成長率は鈍化。新収益柱の立ち上げが急務。', 3)
+    revenue = plan_values('revenue', 'FY23', 'FY24', 'FY27')
     add_key_message_box(slide,
-        'FY24成長率+3.1%に急減速。¥1B突破には新収益柱（営業DX・コンパウンド）の成功が不可欠')
+        f'FY24成長率{(revenue[1] / revenue[0] - 1) * 100:+.1f}%に急減速。'
+        '¥1B突破には新収益柱（営業DX・コンパウンド）の成功が不可欠')
 
     add_image(slide, 'revenue_trend.png', Inches(0.5), Inches(2.2), width=Inches(7))
 
-    # Revenue composition callout
+    # Revenue composition callout (FY27; option_svc includes the new businesses)
+    mrr, option, sales_dx, compound = (
+        plan_values(m, 'FY27')[0] for m in ('mrr_annual', 'option_svc', 'sales_dx', 'compound'))
+    option -= sales_dx + compound
+
+    def share(v):
+        return f'¥{round(v / 1000):,}M（{v / revenue[2] * 100:.0f}%）'
+
     add_multiline_textbox(slide, Inches(7.8), Inches(2.3), Inches(5), Inches(4.0), [
         ('FY27売上構成（計画）', 13, True, NAVY),
         ('', 6, False, NAVY),
         ('MRR（システム利用料）', 11, True, BLUE),
-        ('  ¥527M（38%）', 11, False, DARK_GREY),
+        (f'  {share(mrr)}', 11, False, DARK_GREY),
         ('', 4, False, NAVY),
         ('オプションサービス', 11, True, LIGHT_BLUE),
-        ('  ¥478M（35%）', 11, False, DARK_GREY),
+        (f'  {share(option)}', 11, False, DARK_GREY),
         ('', 4, False, NAVY),
         ('営業DX（新規）', 11, True, ACCENT),
-        ('  ¥327M（24%） ← 未実証・最大リスク', 11, False, ACCENT_RED),
+        (f'  {share(sales_dx)} ← 未実証・最大リスク', 11, False, ACCENT_RED),
         ('', 4, False, NAVY),
         ('コンパウンド（新規）', 11, True, ACCENT),
-        ('  ¥51M（4%）', 11, False, DARK_GREY),
+        (f'  {share(compound)}', 11, False, DARK_GREY),
         ('', 8, False, NAVY),
-        ('※ 営業DXがFY27計画の24%を占める。', 9, True, ACCENT_RED),
+        (f'※ 営業DXがFY27計画の{sales_dx / revenue[2] * 100:.0f}%を占める。', 9, True, ACCENT_RED),
         ('  この実行リスクが全計画の成否を左右。', 9, False, ACCENT_RED),
     ])
 
@@ -382,6 +993,8 @@ def slide_04_current_revenue():
 # ==================================================================
 # SLIDE 5: Current Status - KPIs
 # ==================================================================
+@slide_inputs(images=['mrr_arpa.png', 'churn_rate.png'],
+              metrics=['accounts', 'arpa', 'churn', 'new_accounts'])
 def slide_05_current_kpis():
     slide = add_slide()
     add_header(slide, '自社現状②：SaaS KPI分析',
@@ -391,12 +1004,15 @@ def slide_05_current_kpis():
     add_image(slide, 'churn_rate.png', Inches(6.5), Inches(1.5), width=Inches(6.2))
 
     # Key KPI table
+    periods = ('FY23', 'FY24', 'FY25')
     data = [
         ['KPI', 'FY23', 'FY24', 'FY25計画', '評価'],
-        ['長期PFアカウント数', '151社', '167社', '179社', '○ 回復傾向'],
-        ['ARPA長期PF', '¥138K', '¥148K', '¥169K', '○ 改善中'],
-        ['月次解約率（長期）', '2.3%', '1.7%', '1.0%', '△ 要改善'],
-        ['新規成約数/年', '27社', '50社', '38社', '○ FY24回復'],
+        ['長期PFアカウント数', *[f'{v:.0f}社' for v in plan_values('accounts', *periods)],
+         '○ 回復傾向'],
+        ['ARPA長期PF', *[f'¥{v:.0f}K' for v in plan_values('arpa', *periods)], '○ 改善中'],
+        ['月次解約率（長期）', *[f'{v:.1f}%' for v in plan_values('churn', *periods)], '△ 要改善'],
+        ['新規成約数/年', *[f'{v:.0f}社' for v in plan_values('new_accounts', *periods)],
+         '○ FY24回復'],
         ['成約率', '9.5%', '10.5%', '—', '△ 業界並み'],
         ['年換算解約率', '24.5%', '18.5%', '11.3%', '× SaaS優良=5%'],
     ]
@@ -408,6 +1024,7 @@ def slide_05_current_kpis():
 # ==================================================================
 # SLIDE 6: Account & New Revenue
 # ==================================================================
+@slide_inputs(images=['accounts.png', 'new_revenue.png'])
 def slide_06_accounts_new_rev():
     slide = add_slide()
     add_header(slide, '自社現状③：顧客基盤と新収益柱',
@@ -517,6 +1134,7 @@ def slide_08_competitive_table():
 # ==================================================================
 # SLIDE 9: Positioning Map 1
 # ==================================================================
+@slide_inputs(images=['positioning_map1.png'])
 def slide_09_positioning_map1():
     slide = add_slide()
     add_header(slide, 'Positioning Map 1: 機能深度 × 日本企業適合性',
@@ -545,6 +1163,7 @@ def slide_09_positioning_map1():
 # ==================================================================
 # SLIDE 10: Positioning Map 2
 # ==================================================================
+@slide_inputs(images=['positioning_map2.png'])
 def slide_10_positioning_map2():
     slide = add_slide()
     add_header(slide, 'Positioning Map 2: データ活用高度性 × 導入ハードル',
@@ -841,6 +1460,7 @@ def slide_16_organization():
 # ==================================================================
 # SLIDE 17: Roadmap
 # ==================================================================
+@slide_inputs(images=['roadmap.png'])
 def slide_17_roadmap():
     slide = add_slide()
     add_header(slide, '3層実行ロードマップ（0-36ヶ月）',
@@ -852,6 +1472,7 @@ def slide_17_roadmap():
 # ==================================================================
 # SLIDE 18: KPI Tree
 # ==================================================================
+@slide_inputs(images=['kpi_tree.png'], metrics=['revenue', 'nrr', 'arpa', 'churn', 'sales_dx'])
 def slide_18_kpi_tree():
     slide = add_slide()
     add_header(slide, 'KPIツリーと経営モニタリング設計',
@@ -877,13 +1498,15 @@ def slide_18_kpi_tree():
     # KPI Owner summary
     add_textbox(slide, Inches(8.5), Inches(5.0), Inches(4), Inches(0.35),
                 'KPIオーナー（主要）', size=12, bold=True, color=NAVY)
+    nrr, arpa, churn, sales_dx = (plan_values(m, 'FY25')[0]
+                                  for m in ('nrr', 'arpa', 'churn', 'sales_dx'))
     kpi_owners = [
         ['KPI', '目標(FY25)', 'オーナー'],
-        ['ARR成長率', '+27%', 'CEO'],
-        ['NRR', '100%+', 'CS責任者'],
-        ['ARPA長期', '¥169K', '営業責任者'],
-        ['解約率', '1.0%', 'CS責任者'],
-        ['営業DX', '¥33.4M', 'DX責任者'],
+        ['ARR成長率', pct_change(*plan_values('revenue', 'FY24', 'FY25')), 'CEO'],
+        ['NRR', f'{nrr:.0f}%+', 'CS責任者'],
+        ['ARPA長期', f'¥{arpa:.0f}K', '営業責任者'],
+        ['解約率', f'{churn:.1f}%', 'CS責任者'],
+        ['営業DX', f'¥{sales_dx // 100 / 10}M', 'DX責任者'],
     ]
     make_table(slide, Inches(8.5), Inches(5.4), Inches(4.3), Inches(1.5),
                6, 3, kpi_owners, font_size=8,
@@ -974,53 +1597,197 @@ def slide_20_qa():
 # ==================================================================
 # Generate All Slides
 # ==================================================================
-def main():
+SLIDES = [
+    (slide_01_title, 'Title'),
+    (slide_02_exec_summary, 'Executive Summary'),
+    (slide_03_external, 'External Environment'),
+    (slide_04_current_revenue, 'Current Revenue'),
+    (slide_05_current_kpis, 'Current KPIs'),
+    (slide_06_accounts_new_rev, 'Accounts & New Revenue'),
+    (slide_07_swot, 'SWOT'),
+    (slide_08_competitive_table, 'Competitive Table'),
+    (slide_09_positioning_map1, 'Positioning Map 1'),
+    (slide_10_positioning_map2, 'Positioning Map 2'),
+    (slide_11_mece, 'MECE Issues'),
+    (slide_12_strategy_options, 'Strategy Options'),
+    (slide_13_recommended, 'Recommended Strategy'),
+    (slide_14_product, 'Product Initiatives'),
+    (slide_15_gtm, 'GTM Initiatives'),
+    (slide_16_organization, 'Organization'),
+    (slide_17_roadmap, 'Roadmap'),
+    (slide_18_kpi_tree, 'KPI Tree'),
+    (slide_19_decision, 'Decision Agenda'),
+    (slide_20_qa, 'Q&A'),
+]
+
+
+def build_deck(out_path=OUT_PATH, chart_dir=None, template=None, verbose=True,
+               clone_chrome=None, appendix=None, chart_backend=None, charts=None,
+               image_dpi=None, incremental=None, stream=None, svg_charts=None, scenario=None):
+    """Build the full deck into out_path and return the build time in seconds.
+
+    Sets the module-level prs and build flags so the slide functions stay
+    unchanged; the flags are restored when the build ends, prs is kept (the
+    finished deck). The template bytes are cached across calls (see
+    new_presentation). Arguments left None use the module-level flags.
+    chart_dir: chart images of this build (default: DEFAULT_CHART_DIR)
+    clone_chrome: CLONE_CHROME of this build
+    appendix: CSV path appended as paginated table slides
+    chart_backend: 'png' or 'native' (CHART_BACKEND of this build)
+    charts: chart data overrides for native charts ({chart type: data})
+    image_dpi: IMAGE_DPI of this build (0 = embed as-is)
+    incremental: INCREMENTAL of this build
+    stream: STREAM of this build
+    svg_charts: SVG_CHARTS of this build
+    scenario: SCENARIO of this build
+    """
+    global prs, CHART_DIR, CLONE_CHROME, CHART_BACKEND, CHART_DATA, IMAGE_DPI, INCREMENTAL
+    global STREAM, SVG_CHARTS, SCENARIO, _writer
+    saved = (CHART_DIR, CLONE_CHROME, CHART_BACKEND, CHART_DATA, IMAGE_DPI, INCREMENTAL,
+             STREAM, SVG_CHARTS, SCENARIO)
+    start = time.perf_counter()
+    try:
+        prs = new_presentation(template)
+        if clone_chrome is not None:
+            CLONE_CHROME = clone_chrome
+        if chart_backend is not None:
+            CHART_BACKEND = chart_backend
+        CHART_DATA = charts or {}
+        if image_dpi is not None:
+            IMAGE_DPI = image_dpi or None
+        if incremental is not None:
+            INCREMENTAL = incremental
+        if stream is not None:
+            STREAM = stream
+        if svg_charts is not None:
+            SVG_CHARTS = svg_charts
+        if scenario is not None:
+            SCENARIO = scenario
+        _writer = None
+        if STREAM:
+            os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+            _writer = StreamingDeckWriter(prs, out_path)
+        cache = ChartCache(SLIDE_CACHE_DIR) if INCREMENTAL else None
+        CHART_DIR = chart_dir or DEFAULT_CHART_DIR
+        reused = 0
+        for i, (slide_func, label) in enumerate(SLIDES, 1):
+            with stage(f'slide:{slide_func.__name__}') as st:
+                cached = None
+                if cache:
+                    key = slide_key(slide_func)
+                    cached = cache.get_bytes(key, '.slide')
+                if cached:
+                    _restore_slide(cached)
+                    reused += 1
+                else:
+                    slide_func()
+                    if cache:
+                        data = _capture_slide(prs.slides[-1])
+                        if data:
+                            cache.put_bytes(key, data, '.slide')
+                if st:
+                    st.counts['shapes'] = len(prs.slides[-1].shapes)
+                flush_slides()
+            if verbose:
+                print(f'  {i}/{len(SLIDES)} {label}{" (cached)" if cached else ""}')
+        if appendix:
+            with stage('slide_appendix_table') as st:
+                pages = slide_appendix_table(appendix)
+                st.counts['slides'] = pages
+            if verbose:
+                print(f'  Appendix: {pages} slides')
+        os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+        with stage('prs.save') as st:
+            if _writer is not None:
+                _writer.close()
+                _writer = None
+            else:
+                prs.save(out_path)
+            if st:
+                st.counts['parts'] = sum(1 for _ in prs.part.package.iter_parts())
+        if cache:
+            cache.prune()
+            if verbose:
+                print(f'  Incremental: {reused}/{len(SLIDES)} slides reused')
+        return time.perf_counter() - start
+    finally:
+        (CHART_DIR, CLONE_CHROME, CHART_BACKEND, CHART_DATA, IMAGE_DPI, INCREMENTAL,
+         STREAM, SVG_CHARTS, SCENARIO) = saved
+        _writer = None
+
+
+def load_scenarios(path, out_dir=None):
+    """Scenario list for build_batch.
+
+    Accepts a JSON list or generate_charts' {'scenarios': [...]} file. Each
+    scenario needs 'name'; 'out' defaults to <out_dir>/<name>.pptx and
+    'chart_dir' to CHART_DIR/<name> (where generate_charts --data renders it).
+    'scenario' names the scenario store series of the deck (default: SCENARIO).
+    """
+    with open(path, encoding='utf-8') as f:
+        doc = json.load(f)
+    scenarios = doc['scenarios'] if isinstance(doc, dict) else doc
+    out_dir = out_dir or os.path.dirname(OUT_PATH)
+    return [{
+        'name': sc['name'],
+        'out': sc.get('out') or os.path.join(out_dir, f'{sc["name"]}.pptx'),
+        'chart_dir': sc.get('chart_dir') or os.path.join(CHART_DIR, sc['name']),
+        'template': sc.get('template'),
+        'appendix': sc.get('appendix'),
+        'charts': sc.get('charts'),
+        'scenario': sc.get('scenario'),
+    } for sc in scenarios]
+
+
+def build_batch(scenarios, shared_media=True):
+    """Build one deck per scenario in this process; returns per-deck results.
+
+    shared_media: read, hash and optimize each distinct chart image once for
+    the whole batch (MediaStore) instead of once per deck.
+    """
+    global MEDIA_STORE, SCENARIO, CHART_DIR
+    base_media = MEDIA_STORE
+    if shared_media:
+        MEDIA_STORE = MediaStore()
+    media = MEDIA_STORE
+    base_chart_dir = CHART_DIR
+    base_scenario = SCENARIO
+    results = []
+    start = time.perf_counter()
+    try:
+        for sc in scenarios:
+            try:
+                seconds = build_deck(sc['out'], sc.get('chart_dir') or base_chart_dir,
+                                     sc.get('template'), verbose=False,
+                                     appendix=sc.get('appendix'), charts=sc.get('charts'),
+                                     scenario=sc.get('scenario') or base_scenario)
+                results.append({'name': sc['name'], 'out': sc['out'], 'ok': True,
+                                'seconds': seconds, 'error': None})
+                print(f'  {sc["name"]}: {seconds * 1000:.0f}ms -> {sc["out"]}')
+            except Exception as e:
+                results.append({'name': sc['name'], 'out': sc['out'], 'ok': False,
+                                'seconds': 0.0, 'error': repr(e)})
+                print(f'  {sc["name"]}: FAILED ({e!r})', file=sys.stderr)
+    finally:
+        SCENARIO, CHART_DIR, MEDIA_STORE = base_scenario, base_chart_dir, base_media
+    total = time.perf_counter() - start
+    if results:
+        print(f'\n{len(results)} decks in {total:.2f}s '
+              f'({total / len(results) * 1000:.0f}ms/deck amortized)')
+    if shared_media:
+        st = media.stats()
+        print(f'Shared media: {st["files"]} chart files -> {st["unique"]} unique images '
+              f'({st["bytes"] // 1024}KB)')
+    return results
+
+
+def main(appendix=None):
     print('Generating slides...')
-    slide_01_title()
-    print('  1/20 Title')
-    slide_02_exec_summary()
-    print('  2/20 Executive Summary')
-    slide_03_external()
-    print('  3/20 External Environment')
-    slide_04_current_revenue()
-    print('  4/20 Current Revenue')
-    slide_05_current_kpis()
-    print('  5/20 Current KPIs')
-    slide_06_accounts_new_rev()
-    print('  6/20 Accounts & New Revenue')
-    slide_07_swot()
-    print('  7/20 SWOT')
-    slide_08_competitive_table()
-    print('  8/20 Competitive Table')
-    slide_09_positioning_map1()
-    print('  9/20 Positioning Map 1')
-    slide_10_positioning_map2()
-    print('  10/20 Positioning Map 2')
-    slide_11_mece()
-    print('  11/20 MECE Issues')
-    slide_12_strategy_options()
-    print('  12/20 Strategy Options')
-    slide_13_recommended()
-    print('  13/20 Recommended Strategy')
-    slide_14_product()
-    print('  14/20 Product Initiatives')
-    slide_15_gtm()
-    print('  15/20 GTM Initiatives')
-    slide_16_organization()
-    print('  16/20 Organization')
-    slide_17_roadmap()
-    print('  17/20 Roadmap')
-    slide_18_kpi_tree()
-    print('  18/20 KPI Tree')
-    slide_19_decision()
-    print('  19/20 Decision Agenda')
-    slide_20_qa()
-    print('  20/20 Q&A')
-
-    prs.save(OUT_PATH)
+    build_deck(OUT_PATH, appendix=appendix)
     print(f'\nPresentation saved to: {OUT_PATH}')
     print(f'Total slides: {len(prs.slides)}')
 
 
 if __name__ == '__main__':
-    main()
+    import nexpro
+    sys.exit(nexpro.main(['deck'] + sys.argv[1:]))
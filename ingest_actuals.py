@@ -0,0 +1,296 @@
+"""
+月次・アカウント別の実績エクスポート（CSV/Excel）を集計し、チャート用の年度系列を作る
+数百万行でもチャンク単位でストリーム処理し、メモリはアカウント数＋月数に比例する範囲に収める
+
+入力（1行 = 1アカウント×1ヶ月）:
+    month, account_id, mrr[, option_revenue]
+    month は '2024-04' / '2024/4' / '24/4' / Excelの日付 のいずれか（2000年1月以降）、金額は円（'26,183' 可）
+"""
+import csv
+import datetime
+import json
+import os
+import sys
+
+FY_START_MONTH = 4      # 4月始まり（22/4〜23/3 = FY22）
+MONTHS_PER_FY = 12
+CHUNK_ROWS = 100_000
+_MONTH_BASE = 2000 * 12  # bit 0 of the per-account activity mask = 2000/01
+
+
+def parse_month(value):
+    """Month value -> absolute month index (year * 12 + month - 1).
+
+    Two-digit years are 20xx. Months before 2000/01 are rejected (ValueError):
+    they have no bit in the per-account activity masks.
+    """
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        year, month = value.year, value.month
+    else:
+        text = str(value).strip().replace('/', '-')
+        parts = text.split('-')
+        year, month = int(parts[0]), int(parts[1])
+        if year < 100:
+            year += 2000
+    if year * 12 + month - 1 < _MONTH_BASE:
+        raise ValueError(f'month before 2000/01 is not supported: {value!r}')
+    return year * 12 + month - 1
+
+
+def parse_amount(value):
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(',', '')
+    if text.startswith('(') and text.endswith(')'):  # accounting negative
+        text = '-' + text[1:-1]
+    return float(text) if text else 0.0
+
+
+def fiscal_year(month_index, fy_start_month=FY_START_MONTH):
+    """Absolute month index -> fiscal year number (e.g. 2022 for FY22)."""
+    return (month_index - (fy_start_month - 1)) // 12
+
+
+def fy_label(fy, months=MONTHS_PER_FY):
+    """'FY25'; a fiscal year with fewer months of data is 'FY25(9ヶ月)'."""
+    label = f'FY{fy % 100:02d}'
+    return label if months >= MONTHS_PER_FY else f'{label}({months}ヶ月)'
+
+
+def full_years(series):
+    """FY series without its partial fiscal years (fewer than 12 months)."""
+    months = series.get('months') or [MONTHS_PER_FY] * len(series['years'])
+    keep = [i for i, n in enumerate(months) if n >= MONTHS_PER_FY]
+    return {k: [v[i] for i in keep] for k, v in series.items()}
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS, sheet=None):
+    """Yield (header, rows) chunks from a CSV or .xlsx file without loading it whole."""
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        yield from _iter_xlsx_chunks(path, chunk_rows, sheet)
+        return
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+
+
+def _iter_xlsx_chunks(path, chunk_rows, sheet):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError('Excel input needs openpyxl (pip install openpyxl), '
+                          'or export the sheet to CSV') from None
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else '' for h in next(rows)]
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+    finally:
+        wb.close()
+
+
+class ActualsAggregator:
+    """Incremental monthly aggregation.
+
+    State is per month (MRR / option totals) and per account (a bitmask of
+    active months), so memory does not grow with the number of rows.
+    """
+
+    def __init__(self, month_col='month', account_col='account_id', mrr_col='mrr',
+                 option_col='option_revenue'):
+        self.cols = (month_col, account_col, mrr_col, option_col)
+        self.month_mrr = {}
+        self.month_option = {}
+        self.active = {}   # account_id -> int bitmask of months with mrr > 0
+        self.rows = 0
+
+    def update(self, header, rows):
+        month_col, account_col, mrr_col, option_col = self.cols
+        try:
+            mi, ai, ri = header.index(month_col), header.index(account_col), header.index(mrr_col)
+        except ValueError as e:
+            raise ValueError(f'missing column: {e} (header: {header})') from None
+        oi = header.index(option_col) if option_col in header else None
+
+        month_mrr, month_option, active = self.month_mrr, self.month_option, self.active
+        for row in rows:
+            if not row or row[mi] in (None, ''):
+                continue
+            m = parse_month(row[mi])
+            mrr = parse_amount(row[ri])
+            month_mrr[m] = month_mrr.get(m, 0.0) + mrr
+            if oi is not None:
+                month_option[m] = month_option.get(m, 0.0) + parse_amount(row[oi])
+            if mrr > 0:
+                acct = row[ai]
+                active[acct] = active.get(acct, 0) | (1 << (m - _MONTH_BASE))
+        self.rows += len(rows)
+
+    def monthly(self):
+        """Per-month dict: mrr, option, active, new, churned (logo counts)."""
+        if not self.month_mrr:
+            return {}
+        first, last = min(self.month_mrr), max(self.month_mrr)
+        n = last - first + 1
+        active = [0] * n
+        new = [0] * n
+        churned = [0] * n
+        full = (1 << n) - 1
+        for mask in self.active.values():
+            mask >>= first - _MONTH_BASE
+            new[(mask & -mask).bit_length() - 1] += 1
+            _count_bits(mask, active)
+            # churned in month k: active in k-1, inactive in k
+            _count_bits((mask << 1) & ~mask & full, churned)
+        new[0] = 0  # accounts active in the first month are the opening balance
+        return {first + k: {
+            'mrr': self.month_mrr.get(first + k, 0.0),
+            'option': self.month_option.get(first + k, 0.0),
+            'active': active[k],
+            'new': new[k],
+            'churned': churned[k],
+        } for k in range(n)}
+
+    def fiscal_series(self, fy_start_month=FY_START_MONTH, partial=False):
+        """FY series in chart units: ¥M (annual MRR / revenue), ¥K/月 (ARPA), %/月 (churn).
+
+        Fiscal years the export covers only in part (its first and last, unless
+        it starts and ends on FY boundaries) are left out; with partial they
+        are kept and labelled 'FY25(9ヶ月)' (see fy_label).
+        """
+        months = self.monthly()
+        by_fy = {}
+        for m in sorted(months):
+            by_fy.setdefault(fiscal_year(m, fy_start_month), []).append((m, months[m]))
+
+        series = {'years': [], 'mrr_annual': [], 'option_annual': [], 'revenue': [],
+                  'arpa': [], 'churn': [], 'accounts': [], 'new_accounts': [], 'months': []}
+        for fy in sorted(by_fy):
+            rows = [v for _, v in by_fy[fy]]
+            if len(rows) < MONTHS_PER_FY and not partial:
+                continue
+            prev_active = [months.get(m - 1, {}).get('active', 0) for m, _ in by_fy[fy]]
+            churn_rates = [v['churned'] / p for v, p in zip(rows, prev_active) if p]
+            arpas = [v['mrr'] / v['active'] for v in rows if v['active']]
+            mrr_total = sum(v['mrr'] for v in rows)
+            option_total = sum(v['option'] for v in rows)
+            series['years'].append(fy_label(fy, len(rows)))
+            series['mrr_annual'].append(round(mrr_total / 1e6))
+            series['option_annual'].append(round(option_total / 1e6))
+            series['revenue'].append(round((mrr_total + option_total) / 1e6))
+            series['arpa'].append(round(sum(arpas) / len(arpas) / 1e3) if arpas else 0)
+            series['churn'].append(round(sum(churn_rates) / len(churn_rates) * 100, 1)
+                                   if churn_rates else 0.0)
+            series['accounts'].append(rows[-1]['active'])
+            series['new_accounts'].append(sum(v['new'] for v in rows))
+            series['months'].append(len(rows))
+        return series
+
+
+def _count_bits(mask, counts):
+    while mask:
+        low = mask & -mask
+        counts[low.bit_length() - 1] += 1
+        mask ^= low
+
+
+def aggregate_file(path, chunk_rows=CHUNK_ROWS, sheet=None, fy_start_month=FY_START_MONTH,
+                   partial=False, **columns):
+    """Stream path through an ActualsAggregator and return its FY series."""
+    agg = ActualsAggregator(**columns)
+    for header, rows in iter_chunks(path, chunk_rows, sheet):
+        agg.update(header, rows)
+    return agg.fiscal_series(fy_start_month, partial)
+
+
+def to_chart_data(series):
+    """FY series -> partial chart_data.json overrides for generate_charts --data.
+
+    Axis limits are reset so the charts rescale to the actuals. Accounts already
+    active in the first month of the export are not counted as new.
+    Partial fiscal years are left out: their sums are not comparable with full
+    years on an annual axis.
+    """
+    series = full_years(series)
+    years = series['years']
+    if not years:
+        raise ValueError('no complete fiscal year in the series')
+    return {
+        'revenue_trend': {
+            'title': f'売上推移と構成（{years[0]}-{years[-1]}）',
+            'years': years,
+            'revenue': series['revenue'],
+            'mrr': series['mrr_annual'],
+            'option_svc': series['option_annual'],
+            'yoy': None, 'yoy_alert': [], 'ylim': None,
+        },
+        'mrr_arpa': {
+            'years': years,
+            'mrr_annual': series['mrr_annual'],
+            'arpa': series['arpa'],
+            'ylim': None, 'ylim2': None,
+        },
+        'churn': {
+            'years': years,
+            'churn': series['churn'],
+            'colors': ['ACCENT_RED' if c > 2.0 else 'ACCENT' if c > 1.0 else 'BLUE'
+                       for c in series['churn']],
+            'ylim': None,
+        },
+        'accounts': {
+            'years': years,
+            'long_term': series['accounts'],
+            'new_per_year': series['new_accounts'],
+            'ylim': None, 'ylim2': None,
+        },
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='月次アカウント実績 → 年度チャートデータ')
+    parser.add_argument('path', help='CSV or .xlsx export (one row per account per month)')
+    parser.add_argument('-o', '--out', help='write chart data JSON here (default: stdout)')
+    parser.add_argument('--series', action='store_true',
+                        help='output the raw FY series instead of chart data')
+    parser.add_argument('--sheet', help='Excel sheet name (default: active sheet)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--fy-start-month', type=int, default=FY_START_MONTH)
+    parser.add_argument('--partial', action='store_true',
+                        help='--series: keep partial fiscal years (labelled FY25(9ヶ月))')
+    parser.add_argument('--month-col', default='month')
+    parser.add_argument('--account-col', default='account_id')
+    parser.add_argument('--mrr-col', default='mrr')
+    parser.add_argument('--option-col', default='option_revenue')
+    args = parser.parse_args()
+
+    series = aggregate_file(args.path, args.chunk_rows, args.sheet, args.fy_start_month,
+                            args.partial, month_col=args.month_col, account_col=args.account_col,
+                            mrr_col=args.mrr_col, option_col=args.option_col)
+    doc = series if args.series else to_chart_data(series)
+    text = json.dumps(doc, ensure_ascii=False, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f'Saved: {args.out}', file=sys.stderr)
+    else:
+        print(text)
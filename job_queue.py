@@ -0,0 +1,136 @@
+"""
+描画ジョブの asyncio スケジューラ（月末締めのバースト対策）
+同一ジョブの重複排除・テナント別同時実行数・待ち行列上限（バックプレッシャー）を
+プロセスプール上で実現し、待ち行列長とレイテンシを計測する
+"""
+import asyncio
+import collections
+import time
+
+from chart_cache import make_key
+
+DEFAULT_MAX_PENDING = 64
+DEFAULT_TENANT_LIMIT = 2
+LATENCY_WINDOW = 1000  # most recent jobs kept for the latency percentiles
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_pending jobs are already pending."""
+
+
+class JobQueue:
+    """Schedules blocking job functions onto an executor (e.g. a process pool).
+
+    - identical pending jobs (same function and arguments) share one run
+    - at most tenant_limit jobs per tenant and `workers` jobs overall are in
+      the executor at once; the rest wait here, where they are counted
+    - at most max_pending distinct jobs are queued or running; beyond that
+      submit raises QueueFull, or waits for room with block=True
+
+    All methods must be called from the event loop's thread.
+    """
+
+    def __init__(self, executor, workers, max_pending=DEFAULT_MAX_PENDING,
+                 tenant_limit=DEFAULT_TENANT_LIMIT):
+        self.executor = executor
+        self.workers = workers
+        self.max_pending = max_pending
+        self.tenant_limit = tenant_limit
+        self._pending = {}   # key -> Future shared by every submitter of that job
+        self._tasks = set()
+        self._slots = None   # asyncio primitives are created on the running loop
+        self._space = None
+        self._tenant_slots = {}
+        self._queued = collections.Counter()
+        self._running = collections.Counter()
+        self.counts = collections.Counter()
+        self._latency = collections.deque(maxlen=LATENCY_WINDOW)  # (wait, run) seconds
+
+    async def submit(self, func, *args, tenant='default', key=None, block=False):
+        """Run func(*args) in the executor and return its result."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._space = asyncio.Condition()
+        key = key or make_key(func.__module__, func.__qualname__, args)
+        while True:
+            fut = self._pending.get(key)
+            if fut is not None:
+                self.counts['deduped'] += 1
+                return await asyncio.shield(fut)
+            if len(self._pending) < self.max_pending:
+                break
+            if not block:
+                self.counts['rejected'] += 1
+                raise QueueFull(f'{len(self._pending)} jobs pending (max {self.max_pending})')
+            async with self._space:
+                await self._space.wait_for(lambda: len(self._pending) < self.max_pending)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[key] = fut
+        self.counts['submitted'] += 1
+        task = asyncio.create_task(self._run(key, fut, func, args, tenant))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(fut)
+
+    async def _run(self, key, fut, func, args, tenant):
+        queued_at = time.perf_counter()
+        self._queued[tenant] += 1
+        waiting = True
+        try:
+            tenant_slots = self._tenant_slots.setdefault(
+                tenant, asyncio.Semaphore(self.tenant_limit))
+            async with tenant_slots, self._slots:
+                self._queued[tenant] -= 1
+                waiting = False
+                self._running[tenant] += 1
+                started = time.perf_counter()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, func, *args)
+                finally:
+                    self._running[tenant] -= 1
+            self._latency.append((started - queued_at, time.perf_counter() - started))
+            self.counts['completed'] += 1
+            fut.set_result(result)
+        except BaseException as e:
+            self.counts['failed'] += 1
+            if not fut.done():
+                fut.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            if waiting:
+                self._queued[tenant] -= 1
+            del self._pending[key]
+            async with self._space:
+                self._space.notify_all()
+
+    def metrics(self):
+        """Queue depth, per-tenant load, counters and latency percentiles (ms)."""
+        tenants = set(self._queued) | set(self._running)
+        waits = sorted(w for w, _ in self._latency)
+        runs = sorted(r for _, r in self._latency)
+        totals = sorted(w + r for w, r in self._latency)
+        return {
+            'queued': sum(self._queued.values()),
+            'running': sum(self._running.values()),
+            'pending': len(self._pending),
+            'max_pending': self.max_pending,
+            'tenants': {t: {'queued': self._queued[t], 'running': self._running[t]}
+                        for t in sorted(tenants) if self._queued[t] or self._running[t]},
+            'counts': {k: self.counts[k] for k in
+                       ('submitted', 'deduped', 'rejected', 'completed', 'failed')},
+            'wait_ms': _percentiles(waits),
+            'run_ms': _percentiles(runs),
+            'latency_ms': _percentiles(totals),
+        }
+
+
+def _percentiles(sorted_values):
+    if not sorted_values:
+        return {'p50': None, 'p95': None, 'max': None}
+    n = len(sorted_values)
+    return {'p50': round(sorted_values[(n - 1) // 2] * 1000, 1),
+            'p95': round(sorted_values[min(n - 1, int(n * 0.95))] * 1000, 1),
+            'max': round(sorted_values[-1] * 1000, 1)}
@@ -0,0 +1,228 @@
+"""
+SaaS KPI計算エンジン（NumPy ベクトル演算）
+アカウント×月の MRR 行列から MRR 増減内訳・ロゴ解約率・ARPA・NRR・コホート継続率を算出する
+
+mrr: shape (accounts, months) の行列、値は円。0 = その月は非アクティブ
+months: 各列の絶対月番号（year * 12 + month - 1）、連続していること
+"""
+import json
+import sys
+
+import numpy as np
+
+from ingest_actuals import (CHUNK_ROWS, FY_START_MONTH, MONTHS_PER_FY, fiscal_year, fy_label,
+                            iter_chunks, parse_amount, parse_month, to_chart_data)
+
+
+def load_mrr_matrix(path, chunk_rows=CHUNK_ROWS, sheet=None, month_col='month',
+                    account_col='account_id', mrr_col='mrr', option_col='option_revenue'):
+    """Stream an export into a dense (accounts, months) MRR matrix.
+
+    Returns (account_ids, months, mrr, option): option is the per-month total
+    of the option column (zeros if the export has none). Duplicate rows for
+    the same account and month are summed.
+    """
+    index = {}
+    mrr = np.zeros((0, 0))
+    option = np.zeros(0)
+    first = None
+    for header, rows in iter_chunks(path, chunk_rows, sheet):
+        mi, ai, ri = header.index(month_col), header.index(account_col), header.index(mrr_col)
+        oi = header.index(option_col) if option_col in header else None
+        rows = [r for r in rows if r and r[mi] not in (None, '')]
+        if not rows:
+            continue
+        m = np.fromiter((parse_month(r[mi]) for r in rows), dtype=np.int64, count=len(rows))
+        a = np.fromiter((index.setdefault(r[ai], len(index)) for r in rows),
+                        dtype=np.int64, count=len(rows))
+        v = np.fromiter((parse_amount(r[ri]) for r in rows), dtype=np.float64, count=len(rows))
+
+        lo, hi = int(m.min()), int(m.max())
+        if first is None:
+            first = lo
+        new_first = min(first, lo)
+        n_months = max(first + mrr.shape[1], hi + 1) - new_first
+        if len(index) > mrr.shape[0] or n_months != mrr.shape[1]:
+            # grow rows geometrically; months only as far as the data reaches
+            grown = np.zeros((max(len(index), mrr.shape[0] * 2), n_months))
+            off = first - new_first
+            grown[:mrr.shape[0], off:off + mrr.shape[1]] = mrr
+            if n_months != len(option):
+                grown_option = np.zeros(n_months)
+                grown_option[off:off + len(option)] = option
+                option = grown_option
+            mrr, first = grown, new_first
+        np.add.at(mrr, (a, m - first), v)
+        if oi is not None:
+            o = np.fromiter((parse_amount(r[oi]) if oi < len(r) else 0.0 for r in rows),
+                            dtype=np.float64, count=len(rows))
+            np.add.at(option, m - first, o)
+
+    if first is None:
+        return [], np.zeros(0, dtype=np.int64), np.zeros((0, 0)), np.zeros(0)
+    return list(index), np.arange(first, first + mrr.shape[1]), mrr[:len(index)], option
+
+
+def mrr_movements(mrr):
+    """Per-month MRR bridge. Month 0 is the opening balance (all movements 0)."""
+    prev = mrr[:, :-1]
+    cur = mrr[:, 1:]
+    was_on = prev > 0
+    is_on = cur > 0
+    # seen before month t (for telling new logos from reactivations)
+    seen = np.logical_or.accumulate(mrr > 0, axis=1)[:, :-1]
+
+    def pad(x):
+        return np.concatenate([[0.0], x])
+
+    started = ~was_on & is_on
+    return {
+        'new': pad(np.where(started & ~seen, cur, 0).sum(axis=0)),
+        'reactivation': pad(np.where(started & seen, cur, 0).sum(axis=0)),
+        'expansion': pad(np.where(was_on & (cur > prev), cur - prev, 0).sum(axis=0)),
+        'contraction': pad(np.where(was_on & is_on & (cur < prev), prev - cur, 0).sum(axis=0)),
+        'churn': pad(np.where(was_on & ~is_on, prev, 0).sum(axis=0)),
+    }
+
+
+def cohort_retention(mrr):
+    """Logo and revenue retention by start-month cohort.
+
+    Returns (cohort_sizes, logo, revenue): logo[c, k] is the share of cohort c
+    still active k months after its first month; revenue[c, k] is MRR at age k
+    relative to the cohort's first-month MRR. Cells past the data are NaN.
+    """
+    active = mrr > 0
+    has_any = active.any(axis=1)
+    active, mrr = active[has_any], mrr[has_any]
+    n_months = mrr.shape[1]
+    first = active.argmax(axis=1)
+
+    rows, cols = np.nonzero(active)
+    ages = cols - first[rows]
+    flat = first[rows] * n_months + ages
+    size = n_months * n_months
+    logos = np.bincount(flat, minlength=size).reshape(n_months, n_months).astype(float)
+    revenue = np.bincount(flat, weights=mrr[rows, cols], minlength=size).reshape(n_months, n_months)
+
+    cohort_sizes = logos[:, 0].copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        logo = logos / cohort_sizes[:, None]
+        rev = revenue / revenue[:, :1]
+    # age k of cohort c is observable only while c + k < n_months
+    unobserved = np.add.outer(np.arange(n_months), np.arange(n_months)) >= n_months
+    logo[unobserved] = np.nan
+    rev[unobserved] = np.nan
+    return cohort_sizes, logo, rev
+
+
+def nrr(mrr, window=12):
+    """Net revenue retention per month: MRR now of accounts active `window`
+    months ago, over their MRR then. NaN for the first `window` months."""
+    out = np.full(mrr.shape[1], np.nan)
+    if mrr.shape[1] > window:
+        base = mrr[:, :-window]
+        now = np.where(base > 0, mrr[:, window:], 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[window:] = now.sum(axis=0) / base.sum(axis=0)
+    return out
+
+
+def compute_kpis(mrr, nrr_window=12, option=None):
+    """All monthly KPIs as arrays of length months.
+
+    option: per-month option revenue (load_mrr_matrix); counted in revenue.
+    logo_retention[t] is the share of the accounts first active in month t
+    still active nrr_window months later (cohort_retention; NaN if unknown).
+    """
+    mrr = np.asarray(mrr, dtype=np.float64)
+    active = mrr > 0
+    n_active = active.sum(axis=0)
+    total = mrr.sum(axis=0)
+    churned = np.concatenate([[0], (active[:, :-1] & ~active[:, 1:]).sum(axis=0)])
+    first = np.where(active.any(axis=1), active.argmax(axis=1), -1)
+    new_logos = np.bincount(first[first >= 0], minlength=mrr.shape[1])
+    if len(new_logos):
+        new_logos[0] = 0  # month 0 is the opening balance, as in mrr_movements
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        arpa = np.where(n_active > 0, total / n_active, 0.0)
+        prev_active = np.concatenate([[0], n_active[:-1]])
+        logo_churn = np.where(prev_active > 0, churned / prev_active, np.nan)
+
+    retention = (cohort_retention(mrr)[1][:, nrr_window] if nrr_window < mrr.shape[1]
+                 else np.full(mrr.shape[1], np.nan))
+
+    kpis = {
+        'mrr': total,
+        'option': np.zeros(mrr.shape[1]) if option is None else np.asarray(option, dtype=float),
+        'active': n_active,
+        'new_logos': new_logos,
+        'churned_logos': churned,
+        'arpa': arpa,
+        'logo_churn': logo_churn,
+        'nrr': nrr(mrr, nrr_window),
+        'logo_retention': retention,
+    }
+    kpis.update({f'mrr_{k}': v for k, v in mrr_movements(mrr).items()})
+    return kpis
+
+
+def fiscal_summary(kpis, months, fy_start_month=FY_START_MONTH, partial=False):
+    """Roll monthly KPIs up to FY series in chart units (same keys as
+    ingest_actuals.fiscal_series, plus nrr in % at FY end and retention: % of
+    the FY's new accounts still active nrr_window months later, None while
+    unknown). Partial fiscal years are left out unless partial, as in
+    fiscal_series."""
+    fy = fiscal_year(np.asarray(months), fy_start_month)
+    series = {'years': [], 'mrr_annual': [], 'option_annual': [], 'revenue': [], 'arpa': [],
+              'churn': [], 'accounts': [], 'new_accounts': [], 'nrr': [], 'retention': [],
+              'months': []}
+    for year in np.unique(fy):
+        sel = fy == year
+        idx = np.nonzero(sel)[0]
+        if len(idx) < MONTHS_PER_FY and not partial:
+            continue
+        churn = kpis['logo_churn'][sel]
+        mrr_total = kpis['mrr'][sel].sum()
+        option_total = kpis['option'][sel].sum()
+        end_nrr = kpis['nrr'][idx[-1]]
+        new = kpis['new_logos'][sel]
+        retention = kpis['logo_retention'][sel][new > 0]
+        series['years'].append(fy_label(int(year), len(idx)))
+        series['mrr_annual'].append(round(mrr_total / 1e6))
+        series['option_annual'].append(round(option_total / 1e6))
+        series['revenue'].append(round((mrr_total + option_total) / 1e6))
+        series['arpa'].append(round(kpis['arpa'][sel][kpis['active'][sel] > 0].mean() / 1e3)
+                              if (kpis['active'][sel] > 0).any() else 0)
+        series['churn'].append(round(float(np.nanmean(churn)) * 100, 1)
+                               if np.isfinite(churn).any() else 0.0)
+        series['accounts'].append(int(kpis['active'][idx[-1]]))
+        series['new_accounts'].append(int(kpis['new_logos'][sel].sum()))
+        series['nrr'].append(round(float(end_nrr) * 100) if np.isfinite(end_nrr) else None)
+        series['retention'].append(
+            round(float(np.average(retention, weights=new[new > 0])) * 100, 1)
+            if len(retention) and np.isfinite(retention).all() else None)
+        series['months'].append(int(sel.sum()))
+    return series
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='アカウント×月 MRR から SaaS KPI を算出')
+    parser.add_argument('path',
+                        help='CSV or .xlsx export (month, account_id, mrr[, option_revenue])')
+    parser.add_argument('--chart-data', action='store_true',
+                        help='output generate_charts --data overrides instead of FY series')
+    parser.add_argument('--fy-start-month', type=int, default=FY_START_MONTH)
+    parser.add_argument('--partial', action='store_true',
+                        help='keep partial fiscal years in the FY series (labelled FY25(9ヶ月))')
+    parser.add_argument('--nrr-window', type=int, default=12)
+    args = parser.parse_args()
+
+    _, months, mrr, option = load_mrr_matrix(args.path)
+    series = fiscal_summary(compute_kpis(mrr, args.nrr_window, option), months,
+                            args.fy_start_month, args.partial)
+    doc = to_chart_data(series) if args.chart_data else series
+    json.dump(doc, sys.stdout, ensure_ascii=False, indent=2)
+    print()
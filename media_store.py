@@ -0,0 +1,54 @@
+"""
+バッチ生成用の共有メディアストア（コンテンツアドレス型）
+複数デッキで同じチャート画像を使う場合に、読み込み・ハッシュ・最適化を1回に抑える
+"""
+import hashlib
+import io
+import os
+
+
+class MediaStore:
+    """Image blobs shared by every deck built in one process.
+
+    Files are looked up by (path, mtime, size) and stored by SHA-1 of their
+    content, so identical charts rendered into different scenario directories
+    are held once. Within a deck, python-pptx already reuses one media part
+    per SHA-1; handing it the same bytes keeps that working across placements.
+    """
+
+    def __init__(self):
+        self._by_file = {}   # (abspath, mtime_ns, size) -> sha1
+        self._by_hash = {}   # sha1 -> bytes
+        self.reads = 0
+        self.hits = 0
+
+    def _key(self, path):
+        st = os.stat(path)
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+    def sha1(self, path):
+        key = self._key(path)
+        sha = self._by_file.get(key)
+        if sha is None:
+            with open(path, 'rb') as f:
+                blob = f.read()
+            sha = hashlib.sha1(blob).hexdigest()
+            self._by_hash.setdefault(sha, blob)
+            self._by_file[key] = sha
+            self.reads += 1
+        else:
+            self.hits += 1
+        return sha
+
+    def read(self, path):
+        """path's content, served from the store."""
+        return self._by_hash[self.sha1(path)]
+
+    def open(self, path):
+        """File-like object with path's content, served from the store."""
+        return io.BytesIO(self.read(path))
+
+    def stats(self):
+        return {'files': len(self._by_file), 'unique': len(self._by_hash),
+                'bytes': sum(len(b) for b in self._by_hash.values()),
+                'reads': self.reads, 'hits': self.hits}
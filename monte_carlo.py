@@ -0,0 +1,158 @@
+"""
+FY25〜FY27 計画のモンテカルロ・シミュレーション（NumPy ベクトル演算）
+解約率・新規成約数・ARPA成長率・新規事業（営業DX・コンパウンド）の立ち上がりを経路ごとにサンプリングし、
+売上・MRR・ARPA・アカウント数のパーセンタイル帯を求める（ファンチャート / シナリオストア用）
+
+全ドライバーが計画値のとき、経路は計画（scenario_data.csv の plan）と一致する:
+    accounts[t] = accounts[t-1] * k[t] * (1 - churn[t])^12 + new[t]   k: 計画経路から逆算した補正
+    arpa[t]     = arpa[t-1] * (1 + growth[t])
+    mrr[t]      = plan_mrr[t] * accounts[t] * arpa[t] / (plan_accounts[t] * plan_arpa[t])
+    revenue[t]  = plan_revenue[t] + 各内訳（MRR・既存オプション・コンパウンド・営業DX）の計画からの差
+    既存オプションはアカウント数に比例、新規事業は計画カーブの遅れ（年）と達成率でサンプリング
+"""
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scenario_store import PLAN, open_store
+
+PERCENTILES = (5, 25, 50, 75, 95)
+BAND_METRICS = ('revenue', 'mrr_annual', 'arpa', 'accounts')
+BAND_PREFIX = 'mc'       # band scenarios in the store: mc.p5, mc.p25, ...
+CHUNK_PATHS = 50_000     # paths per task; fixed so results do not depend on workers
+
+# spread of each driver around the plan
+DRIVERS = {
+    'churn': 0.35,        # lognormal sigma of the monthly churn rate
+    'new_logos': 0.25,    # lognormal sigma of new accounts per year
+    'arpa_growth': 0.04,  # sd of the yearly ARPA growth rate (absolute)
+    'ramp': 0.5,          # lognormal sigma of new business attainment (per path)
+    'ramp_slip': 1.0,     # new business ramp slips by U(0, ramp_slip) years (per path)
+}
+_INPUTS = ('revenue', 'mrr_annual', 'option_svc', 'compound', 'sales_dx', 'arpa', 'churn',
+           'accounts', 'new_accounts')
+
+
+def band_scenario(q, prefix=BAND_PREFIX):
+    return f'{prefix}.p{q}'
+
+
+def plan_inputs(store=None, scenario=PLAN, start='FY24', periods=None):
+    """Plan series from the scenario store: start (last actual) plus the
+    simulated periods (default: every later period of the scenario)."""
+    store = store or open_store()
+    if periods is None:
+        later = store.periods[store.periods.index(start) + 1:]
+        periods = [p for p, v in zip(later, store.series('revenue', scenario, later))
+                   if not np.isnan(v)]
+    periods = [start, *periods]
+    return {'periods': periods,
+            **{m: np.array(store.require(m, scenario, periods)) for m in _INPUTS}}
+
+
+def simulate_chunk(base, n, seed, drivers=None, metrics=BAND_METRICS):
+    """n paths from base (plan_inputs). Returns {metric: array (n, periods)};
+    column 0 is the start period, equal to the plan on every path."""
+    drv = dict(DRIVERS, **(drivers or {}))
+    rng = np.random.default_rng(seed)
+    steps = len(base['periods']) - 1
+
+    plan_acc, plan_arpa = base['accounts'], base['arpa']
+    plan_churn = base['churn'][1:] / 100
+    plan_new = base['new_accounts'][1:]
+    # retention of the plan path that monthly churn alone does not explain
+    # (reactivations, timing): keeps the zero-spread path on the plan
+    k = (plan_acc[1:] - plan_new) / plan_acc[:-1] / (1 - plan_churn) ** 12
+    plan_growth = plan_arpa[1:] / plan_arpa[:-1] - 1
+
+    churn = np.minimum(plan_churn * rng.lognormal(0.0, drv['churn'], (n, steps)), 1.0)
+    new = plan_new * rng.lognormal(0.0, drv['new_logos'], (n, steps))
+    growth = plan_growth + rng.normal(0.0, drv['arpa_growth'], (n, steps))
+
+    accounts = np.empty((n, steps + 1))
+    arpa = np.empty((n, steps + 1))
+    accounts[:, 0], arpa[:, 0] = plan_acc[0], plan_arpa[0]
+    for t in range(steps):
+        accounts[:, t + 1] = accounts[:, t] * k[t] * (1 - churn[:, t]) ** 12 + new[:, t]
+        arpa[:, t + 1] = arpa[:, t] * (1 + growth[:, t])
+
+    volume = accounts * arpa / (plan_acc * plan_arpa)
+    mrr = base['mrr_annual'] * volume
+    option = (base['option_svc'] - base['compound'] - base['sales_dx']) * accounts / plan_acc
+    steps_x = np.arange(steps + 1)
+    ramps = {}
+    for name in ('compound', 'sales_dx'):
+        # the plan curve, reached late by slip years and scaled by attainment
+        slip = rng.uniform(0.0, drv['ramp_slip'], (n, 1))
+        attain = rng.lognormal(0.0, drv['ramp'], (n, 1))
+        ramps[name] = attain * np.interp(steps_x - slip, steps_x, base[name])
+
+    new_business = ramps['compound'] + ramps['sales_dx']
+    # the plan's revenue is not exactly the sum of its parts (FY24 actuals,
+    # rounding): move it by the change of each part
+    revenue = base['revenue'] + (mrr + option + new_business) - (base['mrr_annual'] + base['option_svc'])
+    out = {'revenue': revenue, 'mrr_annual': mrr,
+           'option_svc': option + new_business, 'arpa': arpa, 'accounts': accounts, **ramps}
+    for name, drawn in (('churn', churn * 100), ('new_accounts', new)):
+        out[name] = np.empty((n, steps + 1))
+        out[name][:, 0] = base[name][0]
+        out[name][:, 1:] = drawn
+    return {m: out[m] for m in metrics}
+
+
+def simulate(base, n_paths, seed=0, workers=1, drivers=None, metrics=BAND_METRICS,
+             chunk=CHUNK_PATHS):
+    """n_paths paths in chunks of chunk paths, in a process pool when workers > 1
+    (0 or None: os.cpu_count()). The same seed gives the same paths for any
+    number of workers."""
+    sizes = [min(chunk, n_paths - i) for i in range(0, n_paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if not workers:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(sizes))
+    if workers <= 1:
+        parts = [simulate_chunk(base, n, s, drivers, metrics) for n, s in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(simulate_chunk, [base] * len(sizes), sizes, seeds,
+                                  [drivers] * len(sizes), [metrics] * len(sizes)))
+    return {m: np.concatenate([p[m] for p in parts]) for m in metrics}
+
+
+def bands(paths, percentiles=PERCENTILES):
+    """{metric: array (len(percentiles), periods)} over the paths."""
+    return {m: np.percentile(v, percentiles, axis=0) for m, v in paths.items()}
+
+
+def band_rows(result, periods, percentiles=PERCENTILES, prefix=BAND_PREFIX):
+    """bands() as scenario store rows (scenarios mc.p5, mc.p25, ...)."""
+    return [[band_scenario(q, prefix), p, metric, round(float(v), 3)]
+            for metric, table in result.items()
+            for q, row in zip(percentiles, table)
+            for p, v in zip(periods, row)]
+
+
+def write_rows(path, rows):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(['scenario', 'period', 'metric', 'value'])
+        w.writerows(rows)
+
+
+def print_bands(result, base, percentiles=PERCENTILES, file=sys.stdout):
+    periods = base['periods'][1:]
+    print(f'{"metric":<12} {"":>5}' + ''.join(f'{p:>12}' for p in periods), file=file)
+    for metric, table in result.items():
+        print(f'{metric:<12} {"plan":>5}' + ''.join(f'{v:>12,.1f}' for v in base[metric][1:]),
+              file=file)
+        for q, row in zip(percentiles, table):
+            print(f'{"":<12} {f"p{q}":>5}' + ''.join(f'{v:>12,.1f}' for v in row[1:]), file=file)
+
+
+if __name__ == '__main__':
+    import nexpro
+    sys.exit(nexpro.main(['simulate'] + sys.argv[1:]))
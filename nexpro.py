@@ -0,0 +1,409 @@
+"""
+ネクプロ戦略プレゼン生成の統合CLI（チャート画像 / pptx）
+引数の解析と検証はここで済ませ、matplotlib・numpy・python-pptx は実際に必要なサブコマンドで初めて import する
+
+    python nexpro.py charts [-j N] [--data FILE] [chart ...]
+    python nexpro.py deck [--batch SCENARIOS] [--incremental] ...
+    python nexpro.py serve [-j N] [--port 8765 | --socket PATH]
+    python nexpro.py bench [-o report.json] [--baseline base.json] [case ...]
+    python nexpro.py store [SOURCE ...] [--show SCENARIO]
+    python nexpro.py simulate [-n PATHS] [-j N] [--seed S]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from chart_cache import ChartCache, DEFAULT_CACHE_DIR
+
+CHART_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chart_data.json')
+
+
+def chart_types():
+    """Chart types known to generate_charts (the keys of chart_data.json)."""
+    with open(CHART_DATA_PATH, encoding='utf-8') as f:
+        return list(json.load(f))
+
+
+def _existing_file(path):
+    if not os.path.isfile(path):
+        raise argparse.ArgumentTypeError(f'no such file: {path}')
+    return path
+
+
+def add_profile_args(parser):
+    parser.add_argument('--profile', action='store_true',
+                        help='print a per-stage hot-spot report (wall, CPU, RSS, counts)')
+    parser.add_argument('--flamegraph', metavar='FILE',
+                        help='write folded stacks of the stages (flamegraph.pl / speedscope)')
+    parser.add_argument('--cprofile', metavar='FILE', help='also dump cProfile stats here')
+
+
+def profiled(args):
+    """profiling.profiling() if any profiling flag is set, else a no-op context."""
+    if not (args.profile or args.flamegraph or args.cprofile):
+        return contextlib.nullcontext()
+    import profiling
+    return profiling.profiling(args.flamegraph, args.cprofile)
+
+
+# ========== charts ==========
+def add_charts_args(parser):
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='render processes (0 = all cores, default: 1)')
+    parser.add_argument('--data', type=_existing_file,
+                        help='chart data / scenario file (default: chart_data.json)')
+    parser.add_argument('--scenario', default='plan',
+                        help='scenario store scenario of the default series, also under '
+                             '--data unless a scenario of the file names its own (default: plan)')
+    parser.add_argument('--fan', action='store_true',
+                        help='overlay Monte Carlo percentile bands (nexpro.py simulate) on '
+                             'revenue_trend and mrr_arpa')
+    parser.add_argument('--fan-prefix', metavar='PREFIX',
+                        help='--fan: bands of simulate --prefix PREFIX (default: mc; '
+                             'implies --fan)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'chart cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='always re-render')
+    parser.add_argument('--pool', action='store_true',
+                        help='reuse figures of same-shaped charts within a process '
+                             '(scenario batches)')
+    parser.add_argument('--blit', action='store_true',
+                        help='draw only the data layer of repeated chart looks onto a '
+                             'cached background (scenario batches)')
+    parser.add_argument('--svg', action='store_true',
+                        help='write vector SVGs (text as glyph outlines); the PNGs become '
+                             'low-resolution fallbacks (see --svg-fallback-dpi)')
+    parser.add_argument('--svg-fallback-dpi', type=int, metavar='DPI',
+                        help='--svg: resolution of the fallback PNG (0 = blank placeholder, '
+                             'default: 72)')
+    parser.add_argument('charts', nargs='*',
+                        help=f'chart types to render (default: all of {", ".join(chart_types())})')
+    add_profile_args(parser)
+
+
+def run_charts(args, parser):
+    charts = [c[len('chart_'):] if c.startswith('chart_') else c for c in args.charts]
+    unknown = sorted(set(charts) - set(chart_types()))
+    if unknown:
+        parser.error(f'unknown chart type: {", ".join(unknown)}')
+    if args.svg_fallback_dpi is not None and args.svg_fallback_dpi < 0:
+        parser.error('--svg-fallback-dpi must be >= 0')
+
+    import generate_charts as gc
+
+    if args.svg_fallback_dpi is not None:
+        gc.SVG_FALLBACK_DPI = args.svg_fallback_dpi
+    gc.POOL = args.pool
+    gc.BLIT = args.blit
+    check_scenario(args.scenario, parser, gc.DATA_PATH)
+    fan = args.fan_prefix or ('mc' if args.fan else None)
+    if fan:
+        import scenario_store
+        if f'{fan}.p5' not in scenario_store.open_store().scenarios:
+            parser.error(f'no Monte Carlo bands "{fan}" in the scenario store '
+                         f'(run: nexpro.py simulate --prefix {fan})')
+    fmt = 'svg' if args.svg else 'png'
+    specs = (gc.load_specs(args.data, charts, fmt, args.scenario, fan) if args.data
+             else gc.make_specs(charts=charts, fmt=fmt, scenario=args.scenario, fan=fan))
+
+    print('Generating charts...')
+    start = time.perf_counter()
+    cache_dir = None if args.no_cache else args.cache_dir
+    if args.workers != 1 and (args.profile or args.flamegraph):
+        print('note: charts rendered by pool workers are not profiled; use -j 1',
+              file=sys.stderr)
+    with profiled(args):
+        results = gc.render_specs(specs, workers=args.workers, cache_dir=cache_dir)
+    if cache_dir:
+        ChartCache(cache_dir).prune()
+    failed = [r for r in results if not r['ok']]
+    for r in failed:
+        print(f'  FAILED: {r["out"]}\n{r["error"]}', file=sys.stderr)
+    print(f'All charts saved to {gc.OUT_DIR}/ '
+          f'({len(results) - len(failed)}/{len(results)} ok, '
+          f'{sum(r["cached"] for r in results)} cached, '
+          f'{time.perf_counter() - start:.1f}s)')
+    return 1 if failed else 0
+
+
+# ========== deck ==========
+def add_deck_args(parser):
+    parser.add_argument('--batch', metavar='SCENARIOS', type=_existing_file,
+                        help='build one deck per scenario in a JSON file')
+    parser.add_argument('--out-dir', help='output directory for --batch decks')
+    parser.add_argument('--no-shared-media', action='store_true',
+                        help='--batch: do not share image blobs across decks')
+    parser.add_argument('--timings', metavar='JSON', help='write per-deck timings to a file')
+    parser.add_argument('--clone-chrome', action='store_true',
+                        help='stamp shared slide chrome from cached XML prototypes')
+    parser.add_argument('--native-charts', action='store_true',
+                        help='editable PowerPoint charts instead of PNGs where supported')
+    parser.add_argument('--image-dpi', type=int, metavar='DPI',
+                        help='resample and colour-reduce PNG charts for their placed size')
+    parser.add_argument('--svg-charts', action='store_true',
+                        help='embed the SVG of a chart (charts --svg) with its PNG as fallback')
+    parser.add_argument('--incremental', action='store_true',
+                        help='reuse cached slides whose inputs have not changed')
+    parser.add_argument('--stream', action='store_true',
+                        help='write each slide to the output as it is finished (flat memory)')
+    parser.add_argument('--scenario', default='plan',
+                        help='scenario store scenario of the slide figures (default: plan)')
+    parser.add_argument('--appendix', metavar='CSV', type=_existing_file,
+                        help='append a paginated table of this CSV (e.g. account health scores)')
+    add_profile_args(parser)
+
+
+def run_deck(args, parser):
+    if args.image_dpi is not None and args.image_dpi < 0:
+        parser.error('--image-dpi must be >= 0')
+
+    import generate_pptx as gp
+
+    gp.CLONE_CHROME = args.clone_chrome
+    gp.CHART_BACKEND = 'native' if args.native_charts else 'png'
+    gp.IMAGE_DPI = args.image_dpi
+    gp.SVG_CHARTS = args.svg_charts
+    gp.INCREMENTAL = args.incremental
+    gp.STREAM = args.stream
+    check_scenario(args.scenario, parser, gp.CHART_DATA_PATH)
+    gp.SCENARIO = args.scenario
+
+    if args.batch:
+        print('Generating decks...')
+        with profiled(args):
+            results = gp.build_batch(gp.load_scenarios(args.batch, args.out_dir),
+                                     shared_media=not args.no_shared_media)
+        if args.timings:
+            with open(args.timings, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        return 0 if all(r['ok'] for r in results) else 1
+    with profiled(args):
+        gp.main(args.appendix)
+    return 0
+
+
+def check_scenario(name, parser, data_path=None):
+    """The scenario exists and (with data_path) has every series the charts of
+    that chart_data.json are filled from."""
+    import scenario_store
+    store = scenario_store.open_store()
+    if name not in store.scenarios:
+        parser.error(f'unknown scenario: {name} (list them with: nexpro.py store)')
+    if data_path:
+        with open(data_path, encoding='utf-8') as f:
+            missing = scenario_store.missing_series(store, name, json.load(f))
+        if missing:
+            parser.error(f'scenario {name} does not cover the charts: ' + '; '.join(
+                f'no {m} for {", ".join(ps)}' for m, ps in missing.items())
+                + f' (see: nexpro.py store --show {name})')
+
+
+# ========== serve ==========
+def add_serve_args(parser):
+    parser.add_argument('-j', '--workers', type=int, default=0,
+                        help='warm worker processes (0 = all cores, default: 0)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', metavar='PATH', help='listen on a Unix socket instead')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'chart cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help='distinct jobs queued or running before 429 (default: 64)')
+    parser.add_argument('--tenant-limit', type=int, default=2,
+                        help='concurrent jobs per tenant (default: 2)')
+    parser.add_argument('--deck-dir', default='/home/user/nexpro',
+                        help='/deck jobs write their decks under here (default: /home/user/nexpro)')
+    parser.add_argument('--data-dir',
+                        help='/deck jobs may read "template" and "appendix" from here '
+                             '(default: not accepted)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no per-request log lines')
+
+
+def run_serve(args, parser):
+    if args.workers < 0:
+        parser.error('--workers must be >= 0')
+    if args.max_pending < 1 or args.tenant_limit < 1:
+        parser.error('--max-pending and --tenant-limit must be >= 1')
+
+    import render_server
+
+    render_server.serve(args.workers or None, args.host, args.port, args.socket,
+                        args.cache_dir, args.quiet, args.max_pending, args.tenant_limit,
+                        args.deck_dir, args.data_dir)
+    return 0
+
+
+# ========== bench ==========
+def add_bench_args(parser):
+    parser.add_argument('select', nargs='*',
+                        help='only cases whose name contains one of these (e.g. chart. roadmap)')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='timed runs per case (default: 5; stress cases at most 2)')
+    parser.add_argument('--no-stress', action='store_true',
+                        help='skip the 10k-row table / 500-slide deck / 60-month cases')
+    parser.add_argument('-o', '--out', metavar='JSON', help='write the report here')
+    parser.add_argument('--baseline', metavar='JSON', type=_existing_file,
+                        help='compare medians against this report; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='regression threshold as a fraction (default: 0.10)')
+
+
+def run_bench(args, parser):
+    if args.repeat < 1:
+        parser.error('--repeat must be >= 1')
+
+    import bench
+
+    report = bench.run(args.select, args.repeat, stress=not args.no_stress)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    elif not args.baseline:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            rows = bench.compare(report, json.load(f), args.threshold)
+        bench.print_comparison(rows, args.threshold)
+        return 1 if any(r['regression'] for r in rows) else 0
+    return 0
+
+
+# ========== store ==========
+def add_store_args(parser):
+    parser.add_argument('sources', nargs='*', type=_existing_file,
+                        help='scenario CSV / .xlsx (scenario, period, metric, value) or '
+                             'ingest_actuals --series / kpi_engine JSON (scenario "actual"), '
+                             'added to '
+                             'scenario_data.csv')
+    parser.add_argument('--root', help='store directory (default: $NEXPRO_SCENARIO_STORE or '
+                                       '~/.cache/nexpro/scenarios)')
+    parser.add_argument('--show', metavar='SCENARIO', action='append', default=[],
+                        help='print the metrics of a scenario (repeatable, e.g. plan actual)')
+
+
+def run_store(args, parser):
+    import scenario_store
+
+    root = args.root or scenario_store.DEFAULT_STORE_DIR
+    start = time.perf_counter()
+    if args.sources:
+        sources = list(dict.fromkeys(os.path.abspath(p) for p in
+                                     [scenario_store.SCENARIO_CSV] + args.sources))
+        store = scenario_store.build(sources, root)
+    else:
+        store = scenario_store.open_store(root)
+    print(f'Scenario store {root}: {len(store):,} values, {len(store.scenarios):,} scenarios, '
+          f'{len(store.metrics)} metrics, {len(store.periods)} periods '
+          f'({time.perf_counter() - start:.2f}s)', file=sys.stderr)
+    for name in args.show:
+        if name not in store.scenarios:
+            parser.error(f'unknown scenario: {name}')
+        scenario_store.print_table(store, name)
+    return 0
+
+
+# ========== simulate ==========
+def _driver(text):
+    name, sep, value = text.partition('=')
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected NAME=VALUE, got: {text}') from None
+
+
+def add_simulate_args(parser):
+    parser.add_argument('-n', '--paths', type=int, default=200_000,
+                        help='simulated paths (default: 200000)')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='processes (0 = all cores, default: 1)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenario', default='plan',
+                        help='scenario store scenario to simulate around (default: plan)')
+    parser.add_argument('--start', default='FY24',
+                        help='last actual period; later periods are simulated (default: FY24)')
+    parser.add_argument('--spread', metavar='NAME=VALUE', type=_driver, action='append',
+                        default=[], help='driver spread: churn, new_logos, arpa_growth, ramp '
+                                         '(sigmas) or ramp_slip (years); see monte_carlo.DRIVERS')
+    parser.add_argument('--prefix', default='mc',
+                        help='band scenarios are <prefix>.p5 ... <prefix>.p95 (default: mc)')
+    parser.add_argument('-o', '--out', metavar='CSV',
+                        help='band rows CSV (default: <store>/<prefix>_bands.csv)')
+    parser.add_argument('--no-store', action='store_true',
+                        help='only print (and with -o write) the bands; do not add them to '
+                             'the scenario store')
+
+
+def run_simulate(args, parser):
+    if args.paths < 1:
+        parser.error('--paths must be >= 1')
+    if args.workers < 0:
+        parser.error('--workers must be >= 0')
+
+    import monte_carlo
+    import scenario_store
+
+    drivers = dict(args.spread)
+    unknown = sorted(set(drivers) - set(monte_carlo.DRIVERS))
+    if unknown:
+        parser.error(f'unknown driver: {", ".join(unknown)}')
+    store = scenario_store.open_store()
+    check_scenario(args.scenario, parser)
+    if args.start not in store.periods:
+        parser.error(f'unknown period: {args.start}')
+
+    base = monte_carlo.plan_inputs(store, args.scenario, args.start)
+    start = time.perf_counter()
+    paths = monte_carlo.simulate(base, args.paths, args.seed, args.workers, drivers)
+    bands = monte_carlo.bands(paths)
+    print(f'{args.paths:,} paths over {", ".join(base["periods"][1:])} in '
+          f'{time.perf_counter() - start:.2f}s', file=sys.stderr)
+    monte_carlo.print_bands(bands, base)
+
+    rows = monte_carlo.band_rows(bands, base['periods'], prefix=args.prefix)
+    out = args.out
+    if not out and not args.no_store:
+        out = os.path.join(store.root, f'{args.prefix}_bands.csv')
+    if out:
+        monte_carlo.write_rows(out, rows)
+        print(f'Saved: {out}', file=sys.stderr)
+    if not args.no_store:
+        sources = [s[0] for s in store.index['sources']]
+        sources = list(dict.fromkeys(sources + [os.path.abspath(out)]))
+        scenario_store.build(sources, store.root)
+        print(f'Scenario store: added {args.prefix}.p5 ... {args.prefix}.p95 '
+              f'(charts --fan{"" if args.prefix == "mc" else " --fan-prefix " + args.prefix})',
+              file=sys.stderr)
+    return 0
+
+
+COMMANDS = {
+    'charts': (add_charts_args, run_charts, 'ネクプロ戦略チャート画像生成'),
+    'deck': (add_deck_args, run_deck, 'ネクプロ全社戦略プレゼンテーション pptx生成'),
+    'serve': (add_serve_args, run_serve, 'チャート・pptx 常駐描画サーバー'),
+    'bench': (add_bench_args, run_bench, 'チャート・スライド生成ベンチマーク'),
+    'store': (add_store_args, run_store, '計画・実績シナリオストアの構築と表示'),
+    'simulate': (add_simulate_args, run_simulate, 'FY25-FY27計画のモンテカルロ・シミュレーション'),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='ネクプロ戦略プレゼン生成')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, (add_args, run, help_text) in COMMANDS.items():
+        cmd = sub.add_parser(name, help=help_text, description=help_text)
+        add_args(cmd)
+        cmd.set_defaults(run=run, command_parser=cmd)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args, args.command_parser)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
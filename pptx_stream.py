@@ -0,0 +1,127 @@
+"""
+pptx のストリーミング書き出し
+完成したスライドから順に、スライドXMLと画像・グラフなどの付随パートを出力 zip に書き込んで解放する
+デッキの枚数が増えてもメモリ使用量はほぼ一定（テンプレート＋1スライド分）に収まる
+"""
+import re
+import zipfile
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.oxml import CT_Types, serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.spec import default_content_types
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.parts.image import ImagePart
+
+# what a written slide part is left holding (its rels are dropped as well)
+_STUB_SLIDE = (f'<p:sld {nsdecls("p")}><p:cSld><p:spTree><p:nvGrpSpPr>'
+               '<p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+               '<p:grpSpPr/></p:spTree></p:cSld></p:sld>')
+
+
+class StreamingDeckWriter:
+    """Writes prs to path slide by slide instead of in one prs.save().
+
+    Call flush() whenever slides are finished: every slide added since the last
+    flush is serialized into the zip together with the parts only it uses
+    (images, charts and their workbooks), and then emptied. close() writes the
+    remaining shared parts (presentation, masters, layouts, theme, properties),
+    the package rels and [Content_Types].xml.
+
+    Parts written early are dropped from the python-pptx package, so python-pptx
+    may hand out their partnames again; such parts are renamed on write.
+    Identical images are still stored once (by SHA-1). A flushed slide can no
+    longer be read or edited.
+    """
+
+    def __init__(self, prs, path):
+        self.prs = prs
+        self.path = path
+        self.flushed = 0  # slides written so far
+        self._package = prs.part.package
+        self._shared = list(self._package.iter_parts())  # written by close()
+        self._shared_ids = {id(p) for p in self._shared}
+        self._names = {str(p.partname) for p in self._shared}  # partnames in use
+        self._next_index = {}  # partname prefix -> next free number
+        self._media = {}       # image sha1 -> partname
+        self._types = {}       # partname -> content type
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED,
+                                    strict_timestamps=False)
+
+    def flush(self):
+        """Write and release every slide added since the last flush."""
+        slides = self.prs.slides
+        while self.flushed < len(slides):
+            part = slides[self.flushed].part
+            self._write_part(part)
+            part._element = parse_xml(_STUB_SLIDE)
+            part.__dict__.pop('slide', None)  # lazyproperty holding the old tree
+            for r_id in list(part.rels):
+                part.rels.pop(r_id)
+            self.flushed += 1
+
+    def close(self):
+        self.flush()
+        for part in self._package.iter_parts():
+            if not getattr(part, '_streamed', False):
+                self._write_part(part, shallow=True)
+        self._zip.writestr(PACKAGE_URI.rels_uri.membername, self._package._rels.xml)
+        self._zip.writestr(CONTENT_TYPES_URI.membername, self._content_types())
+        self._zip.close()
+
+    def _write_part(self, part, shallow=False):
+        """Write part and (unless shallow) the not-yet-written, non-shared parts it
+        relates to, children first so rels carry their final partnames."""
+        part._streamed = True
+        if not shallow:
+            for rel in part.rels.values():
+                if rel.is_external:
+                    continue
+                target = rel.target_part
+                if id(target) not in self._shared_ids and not getattr(target, '_streamed', False):
+                    self._write_part(target)
+
+        if isinstance(part, ImagePart) and id(part) not in self._shared_ids:
+            written = self._media.get(part.sha1)
+            if written:
+                part.partname = PackURI(written)
+                return
+            self._claim_name(part)
+            self._media[part.sha1] = str(part.partname)
+        elif id(part) not in self._shared_ids:
+            self._claim_name(part)
+
+        self._zip.writestr(part.partname.membername, part.blob)
+        if part.rels:
+            self._zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        self._types[part.partname] = part.content_type
+
+    def _claim_name(self, part):
+        name = str(part.partname)
+        if name in self._names:
+            head, ext = re.match(r'^(.*?)\d*(\.[^./]+)$', name).groups()
+            n = self._next_index.get(head, 1)
+            while f'{head}{n}{ext}' in self._names:
+                n += 1
+            self._next_index[head] = n + 1
+            name = f'{head}{n}{ext}'
+            part.partname = PackURI(name)
+        self._names.add(name)
+
+    def _content_types(self):
+        """[Content_Types].xml, built the way python-pptx's PackageWriter does."""
+        defaults = {'rels': CT.OPC_RELATIONSHIPS, 'xml': CT.XML}
+        overrides = {}
+        for partname, content_type in self._types.items():
+            ext = partname.ext
+            if (ext.lower(), content_type) in default_content_types:
+                defaults[ext] = content_type
+            else:
+                overrides[partname] = content_type
+        types = CT_Types.new()
+        for ext, content_type in sorted(defaults.items()):
+            types.add_default(ext, content_type)
+        for partname, content_type in sorted(overrides.items()):
+            types.add_override(partname, content_type)
+        return serialize_part_xml(types)
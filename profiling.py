@@ -0,0 +1,170 @@
+"""
+デッキ・チャート生成の段階別プロファイリング
+スライド関数・チャート描画・save()・prs.save() を区間として計測し（wall / CPU / ピークRSS / シェイプ・パート数）、
+ホットスポット表と flamegraph 互換（folded stacks）のプロファイルを出力する
+"""
+import contextlib
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILER = None  # active Profiler; stage() is a no-op while this is None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (MB), or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class Stage:
+    """One timed section. counts holds shape / part counts set by the caller."""
+
+    __slots__ = ('name', 'parent', 'wall', 'cpu', 'child_wall', 'rss_mb', 'rss_growth_mb',
+                 'counts')
+
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.wall = self.cpu = self.child_wall = 0.0
+        self.rss_mb = self.rss_growth_mb = None
+        self.counts = {}
+
+    def path(self):
+        names = []
+        st = self
+        while st is not None:
+            names.append(st.name)
+            st = st.parent
+        return names[::-1]
+
+
+class Profiler:
+    """Collects nested Stage records.
+
+    Only stages run in this process are seen: charts rendered by pool
+    workers (generate_charts -j N) are not profiled.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self._current = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        st = Stage(name, self._current)
+        self._current = st
+        rss0 = peak_rss_mb()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield st
+        finally:
+            st.wall = time.perf_counter() - wall0
+            st.cpu = time.process_time() - cpu0
+            st.rss_mb = peak_rss_mb()
+            if rss0 is not None:
+                st.rss_growth_mb = st.rss_mb - rss0
+            self._current = st.parent
+            if st.parent is not None:
+                st.parent.child_wall += st.wall
+            self.stages.append(st)
+
+    def summary(self):
+        """Per stage name: calls, wall/self/cpu seconds, peak RSS growth, summed counts."""
+        rows = {}
+        for st in self.stages:
+            r = rows.setdefault(st.name, {'name': st.name, 'calls': 0, 'wall': 0.0,
+                                          'self': 0.0, 'cpu': 0.0, 'rss_growth_mb': 0.0,
+                                          'counts': {}})
+            r['calls'] += 1
+            r['wall'] += st.wall
+            r['self'] += st.wall - st.child_wall
+            r['cpu'] += st.cpu
+            r['rss_growth_mb'] += st.rss_growth_mb or 0.0
+            for k, v in st.counts.items():
+                r['counts'][k] = r['counts'].get(k, 0) + v
+        return sorted(rows.values(), key=lambda r: r['self'], reverse=True)
+
+    def report(self, top=15, file=sys.stderr):
+        """Print the hot spots, sorted by self time."""
+        rows = self.summary()
+        total = sum(st.wall for st in self.stages if st.parent is None) or 1e-9
+        print(f'\n{"stage":<36} {"calls":>5} {"self":>9} {"total":>9} {"cpu":>9} '
+              f'{"share":>6} {"+RSS":>7}  counts', file=file)
+        for r in rows[:top]:
+            counts = ' '.join(f'{k}={v}' for k, v in sorted(r['counts'].items()))
+            print(f'{r["name"]:<36} {r["calls"]:5d} {r["self"] * 1000:7.1f}ms '
+                  f'{r["wall"] * 1000:7.1f}ms {r["cpu"] * 1000:7.1f}ms '
+                  f'{r["self"] / total:6.1%} {r["rss_growth_mb"]:5.1f}MB  {counts}', file=file)
+        peak = peak_rss_mb()
+        if peak is not None:
+            print(f'peak RSS {peak:.0f}MB', file=file)
+
+    def write_folded(self, path):
+        """Folded stacks ('a;b;c <self µs>' per line) for flamegraph.pl / speedscope."""
+        folded = {}
+        for st in self.stages:
+            key = ';'.join(st.path())
+            folded[key] = folded.get(key, 0) + max(0, round((st.wall - st.child_wall) * 1e6))
+        with open(path, 'w', encoding='utf-8') as f:
+            for key, us in folded.items():
+                f.write(f'{key} {us}\n')
+
+
+def stage(name):
+    """Context manager timing name under the active Profiler (no-op without one).
+
+    The stage it yields is false when profiling is off, so counts that cost
+    something to compute can be skipped: `if st: st.counts[...] = ...`.
+    """
+    if PROFILER is None:
+        return contextlib.nullcontext(_NULL_STAGE)
+    return PROFILER.stage(name)
+
+
+class _NullStage:
+    """Stands in for Stage when profiling is off; counts writes are discarded."""
+
+    @property
+    def counts(self):
+        return {}
+
+    def __bool__(self):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+@contextlib.contextmanager
+def profiling(folded=None, cprofile=None, report=True):
+    """Enable stage profiling for the block.
+
+    folded: write folded stacks here; cprofile: also run cProfile and dump
+    pstats here (for snakeviz / flameprof); report: print the hot spots.
+    """
+    global PROFILER
+    PROFILER = prof = Profiler()
+    cp = None
+    if cprofile:
+        import cProfile
+        cp = cProfile.Profile()
+        cp.enable()
+    try:
+        with prof.stage('build'):
+            yield prof
+    finally:
+        if cp is not None:
+            cp.disable()
+            cp.dump_stats(cprofile)
+        PROFILER = None
+        if report:
+            prof.report()
+        if folded:
+            prof.write_folded(folded)
@@ -0,0 +1,314 @@
+"""
+チャート画像・pptx のローカル描画サーバー（HTTP / Unix ソケット）
+matplotlib・フォント・python-pptx テンプレートを読み込み済みのワーカープールを常駐させ、
+ダッシュボードからのジョブをプロセス起動なしで処理する
+
+    POST /charts  {"charts": ["churn"], "data": {type: data}, "prefix": "sc1",
+                   "scenario": "plan", "fan": null | "mc", "format": "png" | "svg", "cache": true,
+                   "return": "path" | "bytes"}
+    POST /deck    {"out": "deck.pptx", "chart_dir": ..., "template": ..., "charts": {...},
+                   "appendix": ..., "clone_chrome": false, "native_charts": false,
+                   "image_dpi": 0, "svg_charts": false, "incremental": false,
+                   "stream": false, "scenario": "plan",
+                   "return": "path" | "bytes"}
+    GET  /health, GET /metrics
+
+Responses are JSON; "return": "bytes" adds the artifact as base64 ("data"),
+and for "format": "svg" the vector chart as well ("data_svg").
+Jobs are scheduled by job_queue.JobQueue: the tenant comes from the X-Tenant
+header (or "tenant" in the job), identical pending jobs are run once, and a
+full queue answers 429.
+"""
+import asyncio
+import base64
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chart_cache import DEFAULT_CACHE_DIR
+from job_queue import DEFAULT_MAX_PENDING, DEFAULT_TENANT_LIMIT, JobQueue, QueueFull
+
+DEFAULT_PORT = 8765
+JOB_TIMEOUT = 300  # seconds
+# /deck jobs write their "out" under DECK_DIR and read "chart_dir" under
+# generate_charts.OUT_DIR; "template" and "appendix" are only read from the
+# data directory given to serve (none: not accepted)
+DEFAULT_DECK_DIR = '/home/user/nexpro'
+
+
+# ========== Worker side ==========
+def _warm_worker():
+    """Pool initializer: import both generators, load fonts and the default template.
+
+    Workers live long and render the same charts for many tenants, so they
+    keep their figures and chart backgrounds (generate_charts.POOL / BLIT).
+    """
+    import generate_charts as gc
+    import generate_pptx as gp
+    gc._init_worker()
+    gc.POOL = gc.BLIT = True
+    gp.new_presentation()
+
+
+def _check_prefix(prefix):
+    """prefix names one sub-directory of OUT_DIR: no absolute paths, separators or '..'."""
+    if not isinstance(prefix, str) or (prefix and (
+            os.path.isabs(prefix) or '/' in prefix or os.sep in prefix
+            or prefix in ('.', '..') or '\0' in prefix)):
+        raise ValueError(f'bad prefix: {prefix!r} (a single directory name)')
+    return prefix
+
+
+def _inside(path, root):
+    root = os.path.realpath(root)
+    return os.path.commonpath([os.path.realpath(path), root]) == root
+
+
+def _resolve(path, root, what):
+    """path (absolute or relative to root) resolved inside root, else ValueError."""
+    if not isinstance(path, str) or not path or '\0' in path:
+        raise ValueError(f'bad {what}: {path!r}')
+    if root is None:
+        raise ValueError(f'bad {what}: {path!r} (the server has no data directory)')
+    full = os.path.realpath(os.path.join(root, path))
+    if not _inside(full, root):
+        raise ValueError(f'bad {what}: {path!r} (outside {root})')
+    return full
+
+
+def chart_job(job, cache_dir=DEFAULT_CACHE_DIR):
+    """Render the charts of one job; returns _run_spec results plus absolute paths
+    (path; svg_path as well for "format": "svg").
+
+    Per-chart errors are reduced to their last line; the traceback goes to the
+    server log.
+    """
+    import generate_charts as gc
+    prefix = _check_prefix(job.get('prefix') or '')
+    specs = gc.make_specs(job.get('data'), job.get('charts'), prefix,
+                          job.get('format', 'png'), job.get('scenario', 'plan'), job.get('fan'))
+    for spec in specs:
+        if not _inside(os.path.join(gc.OUT_DIR, spec['out']), gc.OUT_DIR):
+            raise ValueError(f'bad prefix: {prefix!r} (outside the output directory)')
+    if not job.get('cache', True):
+        cache_dir = None
+    results = []
+    for spec in specs:
+        r = gc._run_spec(spec, cache_dir)
+        r['path'] = os.path.join(gc.OUT_DIR, r['out'])
+        if spec['format'] == 'svg':
+            r['svg_path'] = gc.svg_path(r['path'])
+        if r['error']:
+            print(r['error'], file=sys.stderr)
+            r['error'] = r['error'].strip().splitlines()[-1]
+        results.append(r)
+    return results
+
+
+def deck_job(job, deck_dir=DEFAULT_DECK_DIR, data_dir=None):
+    """Build one deck. Every build flag is set explicitly: workers are reused.
+
+    Paths in the job are confined: "out" to deck_dir (a .pptx), "chart_dir"
+    to generate_charts.OUT_DIR, "template" and "appendix" to data_dir.
+    """
+    import generate_charts as gc
+    import generate_pptx as gp
+    out = _resolve(job.get('out') or os.path.basename(gp.OUT_PATH), deck_dir, 'out')
+    if not out.endswith('.pptx'):
+        raise ValueError(f'bad out: {job.get("out")!r} (not a .pptx file)')
+    chart_dir = _resolve(job.get('chart_dir') or gp.DEFAULT_CHART_DIR, gc.OUT_DIR, 'chart_dir')
+    template = job.get('template') and _resolve(job['template'], data_dir, 'template')
+    appendix = job.get('appendix') and _resolve(job['appendix'], data_dir, 'appendix')
+    seconds = gp.build_deck(out, chart_dir, template, verbose=False,
+                            clone_chrome=bool(job.get('clone_chrome')),
+                            appendix=appendix,
+                            chart_backend='native' if job.get('native_charts') else 'png',
+                            charts=job.get('charts'), image_dpi=job.get('image_dpi') or 0,
+                            svg_charts=bool(job.get('svg_charts')),
+                            incremental=bool(job.get('incremental')),
+                            stream=bool(job.get('stream')),
+                            scenario=job.get('scenario') or 'plan')
+    return {'out': job.get('out') or os.path.basename(gp.OUT_PATH), 'path': out, 'ok': True,
+            'seconds': seconds, 'slides': len(gp.prs.slides), 'error': None}
+
+
+JOBS = {'/charts': chart_job, '/deck': deck_job}
+
+
+# ========== Server side ==========
+class RenderService:
+    """Bounded pool of warm worker processes behind a JobQueue.
+
+    The queue runs on an event loop in a background thread; request threads
+    hand jobs to it and block on the result. The pool is replaced if a worker dies.
+    """
+
+    def __init__(self, workers=None, cache_dir=DEFAULT_CACHE_DIR,
+                 max_pending=DEFAULT_MAX_PENDING, tenant_limit=DEFAULT_TENANT_LIMIT,
+                 deck_dir=DEFAULT_DECK_DIR, data_dir=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.deck_dir = deck_dir
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+        self.queue = JobQueue(self._pool, self.workers, max_pending, tenant_limit)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name='job-queue', daemon=True).start()
+        self.served = 0
+
+    def _new_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # start every worker now so the first requests do not pay the warm-up
+        for f in [pool.submit(time.sleep, 0) for _ in range(self.workers)]:
+            f.result()
+        return pool
+
+    def run(self, path, job, tenant='default'):
+        func = JOBS[path]
+        args = ((job, self.cache_dir) if func is chart_job
+                else (job, self.deck_dir, self.data_dir))
+        pool = self._pool
+        coro = self.queue.submit(func, *args, tenant=tenant)
+        try:
+            result = asyncio.run_coroutine_threadsafe(coro, self._loop).result(JOB_TIMEOUT)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = self.queue.executor = self._new_pool()
+            raise
+        self.served += 1
+        return result
+
+    def metrics(self):
+        return asyncio.run_coroutine_threadsafe(self._metrics(), self._loop).result()
+
+    async def _metrics(self):
+        return self.queue.metrics()
+
+    def shutdown(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._pool.shutdown(cancel_futures=True)
+
+
+def _attach_bytes(result):
+    for key, field in (('path', 'data'), ('svg_path', 'data_svg')):
+        if key in result:
+            with open(result[key], 'rb') as f:
+                result[field] = base64.b64encode(f.read()).decode('ascii')
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    service = None  # RenderService, set by make_server
+    quiet = False
+
+    def do_GET(self):
+        if self.path == '/health':
+            return self._reply(200, {'ok': True, 'workers': self.service.workers,
+                                     'served': self.service.served})
+        if self.path == '/metrics':
+            return self._reply(200, dict(self.service.metrics(), ok=True))
+        self._reply(404, {'ok': False, 'error': f'no such endpoint: {self.path}'})
+
+    def do_POST(self):
+        if self.path not in JOBS:
+            return self._reply(404, {'ok': False, 'error': f'no such endpoint: {self.path}'})
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            job = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(job, dict):
+                raise ValueError('job must be a JSON object')
+        except ValueError as e:
+            return self._reply(400, {'ok': False, 'error': f'bad job: {e}'})
+        tenant = self.headers.get('X-Tenant') or job.pop('tenant', None) or 'default'
+        job.pop('tenant', None)
+        # how the result is returned does not change the job (keeps dedupe effective)
+        want_bytes = job.pop('return', None) == 'bytes'
+        try:
+            result = self.service.run(self.path, job, tenant)
+        except QueueFull as e:
+            return self._reply(429, {'ok': False, 'error': str(e)}, {'Retry-After': '1'})
+        except ValueError as e:  # e.g. unknown chart type, bad prefix
+            return self._reply(400, {'ok': False, 'error': str(e)})
+        except KeyError as e:  # unknown scenario or metric in the scenario store
+            return self._reply(400, {'ok': False, 'error': f'not found: {e.args[0] if e.args else e}'})
+        except Exception as e:
+            # the traceback stays in the server log
+            traceback.print_exc()
+            return self._reply(500, {'ok': False, 'error': f'internal error ({type(e).__name__})'})
+
+        # results are shared by deduplicated requests: attach bytes to copies
+        result = [dict(r) for r in result] if isinstance(result, list) else dict(result)
+        items = result if isinstance(result, list) else [result]
+        if want_bytes:
+            for r in items:
+                if r['ok']:
+                    _attach_bytes(r)
+        body = {'ok': all(r['ok'] for r in items),
+                'seconds': time.perf_counter() - start}
+        body['results' if isinstance(result, list) else 'result'] = result
+        self._reply(200, body)
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None, quiet=False):
+    handler = type('Handler', (RenderHandler,), {'service': service, 'quiet': quiet})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return UnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(workers=None, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None,
+          cache_dir=DEFAULT_CACHE_DIR, quiet=False, max_pending=DEFAULT_MAX_PENDING,
+          tenant_limit=DEFAULT_TENANT_LIMIT, deck_dir=DEFAULT_DECK_DIR, data_dir=None):
+    start = time.perf_counter()
+    service = RenderService(workers, cache_dir, max_pending, tenant_limit, deck_dir, data_dir)
+    server = make_server(service, host, port, socket_path, quiet)
+    where = socket_path or f'http://{host}:{server.server_address[1]}'
+    print(f'Render server: {service.workers} warm workers in '
+          f'{time.perf_counter() - start:.1f}s, listening on {where}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == '__main__':
+    import nexpro
+    sys.exit(nexpro.main(['serve'] + sys.argv[1:]))
@@ -0,0 +1,454 @@
+"""
+計画・実績シナリオの列指向ストア（scenario × 年度 × 指標 → 値）
+scenario_data.csv などの元データを列ごとの .npy に変換し、メモリマップで開いて generate_charts / generate_pptx に系列を返す
+数十万シナリオでも開くのはインデックスだけで、値は問い合わせた範囲のページしか読まれない
+
+元データ（1行 = 1シナリオ×1年度×1指標）:
+    scenario, period, metric, value        例: plan, FY25, revenue, 649820
+"""
+import json
+import os
+import string
+import sys
+
+import numpy as np
+
+from chart_cache import make_key
+from ingest_actuals import CHUNK_ROWS, full_years, iter_chunks
+
+SCENARIO_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenario_data.csv')
+DEFAULT_STORE_DIR = os.environ.get(
+    'NEXPRO_SCENARIO_STORE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'nexpro', 'scenarios'))
+PLAN = 'plan'
+ACTUAL = 'actual'
+
+# units of the metrics the generators read
+METRICS = {
+    'revenue': '千円',        # 売上総合計
+    'mrr_annual': '千円',     # MRR合計（年間）
+    'option_svc': '千円',     # オプションサービス
+    'compound': '千円',       # コンパウンド新規
+    'sales_dx': '千円',       # 営業DX新規
+    'arpa': '千円/月',        # ARPA（長期PF）
+    'churn': '%/月',          # 月次解約率（長期PF）
+    'accounts': '社',         # 長期PFアカウント数（期末）
+    'new_accounts': '社',     # 新規長期PF成約数
+    'nrr': '%',               # NRR（期末、12ヶ月）
+    'retention': '%',         # 新規アカウントの12ヶ月後ロゴ継続率
+}
+COLUMNS = ('scenario', 'metric', 'period', 'value')
+FAN_PERCENTILES = (5, 25, 75, 95)  # outer and inner band of a fan chart
+# store metrics each chart of chart_data.json is filled from (see fill_chart_data)
+CHART_SERIES = {
+    'revenue_trend': ('revenue', 'mrr_annual', 'option_svc'),
+    'mrr_arpa': ('mrr_annual', 'arpa'),
+    'new_revenue': ('compound', 'sales_dx', 'revenue'),
+    'churn': ('churn',),
+    'accounts': ('accounts', 'new_accounts'),
+}
+_CODE_DTYPES = {'scenario': np.int32, 'metric': np.int16, 'period': np.int16}
+_stores = {}  # root -> ScenarioStore opened by open_store() in this process
+
+
+# ========== Sources ==========
+def read_rows(path, chunk_rows=CHUNK_ROWS):
+    """Yield (scenario, period, metric, value) lists from a source file.
+
+    CSV / .xlsx files are long tables with the four columns of the module
+    docstring; a .json file is the FY series of `ingest_actuals --series`,
+    read as scenario 'actual'.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            yield fiscal_rows(json.load(f))
+        return
+    for header, rows in iter_chunks(path, chunk_rows):
+        idx = [header.index(c) for c in ('scenario', 'period', 'metric', 'value')]
+        yield [[r[i] for i in idx] for r in rows if r and r[idx[0]] not in (None, '')]
+
+
+def fiscal_rows(series, scenario=ACTUAL):
+    """ingest_actuals / kpi_engine FY series (chart units: ¥M, ¥K/月) -> store rows.
+    Partial fiscal years (fiscal_series partial) and unknown values (None,
+    e.g. NRR of the first year) are not stored."""
+    series = full_years(series)
+    fields = {'revenue': ('revenue', 1000), 'mrr_annual': ('mrr_annual', 1000),
+              'option_annual': ('option_svc', 1000), 'arpa': ('arpa', 1),
+              'churn': ('churn', 1), 'accounts': ('accounts', 1),
+              'new_accounts': ('new_accounts', 1), 'nrr': ('nrr', 1),
+              'retention': ('retention', 1)}
+    return [[scenario, year, metric, series[key][i] * scale]
+            for key, (metric, scale) in fields.items() if key in series
+            for i, year in enumerate(series['years']) if series[key][i] is not None]
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+# ========== Build ==========
+def build(sources, root=DEFAULT_STORE_DIR):
+    """Convert source files into a store under root; returns the opened store.
+
+    Rows are sorted by (scenario, metric, period), so one series is a
+    contiguous slice. A later row for the same scenario, metric and period
+    replaces an earlier one (e.g. actuals loaded after a re-forecast).
+    Columns are written under a content-derived name before index.json is
+    replaced, so readers that still map the previous columns are unaffected.
+    """
+    names = {c: {} for c in _CODE_DTYPES}
+    codes = {c: [] for c in _CODE_DTYPES}
+    values = []
+    for path in sources:
+        for rows in read_rows(path):
+            for c, i in (('scenario', 0), ('period', 1), ('metric', 2)):
+                table = names[c]
+                codes[c].append(np.fromiter(
+                    (table.setdefault(str(r[i]).strip(), len(table)) for r in rows),
+                    dtype=np.int64, count=len(rows)))
+            values.append(np.fromiter((_parse_value(r[3]) for r in rows),
+                                      dtype=np.float64, count=len(rows)))
+
+    # dictionary codes in sorted order, so codes compare like the names
+    columns = {}
+    labels = {}
+    for c, dtype in _CODE_DTYPES.items():
+        labels[c] = sorted(names[c], key=_period_order if c == 'period' else None)
+        remap = np.empty(len(names[c]), dtype=np.int64)
+        remap[[names[c][n] for n in labels[c]]] = np.arange(len(labels[c]))
+        raw = np.concatenate(codes[c]) if codes[c] else np.zeros(0, dtype=np.int64)
+        columns[c] = remap[raw].astype(dtype)
+    columns['value'] = np.concatenate(values) if values else np.zeros(0)
+
+    # stable sort; of duplicate keys keep the last row
+    order = np.lexsort((columns['period'], columns['metric'], columns['scenario']))
+    columns = {c: a[order] for c, a in columns.items()}
+    if len(order):
+        key = [columns[c] for c in ('scenario', 'metric', 'period')]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = np.any([k[1:] != k[:-1] for k in key], axis=0)
+        columns = {c: a[last] for c, a in columns.items()}
+
+    digest = make_key(labels, [columns[c].tobytes().hex() for c in COLUMNS])[:16]
+    os.makedirs(root, exist_ok=True)
+    for c in COLUMNS:
+        path = os.path.join(root, f'{digest}.{c}.npy')
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(columns[c]))
+        os.replace(tmp, path)
+    index = {'digest': digest, 'rows': int(len(columns['value'])),
+             'sources': [_source_stamp(p) for p in sources], **{
+                 f'{c}s': labels[c] for c in _CODE_DTYPES}}
+    tmp = os.path.join(root, f'index.json.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(root, 'index.json'))
+    for name in os.listdir(root):
+        if name.endswith('.npy') and not name.startswith(digest + '.'):
+            os.remove(os.path.join(root, name))
+    _stores[root] = store = ScenarioStore(root)
+    return store
+
+
+def _parse_value(value):
+    if value is None or value == '':
+        return np.nan
+    return float(str(value).replace(',', '')) if isinstance(value, str) else float(value)
+
+
+def _period_order(period):
+    """'FY9' < 'FY22' < 'FY100'; other labels sort as text after the FYs."""
+    digits = period[2:]
+    return (0, int(digits), '') if period.startswith('FY') and digits.isdigit() else (1, 0, period)
+
+
+# ========== Read ==========
+class ScenarioStore:
+    """Read-only view of a built store. The columns are memory-mapped."""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        with open(os.path.join(root, 'index.json'), encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.digest = self.index['digest']
+        self._stamp = _file_stamp(os.path.join(root, 'index.json'))
+        self.scenarios = self.index['scenarios']
+        self.metrics = self.index['metrics']
+        self.periods = self.index['periods']
+        self._codes = {c: {n: i for i, n in enumerate(self.index[f'{c}s'])}
+                       for c in _CODE_DTYPES}
+        self.columns = {c: np.load(os.path.join(root, f'{self.digest}.{c}.npy'), mmap_mode='r')
+                        for c in COLUMNS}
+
+    def __len__(self):
+        return self.index['rows']
+
+    def current(self):
+        """False once index.json was replaced (another process rebuilt the store,
+        e.g. nexpro.py store / simulate) or a source it was built from changed."""
+        try:
+            return (_file_stamp(os.path.join(self.root, 'index.json')) == self._stamp
+                    and all(_source_stamp(s[0]) == s for s in self.index['sources']))
+        except OSError:
+            return False
+
+    def _slice(self, scenario, metric):
+        """Row range of one (scenario, metric) series (binary search on the mmap)."""
+        s = self._codes['scenario'].get(scenario)
+        m = self._codes['metric'].get(metric)
+        if s is None or m is None:
+            return 0, 0
+        col = self.columns['scenario']
+        lo, hi = np.searchsorted(col, s, 'left'), np.searchsorted(col, s, 'right')
+        col = self.columns['metric'][lo:hi]
+        return lo + np.searchsorted(col, m, 'left'), lo + np.searchsorted(col, m, 'right')
+
+    def series(self, metric, scenario=PLAN, periods=None):
+        """Values of metric for periods (default: every period of the store).
+
+        Periods without a value come back as NaN.
+        """
+        lo, hi = self._slice(scenario, metric)
+        periods = self.periods if periods is None else periods
+        out = np.full(len(periods), np.nan)
+        codes = self._codes['period']
+        have = dict(zip(self.columns['period'][lo:hi].tolist(),
+                        self.columns['value'][lo:hi].tolist()))
+        for i, p in enumerate(periods):
+            v = have.get(codes.get(p))
+            if v is not None:
+                out[i] = v
+        return out
+
+    def require(self, metric, scenario=PLAN, periods=None):
+        """series() as a list, raising KeyError if any period has no value."""
+        values = self.series(metric, scenario, periods)
+        if np.isnan(values).any():
+            missing = [p for p, v in zip(periods or self.periods, values) if np.isnan(v)]
+            raise KeyError(f'scenario {scenario!r} has no {metric} for {", ".join(missing)}')
+        return values.tolist()
+
+    def table(self, scenario=PLAN):
+        """{metric: {period: value}} of one scenario."""
+        s = self._codes['scenario'].get(scenario)
+        if s is None:
+            return {}
+        col = self.columns['scenario']
+        lo, hi = np.searchsorted(col, s, 'left'), np.searchsorted(col, s, 'right')
+        out = {}
+        for m, p, v in zip(self.columns['metric'][lo:hi].tolist(),
+                           self.columns['period'][lo:hi].tolist(),
+                           self.columns['value'][lo:hi].tolist()):
+            out.setdefault(self.metrics[m], {})[self.periods[p]] = v
+        return out
+
+
+def open_store(root=DEFAULT_STORE_DIR, sources=None):
+    """The store at root, (re)built first if it is missing or a source changed.
+
+    sources defaults to scenario_data.csv plus whatever the store was last
+    built from (see `nexpro.py store`). Kept open per process and root until
+    it is no longer current (see ScenarioStore.current).
+    """
+    store = _stores.get(root)
+    if store is not None and sources is None and store.current():
+        return store
+    try:
+        store = ScenarioStore(root)
+    except (OSError, ValueError, KeyError):
+        store = None
+    if sources is None:
+        built = [s[0] for s in store.index['sources']] if store else []
+        sources = [p for p in dict.fromkeys([os.path.abspath(SCENARIO_CSV)] + built)
+                   if os.path.exists(p)]
+    if store is None or store.index['sources'] != [_source_stamp(p) for p in sources]:
+        store = build(sources, root)
+    _stores[root] = store
+    return store
+
+
+# ========== Chart data ==========
+def period_of(label):
+    """Chart axis label -> store period ('FY25\\n(計画)', 'FY25(目標)' -> 'FY25')."""
+    return label.split('\n')[0].split('(')[0].strip()
+
+
+def _m1(v):
+    """¥M with one decimal; whole values stay int ('¥17M', '¥3.2M')."""
+    r = round(v, 1)
+    return int(r) if r.is_integer() else r
+
+
+def fan_bands(store, prefix, metric, periods, scale=1):
+    """Percentile bands {'p5', 'p25', 'p75', 'p95'} of metric from the band
+    scenarios <prefix>.p5 ... (monte_carlo), None where a period has none."""
+    out = {}
+    for q in FAN_PERCENTILES:
+        name = f'{prefix}.p{q}'
+        if name not in store.scenarios:
+            raise KeyError(f'no Monte Carlo bands {prefix!r} in the scenario store '
+                           f'(run: nexpro.py simulate)')
+        out[f'p{q}'] = [None if np.isnan(v) else round(v / scale, 1)
+                        for v in store.series(metric, name, periods)]
+    return out
+
+
+def _label_fields(data):
+    """(metric, period) of every '{metric[period]:fmt}' field in the labels of
+    data (kpi_tree). 'growth' is revenue growth over the fiscal year before."""
+    if isinstance(data, str):
+        return [tuple(name[:-1].split('[', 1))
+                for _, name, _, _ in string.Formatter().parse(data) if name]
+    if isinstance(data, (list, dict)):
+        return [f for v in (data.values() if isinstance(data, dict) else data)
+                for f in _label_fields(v)]
+    return []
+
+
+def _label_inputs(metric, period):
+    """Store (metric, period) pairs one label field is computed from."""
+    if metric == 'growth':
+        return [('revenue', f'FY{int(period[2:]) - 1}'), ('revenue', period)]
+    return [(metric, period)]
+
+
+def _fill_labels(data, store, scenario):
+    """data with its label templates formatted from store (¥M for 千円 metrics, % for growth)."""
+    if isinstance(data, list):
+        return [_fill_labels(v, store, scenario) for v in data]
+    if isinstance(data, dict):
+        return {k: _fill_labels(v, store, scenario) for k, v in data.items()}
+    if not isinstance(data, str) or not _label_fields(data):
+        return data
+    values = {}
+    for metric, period in _label_fields(data):
+        inputs = _label_inputs(metric, period)
+        v = [store.require(m, scenario, [p])[0] for m, p in inputs]
+        if metric == 'growth':
+            value = (v[1] / v[0] - 1) * 100
+        else:
+            value = v[0] / 1000 if METRICS.get(metric) == '千円' else v[0]
+        values.setdefault(metric, {})[period] = value
+    return data.format(**values)
+
+
+def missing_series(store, scenario, data):
+    """{metric: [periods]} that fill_chart_data(data, store, scenario) needs but
+    the scenario has no value for; empty when it covers every chart of data.
+    An actuals scenario, for example, has no plan years and no new businesses."""
+    missing = {}
+    for chart, metrics in CHART_SERIES.items():
+        if chart not in data:
+            continue
+        periods = [period_of(y) for y in data[chart]['years']]
+        for metric in metrics:
+            for p, v in zip(periods, store.series(metric, scenario, periods)):
+                if np.isnan(v):
+                    missing.setdefault(metric, {})[p] = None
+    for field in _label_fields(data.get('kpi_tree', [])):
+        for metric, p in _label_inputs(*field):
+            if np.isnan(store.series(metric, scenario, [p])[0]):
+                missing.setdefault(metric, {})[p] = None
+    return {m: sorted(ps, key=_period_order) for m, ps in missing.items()}
+
+
+def fill_chart_data(data, store, scenario=PLAN, fan=None):
+    """chart_data.json with the series of the time-series charts read from store.
+
+    Which periods are read follows each chart's 'years' labels; presentation
+    fields (titles, axis limits, colours, alerts) stay as in data.
+    fan: band scenario prefix (e.g. 'mc'): adds the percentile bands as fan
+    overlays of revenue_trend and mrr_arpa.
+    kpi_tree labels are format templates over store values, e.g.
+    'ARPA\\n¥{arpa[FY25]:.0f}K' (see _fill_labels).
+    Raises KeyError if the scenario lacks a series (see missing_series).
+    """
+    data = dict(data)
+
+    def get(chart, metric):
+        return store.require(metric, scenario, [period_of(y) for y in data[chart]['years']])
+
+    if 'revenue_trend' in data:
+        revenue = get('revenue_trend', 'revenue')
+        data['revenue_trend'] = dict(
+            data['revenue_trend'],
+            revenue=[round(v / 1000) for v in revenue],
+            mrr=[round(v / 1000) for v in get('revenue_trend', 'mrr_annual')],
+            option_svc=[round(v / 1000) for v in get('revenue_trend', 'option_svc')],
+            yoy=[None] + [f'{(b / a - 1) * 100:+.1f}%' for a, b in zip(revenue, revenue[1:])])
+    if 'mrr_arpa' in data:
+        data['mrr_arpa'] = dict(
+            data['mrr_arpa'],
+            mrr_annual=[round(v / 1000) for v in get('mrr_arpa', 'mrr_annual')],
+            arpa=[round(v) for v in get('mrr_arpa', 'arpa')])
+    if fan and 'revenue_trend' in data:
+        periods = [period_of(y) for y in data['revenue_trend']['years']]
+        data['revenue_trend'] = dict(data['revenue_trend'], fan={
+            'revenue': fan_bands(store, fan, 'revenue', periods, 1000)})
+    if fan and 'mrr_arpa' in data:
+        periods = [period_of(y) for y in data['mrr_arpa']['years']]
+        data['mrr_arpa'] = dict(data['mrr_arpa'], fan={
+            'mrr_annual': fan_bands(store, fan, 'mrr_annual', periods, 1000),
+            'arpa': fan_bands(store, fan, 'arpa', periods)})
+    if 'new_revenue' in data:
+        compound = get('new_revenue', 'compound')
+        sales_dx = get('new_revenue', 'sales_dx')
+        revenue = get('new_revenue', 'revenue')
+        data['new_revenue'] = dict(
+            data['new_revenue'],
+            compound=[_m1(v / 1000) for v in compound],
+            sales_dx=[_m1(v / 1000) for v in sales_dx],
+            pct_of_total=[round((c + s) / r * 100, 1)
+                          for c, s, r in zip(compound, sales_dx, revenue)])
+    if 'churn' in data:
+        data['churn'] = dict(data['churn'],
+                             churn=[round(v, 1) for v in get('churn', 'churn')])
+    if 'accounts' in data:
+        data['accounts'] = dict(
+            data['accounts'],
+            long_term=[round(v) for v in get('accounts', 'accounts')],
+            new_per_year=[round(v) for v in get('accounts', 'new_accounts')])
+    if 'kpi_tree' in data:
+        data['kpi_tree'] = _fill_labels(data['kpi_tree'], store, scenario)
+    return data
+
+
+def rederive(chart, merged, override, store, scenario=PLAN):
+    """merged (chart data with override shallow-merged over it) with the fields
+    fill_chart_data derives (revenue_trend yoy, new_revenue pct_of_total)
+    recomputed when override replaces their source series but not the field
+    itself. new_revenue's total revenue (¥M) is the override's 'revenue', else
+    the scenario's revenue for its years."""
+    if chart == 'revenue_trend' and 'yoy' not in override and {'revenue', 'years'} & set(override):
+        merged['yoy'] = None  # drawn from revenue
+    if (chart == 'new_revenue' and 'pct_of_total' not in override
+            and {'compound', 'sales_dx', 'revenue', 'years'} & set(override)):
+        revenue = merged.get('revenue') or [
+            v / 1000 for v in store.require('revenue', scenario,
+                                            [period_of(y) for y in merged['years']])]
+        merged['pct_of_total'] = [round((c + s) / r * 100, 1) for c, s, r
+                                  in zip(merged['compound'], merged['sales_dx'], revenue)]
+    return merged
+
+
+def print_table(store, scenario, file=sys.stdout):
+    table = store.table(scenario)
+    periods = [p for p in store.periods if any(p in t for t in table.values())]
+    print(f'[{scenario}]', file=file)
+    print(f'{"metric":<14}' + ''.join(f'{p:>12}' for p in periods), file=file)
+    for metric, row in table.items():
+        cells = ''.join(f'{row[p]:>12,.1f}' if p in row else f'{"—":>12}' for p in periods)
+        print(f'{metric:<14}{cells}', file=file)
+
+
+if __name__ == '__main__':
+    import nexpro
+    sys.exit(nexpro.main(['store'] + sys.argv[1:]))
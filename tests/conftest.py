@@ -0,0 +1,29 @@
+import csv
+import os
+import sys
+
+import pytest
+
+# the generators are flat modules at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def export(tmp_path):
+    """60 months from 2020/01 (FY19 Jan-Mar ... FY24 Apr-Dec): 100 opening
+    accounts, one new account per month."""
+    path = tmp_path / 'actuals.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(['month', 'account_id', 'mrr', 'option_revenue'])
+        for m in range(60):
+            for a in range(100 + m):
+                w.writerow([f'{2020 + m // 12}/{m % 12 + 1}', f'A{a}', '10,000', 1000])
+    return str(path)
+
+
+@pytest.fixture
+def plan_store(tmp_path):
+    """Scenario store built from scenario_data.csv in a temporary directory."""
+    import scenario_store
+    return scenario_store.build([scenario_store.SCENARIO_CSV], str(tmp_path / 'store'))
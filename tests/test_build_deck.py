@@ -0,0 +1,39 @@
+import pytest
+
+import generate_pptx as gp
+
+FLAGS = ('CHART_DIR', 'CLONE_CHROME', 'CHART_BACKEND', 'CHART_DATA', 'IMAGE_DPI', 'INCREMENTAL',
+         'STREAM', 'SVG_CHARTS', 'SCENARIO', 'MEDIA_STORE')
+
+
+def flags():
+    return {name: getattr(gp, name) for name in FLAGS}
+
+
+def test_build_flags_do_not_outlive_the_build(tmp_path):
+    before = flags()
+    gp.build_deck(str(tmp_path / 'deck.pptx'), str(tmp_path), verbose=False,
+                  clone_chrome=True, chart_backend='native', charts={'churn': {}},
+                  image_dpi=96, stream=True, svg_charts=True)
+    assert flags() == before
+    assert len(gp.prs.slides) == len(gp.SLIDES)
+
+
+def test_flags_restored_after_a_failed_build(tmp_path):
+    before = flags()
+    with pytest.raises(KeyError, match='no-such-scenario'):
+        gp.build_deck(str(tmp_path / 'deck.pptx'), verbose=False, stream=True,
+                      scenario='no-such-scenario')
+    assert flags() == before
+    assert gp._writer is None
+
+
+def test_batch_releases_the_media_store(tmp_path, monkeypatch):
+    def interrupted(*args, **kwargs):
+        assert gp.MEDIA_STORE is not None
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(gp, 'build_deck', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        gp.build_batch([{'name': 'a', 'out': str(tmp_path / 'a.pptx')}])
+    assert gp.MEDIA_STORE is None
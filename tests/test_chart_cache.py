@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+import generate_charts as gc
+from chart_cache import ChartCache, make_key
+
+
+@pytest.fixture
+def spec(monkeypatch):
+    # no font probing: the resolved font is part of the key, not under test here
+    monkeypatch.setattr(gc, '_font_resolved', True)
+    monkeypatch.setattr(gc, 'JP_FONT', 'Noto Sans CJK JP')
+    monkeypatch.setattr(gc, 'JP_FONT_PATH', '/fonts/NotoSansCJK.ttc')
+    return {'chart': 'churn', 'out': 'churn_rate.png', 'format': 'png',
+            'data': {'years': ['FY22', 'FY23'], 'churn': [3.6, 2.3],
+                     'colors': ['ACCENT_RED', 'ACCENT'], 'ylim': [0, 5]}}
+
+
+def test_make_key_ignores_dict_order():
+    assert make_key({'a': 1, 'b': 2}) == make_key({'b': 2, 'a': 1})
+    assert make_key({'a': 1}) != make_key({'a': 2})
+
+
+def test_spec_key_is_stable(spec):
+    assert gc.spec_key(spec) == gc.spec_key(dict(spec))
+
+
+@pytest.mark.parametrize('change', [
+    lambda s: s['data'].update(churn=[3.6, 2.4]),
+    lambda s: s.update(format='svg'),
+    lambda s: s.update(chart='accounts'),
+])
+def test_spec_key_follows_spec(spec, change):
+    key = gc.spec_key(spec)
+    spec = dict(spec, data=dict(spec['data']))
+    change(spec)
+    assert gc.spec_key(spec) != key
+
+
+@pytest.mark.parametrize('name, value, fmt', [
+    ('_source_key', 'edited helper', 'png'),   # any edit of generate_charts.py
+    ('JP_FONT_PATH', '/fonts/other.ttf', 'png'),
+    ('DPI', 100, 'png'),
+    ('SVG_FALLBACK_DPI', 0, 'svg'),
+])
+def test_spec_key_follows_render_environment(spec, monkeypatch, name, value, fmt):
+    spec = dict(spec, format=fmt)
+    key = gc.spec_key(spec)
+    monkeypatch.setattr(gc, name, value)
+    assert gc.spec_key(spec) != key
+
+
+def test_spec_key_follows_matplotlib_version(spec, monkeypatch):
+    key = gc.spec_key(spec)
+    monkeypatch.setattr(gc, '_matplotlib_version', lambda: '0.0')
+    assert gc.spec_key(spec) != key
+
+
+def test_cache_store_fetch(tmp_path):
+    cache = ChartCache(str(tmp_path / 'cache'))
+    src = tmp_path / 'a.png'
+    src.write_bytes(b'png')
+    dest = tmp_path / 'out.png'
+    assert not cache.fetch('ab' * 32, str(dest))
+    cache.store('ab' * 32, str(src))
+    assert cache.fetch('ab' * 32, str(dest))
+    assert dest.read_bytes() == b'png'
+    assert cache.get_bytes('cd' * 32, '.slide') is None
+    cache.put_bytes('cd' * 32, b'slide', '.slide')
+    assert cache.get_bytes('cd' * 32, '.slide') == b'slide'
+
+
+def test_cache_prune_evicts_least_recently_used(tmp_path):
+    cache = ChartCache(str(tmp_path / 'cache'), max_bytes=250, max_age=None)
+    now = time.time()
+    for i, key in enumerate(['aa' * 32, 'bb' * 32, 'cc' * 32]):
+        cache.put_bytes(key, b'x' * 100, '.png')
+        os.utime(cache.path_for(key), (now - 100 + i, now - 100 + i))
+    assert cache.prune() == 1
+    assert not os.path.exists(cache.path_for('aa' * 32))
+    assert os.path.exists(cache.path_for('cc' * 32))
+
+
+def test_cache_prune_evicts_expired(tmp_path):
+    cache = ChartCache(str(tmp_path / 'cache'), max_bytes=None, max_age=60)
+    cache.put_bytes('aa' * 32, b'x', '.png')
+    cache.put_bytes('bb' * 32, b'x', '.png')
+    old = time.time() - 120
+    os.utime(cache.path_for('aa' * 32), (old, old))
+    assert cache.prune() == 1
+    assert os.path.exists(cache.path_for('bb' * 32))
@@ -0,0 +1,17 @@
+from PIL import Image
+
+import image_opt
+
+
+def test_image_memo_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_opt, '_memo', {})
+    monkeypatch.setattr(image_opt, '_memo_bytes', 0)
+    path = str(tmp_path / 'chart.png')
+    Image.new('RGB', (400, 300), 'navy').save(path)
+    data, _ = image_opt.optimize_image(path, source_key='rev0')
+    monkeypatch.setattr(image_opt, 'MEMO_BYTES', len(data.getvalue()) * 3)
+    for rev in range(10):  # a new chart revision per build
+        image_opt.optimize_image(path, source_key=f'rev{rev}')
+    assert len(image_opt._memo) == 3
+    assert image_opt._memo_bytes == sum(len(d) for d, _ in image_opt._memo.values())
+    assert ('rev9', None, None, image_opt.DEFAULT_DPI, image_opt.DEFAULT_COLORS) in image_opt._memo
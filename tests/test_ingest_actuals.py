@@ -0,0 +1,31 @@
+import pytest
+
+import ingest_actuals as ia
+
+
+def test_parse_month():
+    assert ia.parse_month('2024-04') == ia.parse_month('2024/4') == ia.parse_month('24/4')
+    assert ia.parse_month('2000-01') == 2000 * 12
+    with pytest.raises(ValueError, match='before 2000/01'):
+        ia.parse_month('1999-12')
+
+
+def test_partial_fiscal_years_left_out(export):
+    series = ia.aggregate_file(export)
+    assert series['years'] == ['FY20', 'FY21', 'FY22', 'FY23']
+    assert series['months'] == [12] * 4
+    assert series['new_accounts'] == [12] * 4
+
+
+def test_partial_fiscal_years_labelled(export):
+    series = ia.aggregate_file(export, partial=True)
+    assert series['years'] == ['FY19(3ヶ月)', 'FY20', 'FY21', 'FY22', 'FY23', 'FY24(9ヶ月)']
+    # opening accounts are not new logos
+    assert series['new_accounts'][0] == 2
+    assert ia.to_chart_data(series)['revenue_trend']['years'] == ['FY20', 'FY21', 'FY22', 'FY23']
+
+
+def test_no_complete_year():
+    series = {'years': ['FY24(9ヶ月)'], 'revenue': [1], 'mrr_annual': [1], 'months': [9]}
+    with pytest.raises(ValueError, match='no complete fiscal year'):
+        ia.to_chart_data(series)
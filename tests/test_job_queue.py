@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from job_queue import JobQueue, QueueFull
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        yield ex
+
+
+def test_identical_jobs_run_once(executor):
+    calls = []
+    release = threading.Event()
+
+    def job(x):
+        calls.append(x)
+        release.wait(5)
+        return x * 2
+
+    async def main():
+        queue = JobQueue(executor, workers=2)
+        first = asyncio.ensure_future(queue.submit(job, 21))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(queue.submit(job, 21))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await first, await second, queue.metrics()
+
+    a, b, metrics = run(main())
+    assert (a, b) == (42, 42)
+    assert calls == [21]
+    assert metrics['counts']['deduped'] == 1
+    assert metrics['counts']['completed'] == 1
+    assert metrics['pending'] == 0
+
+
+def test_full_queue_rejects(executor):
+    release = threading.Event()
+
+    def job(x):
+        release.wait(5)
+        return x
+
+    async def main():
+        queue = JobQueue(executor, workers=1, max_pending=1)
+        first = asyncio.ensure_future(queue.submit(job, 1))
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFull):
+            await queue.submit(job, 2)
+        # an identical job joins the pending one instead of being rejected
+        same = asyncio.ensure_future(queue.submit(job, 1))
+        # block=True waits for room instead
+        blocked = asyncio.ensure_future(queue.submit(job, 3, block=True))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        release.set()
+        return await first, await same, await blocked, queue.metrics()
+
+    first, same, blocked, metrics = run(main())
+    assert (first, same, blocked) == (1, 1, 3)
+    assert metrics['counts']['rejected'] == 1
+    assert metrics['counts']['completed'] == 2
+
+
+def test_failed_job_is_not_kept(executor):
+    def job(x):
+        raise ValueError(x)
+
+    async def main():
+        queue = JobQueue(executor, workers=1)
+        with pytest.raises(ValueError):
+            await queue.submit(job, 'boom')
+        return queue.metrics()
+
+    metrics = run(main())
+    assert metrics['counts']['failed'] == 1
+    assert metrics['pending'] == 0
+
+
+def test_tenant_limit(executor):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def job(x):
+        with lock:
+            running.append(x)
+            peak.append(len(running))
+        threading.Event().wait(0.05)
+        with lock:
+            running.remove(x)
+        return x
+
+    async def main():
+        queue = JobQueue(executor, workers=4, tenant_limit=1)
+        return await asyncio.gather(*(queue.submit(job, i, tenant='a') for i in range(3)))
+
+    assert run(main()) == [0, 1, 2]
+    assert max(peak) == 1
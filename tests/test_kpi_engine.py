@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pytest
+
+import ingest_actuals as ia
+import kpi_engine as ke
+import scenario_store
+
+
+def test_kpi_engine_matches_aggregator(export):
+    _, months, mrr, option = ke.load_mrr_matrix(export)
+    kpis = ke.compute_kpis(mrr, option=option)
+    assert kpis['new_logos'][0] == 0
+    assert kpis['mrr_new'][0] == 0
+    np.testing.assert_array_equal(kpis['new_logos'][1:], kpis['mrr_new'][1:] / 10000)
+    series = ke.fiscal_summary(kpis, months)
+    expected = ia.aggregate_file(export)
+    for key in ('years', 'accounts', 'new_accounts', 'mrr_annual', 'option_annual', 'revenue',
+                'arpa', 'churn', 'months'):
+        assert series[key] == expected[key], key
+    assert series['revenue'] != series['mrr_annual']
+    assert ke.fiscal_summary(kpis, months, partial=True)['years'][-1] == 'FY24(9ヶ月)'
+
+
+def test_nrr_and_retention(export):
+    _, months, mrr, option = ke.load_mrr_matrix(export)
+    mrr[:10, 30:] = 0  # ten opening accounts leave in month 30
+    series = ke.fiscal_summary(ke.compute_kpis(mrr, option=option), months)
+    # 126 accounts a year before FY22's end, 10 of them gone
+    assert series['nrr'] == [100, 100, 92, 100]
+    assert series['retention'][:3] == [100.0] * 3
+    assert series['retention'][3] is None  # FY23 cohorts are not 12 months old yet
+
+
+def test_engine_series_feed_the_store(export, tmp_path):
+    _, months, mrr, option = ke.load_mrr_matrix(export)
+    path = tmp_path / 'actuals.json'
+    path.write_text(json.dumps(ke.fiscal_summary(ke.compute_kpis(mrr, option=option), months)))
+    store = scenario_store.build([scenario_store.SCENARIO_CSV, str(path)], str(tmp_path / 'st'))
+    table = store.table(scenario_store.ACTUAL)
+    assert sorted(table['retention']) == ['FY20', 'FY21', 'FY22']  # FY23: None, not stored
+    assert table['revenue']['FY21'] == ia.aggregate_file(export)['revenue'][1] * 1000
+
+
+def test_kpi_tree_labels_from_the_store(plan_store):
+    tree = {'biz_kpis': [[1.5, 4.0, 'NRR\n{nrr[FY25]:.0f}%→{nrr[FY26]:.0f}%'],
+                         [4.2, 4.0, 'ARR\n{growth[FY25]:+.0f}%'], [6.8, 4.0, '粗利率']],
+            'leading': [[0.3, 2.5, 'MRR\n¥{mrr_annual[FY27]:.0f}M', 1.5]]}
+    filled = scenario_store.fill_chart_data({'kpi_tree': tree}, plan_store)['kpi_tree']
+    assert filled == {'biz_kpis': [[1.5, 4.0, 'NRR\n100%→110%'], [4.2, 4.0, 'ARR\n+27%'],
+                                   [6.8, 4.0, '粗利率']],
+                      'leading': [[0.3, 2.5, 'MRR\n¥527M', 1.5]]}
+    tree['biz_kpis'][0][2] = 'NRR {nrr[FY27]:.0f}%'
+    assert scenario_store.missing_series(plan_store, 'plan', {'kpi_tree': tree}) == {
+        'nrr': ['FY27']}
+    with pytest.raises(KeyError, match='no nrr for FY27'):
+        scenario_store.fill_chart_data({'kpi_tree': tree}, plan_store)
@@ -0,0 +1,27 @@
+import json
+
+import generate_charts as gc
+
+
+def calls_of(monkeypatch):
+    calls = []
+    monkeypatch.setattr(gc, 'make_specs', lambda *a, **kw: calls.append(kw) or [])
+    return calls
+
+
+def test_single_data_file_keeps_scenario_and_fan(tmp_path, monkeypatch):
+    calls = calls_of(monkeypatch)
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps({'churn': {'ylim': None}}))
+    gc.load_specs(str(path), scenario='actual', fan='mc')
+    assert [(c['scenario'], c['fan']) for c in calls] == [('actual', 'mc')]
+
+
+def test_scenarios_default_to_the_arguments(tmp_path, monkeypatch):
+    calls = calls_of(monkeypatch)
+    path = tmp_path / 'scenarios.json'
+    path.write_text(json.dumps({'scenarios': [
+        {'name': 'a'}, {'name': 'b', 'scenario': 'plan', 'fan': None}]}))
+    gc.load_specs(str(path), scenario='actual', fan='mc')
+    assert [(c['prefix'], c['scenario'], c['fan']) for c in calls] == [
+        ('a', 'actual', 'mc'), ('b', 'plan', None)]
@@ -0,0 +1,70 @@
+import itertools
+
+from pptx.util import Inches, Pt
+
+import generate_pptx as gp
+
+HEADER = ['ID', 'アカウント名', 'プラン', 'MRR']
+WIDTHS = [Inches(1.0), Inches(3.0), Inches(1.5), Inches(1.5)]
+MAX_HEIGHT = Inches(5.3)
+
+
+def rows(n, name='アカウント'):
+    return ([f'A{i:05d}', f'{name}{i}', 'SMB', f'¥{i:,}'] for i in range(n))
+
+
+def test_pages_fit_under_the_header():
+    header_h = gp.estimate_row_height(HEADER, WIDTHS, 8)
+    pages = list(gp.paginate_rows(rows(1000), WIDTHS, 8, MAX_HEIGHT, HEADER))
+    assert len(pages) > 1
+    for page, heights in pages:
+        assert len(page) == len(heights)
+        assert header_h + sum(heights) <= MAX_HEIGHT
+    # pages are full: the next row would not have fitted
+    for (_, heights), (_, following) in zip(pages, pages[1:]):
+        assert header_h + sum(heights) + following[0] > MAX_HEIGHT
+
+
+def test_rows_kept_in_order():
+    pages = gp.paginate_rows(rows(500), WIDTHS, 8, MAX_HEIGHT, HEADER)
+    flat = [r for page, _ in pages for r in page]
+    assert flat == list(rows(500))
+
+
+def test_wrapped_rows_are_taller():
+    short = gp.estimate_row_height(['A', 'x', 'SMB', '1'], WIDTHS, 8)
+    wrapped = gp.estimate_row_height(['A', 'ア' * 100, 'SMB', '1'], WIDTHS, 8)
+    two_lines = gp.estimate_row_height(['A', 'x\ny', 'SMB', '1'], WIDTHS, 8)
+    assert short == Pt(8 * 1.2 + 4)
+    assert wrapped > two_lines > short
+
+
+def test_row_taller_than_a_page_gets_its_own_page():
+    tall = ['A', 'ア' * 5000, 'SMB', '1']
+    data = [['A', 'a', 'SMB', '1'], tall, ['B', 'b', 'SMB', '2']]
+    pages = [page for page, _ in gp.paginate_rows(data, WIDTHS, 8, MAX_HEIGHT, HEADER)]
+    assert pages == [data[:1], [tall], data[2:]]
+
+
+def test_consumes_rows_lazily():
+    source = rows(10 ** 9)
+    first, _ = next(gp.paginate_rows(source, WIDTHS, 8, MAX_HEIGHT, HEADER))
+    # one page plus the row that did not fit
+    assert next(source)[0] == f'A{len(first) + 1:05d}'
+
+
+def test_empty_input_has_no_pages():
+    assert list(gp.paginate_rows(iter(()), WIDTHS, 8, MAX_HEIGHT, HEADER)) == []
+
+
+def test_paginated_table_slides():
+    gp.prs = gp.new_presentation()
+    before = len(gp.prs.slides)
+    pages = gp.add_paginated_table('Appendix', HEADER, itertools.islice(rows(10 ** 6), 300),
+                                   WIDTHS)
+    assert pages == len(gp.prs.slides) - before > 1
+    tables = [sh.table for slide in list(gp.prs.slides)[before:]
+              for sh in slide.shapes if sh.has_table]
+    assert len(tables) == pages
+    assert [t.cell(0, 0).text for t in tables] == ['ID'] * pages  # header repeated
+    assert sum(len(t.rows) - 1 for t in tables) == 300
@@ -0,0 +1,82 @@
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.util import Inches
+
+from pptx_stream import StreamingDeckWriter
+
+
+def png(color):
+    buf = io.BytesIO()
+    Image.new('RGB', (40, 30), color).save(buf, format='PNG')
+    buf.seek(0)
+    return buf
+
+
+def add_slide(prs, i):
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text = f'slide {i}'
+    # every other slide repeats the same image: stored once
+    slide.shapes.add_picture(png('navy' if i % 2 else (i, 0, 0)), Inches(1), Inches(2))
+    if i % 3 == 0:
+        data = CategoryChartData()
+        data.categories = ['FY25', 'FY26']
+        data.add_series('MRR', (1, 2))
+        slide.shapes.add_chart(XL_CHART_TYPE.COLUMN_CLUSTERED, Inches(5), Inches(2),
+                               Inches(4), Inches(3), data)
+
+
+@pytest.fixture
+def deck(tmp_path):
+    prs = Presentation()
+    path = str(tmp_path / 'deck.pptx')
+    writer = StreamingDeckWriter(prs, path)
+    for i in range(7):
+        add_slide(prs, i)
+        writer.flush()
+    writer.close()
+    return path
+
+
+def test_stream_writes_a_valid_pptx(deck):
+    with zipfile.ZipFile(deck) as z:
+        assert z.testzip() is None
+        names = z.namelist()
+    assert len(names) == len(set(names))
+    prs = Presentation(deck)
+    assert [s.shapes[0].text_frame.text for s in prs.slides] == [f'slide {i}' for i in range(7)]
+    assert sum(1 for s in prs.slides for sh in s.shapes if sh.has_chart) == 3
+    assert [c.chart.plots[0].categories[1] for s in prs.slides
+            for c in s.shapes if c.has_chart] == ['FY26'] * 3
+
+
+def test_identical_images_stored_once(deck):
+    with zipfile.ZipFile(deck) as z:
+        media = [n for n in z.namelist() if n.startswith('ppt/media/')]
+    # slides 1, 3, 5 share one image; 0, 2, 4, 6 each have their own
+    assert len(media) == 5
+
+
+def test_matches_a_regular_save(deck, tmp_path):
+    prs = Presentation()
+    for i in range(7):
+        add_slide(prs, i)
+    path = str(tmp_path / 'saved.pptx')
+    prs.save(path)
+    with zipfile.ZipFile(deck) as a, zipfile.ZipFile(path) as b:
+        assert sorted(a.namelist()) == sorted(b.namelist())
+
+
+def test_flushed_slides_release_their_parts(tmp_path):
+    prs = Presentation()
+    writer = StreamingDeckWriter(prs, str(tmp_path / 'deck.pptx'))
+    add_slide(prs, 0)
+    writer.flush()
+    assert writer.flushed == 1
+    assert len(prs.slides[0].part.rels) == 0
+    writer.close()
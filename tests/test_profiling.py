@@ -0,0 +1,39 @@
+import sys
+
+import generate_charts as gc
+import profiling
+
+
+def test_stage_is_false_when_off():
+    with profiling.stage('x') as st:
+        assert not st
+        st.counts['n'] = 1  # discarded
+    with profiling.profiling(report=False) as prof:
+        with profiling.stage('x') as st:
+            assert st
+            st.counts['n'] = 1
+    assert [s.counts for s in prof.stages if s.name == 'x'] == [{'n': 1}]
+
+
+def test_save_counts_artists_only_when_profiling(tmp_path, monkeypatch):
+    gc.setup_matplotlib()
+    from matplotlib.axes import Axes
+    monkeypatch.setattr(gc, 'OUT_DIR', str(tmp_path))
+    calls = []
+    get_children = Axes.get_children
+
+    def spy(ax):
+        # only the artist count of save() itself, not savefig's layout pass
+        if sys._getframe(1).f_code.co_filename == gc.__file__:
+            calls.append(ax)
+        return get_children(ax)
+
+    monkeypatch.setattr(Axes, 'get_children', spy)
+    fig, ax = gc.plt.subplots()
+    gc.save(fig, 'off.png')
+    assert calls == []
+    with profiling.profiling(report=False) as prof:
+        fig, ax = gc.plt.subplots()
+        gc.save(fig, 'on.png')
+    [st] = [s for s in prof.stages if s.name == 'save']
+    assert st.counts['artists'] > 0
@@ -0,0 +1,67 @@
+import base64
+import os
+
+import pytest
+
+import render_server as rs
+
+
+@pytest.mark.parametrize('prefix', ['', 'sc1', 'FY25-downside'])
+def test_prefix_accepted(prefix):
+    assert rs._check_prefix(prefix) == prefix
+
+
+@pytest.mark.parametrize('prefix', ['..', '.', '../x', 'a/b', '/tmp/x', '../../../tmp/x',
+                                    'a\0b', 3])
+def test_prefix_rejected(prefix):
+    with pytest.raises(ValueError, match='bad prefix'):
+        rs._check_prefix(prefix)
+
+
+def test_inside(tmp_path):
+    root = str(tmp_path)
+    assert rs._inside(os.path.join(root, 'sc1', 'churn.png'), root)
+    assert not rs._inside(os.path.join(root, '..', 'churn.png'), root)
+
+
+def test_chart_job_rejects_traversal():
+    with pytest.raises(ValueError):
+        rs.chart_job({'charts': ['churn'], 'prefix': '../../../tmp/x'}, cache_dir=None)
+
+
+@pytest.mark.parametrize('field, value', [
+    ('out', '/tmp/deck.pptx'), ('out', '../deck.pptx'), ('out', 'deck.csv'),
+    ('chart_dir', '/etc'), ('chart_dir', '../..'),
+    ('template', 'base.pptx'), ('appendix', '/etc/passwd'),
+])
+def test_deck_job_rejects_paths(tmp_path, field, value):
+    with pytest.raises(ValueError, match=f'bad {field}'):
+        rs.deck_job({field: value}, deck_dir=str(tmp_path))
+
+
+def test_resolve(tmp_path):
+    root = str(tmp_path)
+    assert rs._resolve('a/deck.pptx', root, 'out') == os.path.join(root, 'a', 'deck.pptx')
+    assert rs._resolve(os.path.join(root, 'x.csv'), root, 'appendix') == os.path.join(root, 'x.csv')
+    (tmp_path / 'link').symlink_to('/etc')
+    with pytest.raises(ValueError, match='outside'):
+        rs._resolve('link/passwd', root, 'appendix')
+
+
+def test_svg_job_returns_both_files(tmp_path, monkeypatch):
+    import generate_charts as gc
+    monkeypatch.setattr(gc, 'OUT_DIR', str(tmp_path))
+    [result] = rs.chart_job({'charts': ['churn'], 'format': 'svg', 'cache': False})
+    assert result['ok'], result['error']
+    assert result['svg_path'] == str(tmp_path / 'churn_rate.svg')
+    rs._attach_bytes(result)
+    assert base64.b64decode(result['data']).startswith(b'\x89PNG')
+    assert b'<svg' in base64.b64decode(result['data_svg'])
+
+
+def test_png_job_has_no_svg(tmp_path):
+    path = tmp_path / 'churn_rate.png'
+    path.write_bytes(b'png')
+    result = {'path': str(path)}
+    rs._attach_bytes(result)
+    assert set(result) == {'path', 'data'}
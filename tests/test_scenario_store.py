@@ -0,0 +1,141 @@
+import json
+import math
+import os
+
+import pytest
+
+import scenario_store as ss
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('scenario,period,metric,value\n')
+        f.writelines(','.join(map(str, r)) + '\n' for r in rows)
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    src = write_csv(tmp_path / 'a.csv', [
+        ['plan', 'FY25', 'revenue', '"649,820"'],
+        ['plan', 'FY9', 'revenue', 1],
+        ['plan', 'FY26', 'revenue', 900],
+        ['plan', 'FY26', 'revenue', 912],  # later row wins
+        ['plan', 'FY25', 'arpa', 186],
+        ['low', 'FY25', 'revenue', 600],
+    ])
+    return ss.build([src], str(tmp_path / 'store'))
+
+
+def test_round_trip(store):
+    assert store.scenarios == ['low', 'plan']
+    assert store.periods == ['FY9', 'FY25', 'FY26']  # FY order, not text order
+    assert store.series('revenue', 'plan').tolist() == [1, 649820, 912]
+    assert store.require('revenue', 'low', ['FY25']) == [600]
+    assert store.table('plan') == {'arpa': {'FY25': 186},
+                                   'revenue': {'FY9': 1, 'FY25': 649820, 'FY26': 912}}
+    assert len(store) == 5
+
+
+def test_reopen_reads_same_values(store):
+    again = ss.ScenarioStore(store.root)
+    assert again.digest == store.digest
+    assert again.series('revenue', 'plan').tolist() == store.series('revenue', 'plan').tolist()
+
+
+def test_missing_values(store):
+    assert all(math.isnan(v) for v in store.series('arpa', 'low', ['FY25', 'FY26']))
+    assert math.isnan(store.series('revenue', 'plan', ['FY27'])[0])
+    assert math.isnan(store.series('nope', 'plan', ['FY25'])[0])
+    with pytest.raises(KeyError, match='no arpa for FY26, FY27'):
+        store.require('arpa', 'plan', ['FY25', 'FY26', 'FY27'])
+    assert store.table('nope') == {}
+
+
+def test_open_store_follows_rebuilds(tmp_path, store):
+    assert ss.open_store(store.root) is store
+    # another process rebuilds the store; this one still holds the old index
+    ss.build([write_csv(tmp_path / 'b.csv', [['plan', 'FY25', 'revenue', 1]])], store.root)
+    ss._stores[store.root] = store
+    assert not store.current()
+    reopened = ss.open_store(store.root)
+    assert reopened is not store
+    assert reopened.require('revenue', 'plan', ['FY25']) == [1]
+    assert 'low' not in reopened.scenarios
+
+
+def test_open_store_rebuilds_on_source_change(tmp_path):
+    src = write_csv(tmp_path / 'a.csv', [['plan', 'FY25', 'revenue', 1]])
+    root = str(tmp_path / 'store')
+    first = ss.open_store(root, [src])
+    write_csv(tmp_path / 'a.csv', [['plan', 'FY25', 'revenue', 2]])
+    os.utime(src, ns=(0, 0))
+    assert not first.current()
+    assert ss.open_store(root).require('revenue', 'plan', ['FY25']) == [2]
+
+
+def test_actuals_series_keep_full_years_only(tmp_path):
+    series = {'years': ['FY23', 'FY24', 'FY25(9ヶ月)'], 'revenue': [497, 513, 400],
+              'mrr_annual': [253, 289, 240], 'months': [12, 12, 9]}
+    path = tmp_path / 'series.json'
+    path.write_text(json.dumps(series), encoding='utf-8')
+    store = ss.build([str(path)], str(tmp_path / 'store'))
+    assert store.scenarios == [ss.ACTUAL]
+    assert store.periods == ['FY23', 'FY24']
+    assert store.require('revenue', ss.ACTUAL, ['FY23', 'FY24']) == [497000, 513000]
+
+
+def test_plan_covers_the_charts(plan_store):
+    with open(os.path.join(os.path.dirname(ss.SCENARIO_CSV), 'chart_data.json'),
+              encoding='utf-8') as f:
+        data = json.load(f)
+    assert ss.missing_series(plan_store, ss.PLAN, data) == {}
+    filled = ss.fill_chart_data(data, plan_store)
+    assert filled['revenue_trend']['revenue'][-1] == 1383
+    assert filled['churn']['churn'][0] == 3.6
+
+
+def test_missing_series_lists_gaps(tmp_path):
+    src = write_csv(tmp_path / 'a.csv', [['actual', 'FY24', 'revenue', 513]])
+    store = ss.build([src], str(tmp_path / 'store'))
+    data = {'revenue_trend': {'years': ['FY24', 'FY25\n(計画)']}, 'churn': {'years': ['FY24']}}
+    missing = ss.missing_series(store, 'actual', data)
+    assert missing == {'revenue': ['FY25'], 'mrr_annual': ['FY24', 'FY25'],
+                       'option_svc': ['FY24', 'FY25'], 'churn': ['FY24']}
+    with pytest.raises(KeyError):
+        ss.fill_chart_data(data, store, 'actual')
+
+
+def filled(plan_store):
+    with open(os.path.join(os.path.dirname(ss.SCENARIO_CSV), 'chart_data.json'),
+              encoding='utf-8') as f:
+        return ss.fill_chart_data(json.load(f), plan_store)
+
+
+def merge(data, chart, override, store):
+    return ss.rederive(chart, dict(data[chart], **override), override, store)
+
+
+def test_derived_fields_follow_overrides(plan_store):
+    data = filled(plan_store)
+    years = data['new_revenue']['years']
+    unchanged = merge(data, 'revenue_trend', {'ylim': None}, plan_store)
+    assert unchanged['yoy'] == data['revenue_trend']['yoy']
+    assert merge(data, 'revenue_trend', {'revenue': [1, 2, 3]}, plan_store)['yoy'] is None
+    assert merge(data, 'revenue_trend', {'revenue': [1, 2], 'yoy': ['x', 'y']},
+                 plan_store)['yoy'] == ['x', 'y']
+    periods = [ss.period_of(y) for y in years]
+    revenue = [v / 1000 for v in plan_store.require('revenue', 'plan', periods)]
+    merged = merge(data, 'new_revenue', {'sales_dx': [10] * len(years)}, plan_store)
+    assert merged['pct_of_total'] == [round((c + 10) / r * 100, 1)
+                                      for c, r in zip(merged['compound'], revenue)]
+    merged = merge(data, 'new_revenue', {'compound': [1, 2], 'sales_dx': [3, 4],
+                                         'revenue': [40, 80], 'years': ['FY25', 'FY26']},
+                   plan_store)
+    assert merged['pct_of_total'] == [10.0, 7.5]
+
+
+def test_make_specs_rederives():
+    import generate_charts as gc
+    [spec] = gc.make_specs({'revenue_trend': {'revenue': [1, 2, 3, 4, 5, 6]}}, ['revenue_trend'])
+    assert spec['data']['yoy'] is None
@@ -0,0 +1,55 @@
+import zipfile
+
+import pytest
+from PIL import Image
+from pptx.util import Inches
+
+import generate_pptx as gp
+from media_store import MediaStore
+from pptx_stream import StreamingDeckWriter
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="40" height="30"><rect fill="{}"/></svg>'
+
+
+@pytest.fixture
+def charts(tmp_path, monkeypatch):
+    for name, color in (('churn', 'navy'), ('accounts', 'red')):
+        Image.new('RGB', (40, 30), color).save(tmp_path / f'{name}.png')
+        (tmp_path / f'{name}.svg').write_text(SVG.format(color))
+    monkeypatch.setattr(gp, 'CHART_DIR', str(tmp_path))
+    monkeypatch.setattr(gp, 'SVG_CHARTS', True)
+    monkeypatch.setattr(gp, 'prs', gp.new_presentation())
+    return tmp_path
+
+
+def add_slides(n):
+    for i in range(n):
+        slide = gp.add_slide()
+        gp.add_image(slide, 'churn.png', Inches(1), Inches(1), width=Inches(4))
+        if i % 2:
+            gp.add_image(slide, 'accounts.png', Inches(6), Inches(1), width=Inches(4))
+
+
+def media(path):
+    with zipfile.ZipFile(path) as z:
+        return sorted(n for n in z.namelist() if n.startswith('ppt/media/'))
+
+
+@pytest.mark.parametrize('store', [None, MediaStore()])
+def test_svg_stored_once_per_deck(charts, tmp_path, monkeypatch, store):
+    monkeypatch.setattr(gp, 'MEDIA_STORE', store)
+    add_slides(6)
+    gp.prs.save(str(tmp_path / 'deck.pptx'))
+    names = media(tmp_path / 'deck.pptx')
+    assert len([n for n in names if n.endswith('.svg')]) == 2
+    assert len([n for n in names if n.endswith('.png')]) == 2
+
+
+def test_svg_stored_once_when_streamed(charts, tmp_path):
+    writer = StreamingDeckWriter(gp.prs, str(tmp_path / 'deck.pptx'))
+    for _ in range(3):
+        add_slides(2)
+        writer.flush()
+    writer.close()
+    names = media(tmp_path / 'deck.pptx')
+    assert len([n for n in names if n.endswith('.svg')]) == 2